@@ -0,0 +1,281 @@
+"""
+Snapshot colonnaire des offres pour les agrégations analytiques.
+
+Après chaque scraping, la table jobs est écrite dans un fichier Arrow IPC non
+compressé (colonnes utiles aux stats seulement, villes / entreprises / sources et
+listes de technologies encodées en dictionnaire). Le serveur le mappe en mémoire :
+les colonnes sont des tableaux NumPy sans copie, et SnapshotEngine répond aux
+agrégations par des group-by vectorisés (np.bincount) au lieu d'interroger la base.
+
+Un snapshot porte la version des données (data_version.py) qu'il reflète et n'est
+utilisé que si elle est toujours la version courante : sinon les endpoints
+reviennent au SQL. Un fichier par version (jobs_snapshot-v<N>.arrow) : un fichier
+mappé n'est jamais remplacé sur place (impossible sous Windows).
+
+Dépendance : pyarrow.
+Construction manuelle (après un import ou une ré-extraction): python analytics_snapshot.py
+"""
+import os
+import sys
+import glob
+import json
+import threading
+import functools
+from array import array
+from datetime import datetime, date
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from sqlalchemy import select, func, String, type_coerce
+
+from models import Job
+from data_version import read_data_version
+
+try:
+    import pyarrow as pa
+except ImportError:  # dépendance optionnelle
+    pa = None
+
+# Jour / mois absent (date_posted NULL)
+NO_DATE = np.iinfo(np.int32).min
+EPOCH = date(1970, 1, 1)
+
+
+def month_code(month):
+    """'YYYY-MM' -> mois depuis 1970-01"""
+    year, mon = month.split('-')
+    return (int(year) - 1970) * 12 + int(mon) - 1
+
+
+def month_label(code):
+    return f'{1970 + code // 12:04d}-{code % 12 + 1:02d}'
+
+
+def snapshot_path(directory, version):
+    return os.path.join(directory, f'jobs_snapshot-v{version}.arrow')
+
+
+class _Encoder:
+    """Encodage dictionnaire : valeur -> code (ordre d'apparition)"""
+
+    def __init__(self):
+        self.codes = {}
+
+    def __call__(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.codes)
+        return code
+
+    def dictionary(self):
+        return pa.array(list(self.codes), type=pa.string())
+
+
+def build_snapshot(session, directory, yield_per=5000):
+    """Écrit le snapshot de la version courante des données ; retourne (chemin, nombre d'offres)"""
+    version = read_data_version(session)
+    locations, companies, sources, techs = _Encoder(), _Encoder(), _Encoder(), _Encoder()
+    # Tableaux compacts (4 octets par valeur) plutôt que des listes d'entiers Python
+    days, months, representative = array('i'), array('i'), array('b')
+    location_codes, company_codes, source_codes = array('i'), array('i'), array('i')
+    tech_offsets, tech_codes = array('i', [0]), array('i')
+
+    result = session.execute(
+        select(
+            Job.date_posted, Job.location, Job.company, Job.source_site,
+            func.coalesce(Job.cluster_id, Job.id) == Job.id,
+            # Liste JSON lue comme texte : json.loads est bien plus rapide que le type JSON de SQLAlchemy
+            type_coerce(Job.technologies, String),
+        ).execution_options(yield_per=yield_per)
+    )
+    for posted, location, company, source, is_representative, raw_techs in result:
+        if posted is None:
+            days.append(NO_DATE)
+            months.append(NO_DATE)
+        else:
+            days.append((posted.date() if isinstance(posted, datetime) else posted).toordinal() - EPOCH.toordinal())
+            months.append((posted.year - 1970) * 12 + posted.month - 1)
+        representative.append(1 if is_representative else 0)
+        location_codes.append(locations(location or ''))
+        company_codes.append(companies(company or ''))
+        source_codes.append(sources(source or ''))
+        # Une technologie compte une fois par offre (comme le rollup mensuel)
+        for tech in dict.fromkeys(t.strip() for t in json.loads(raw_techs or '[]')):
+            tech_codes.append(techs(tech))
+        tech_offsets.append(len(tech_codes))
+
+    def column(values, dtype=np.int32):
+        return pa.array(np.frombuffer(values, dtype=dtype))
+
+    def dictionary_column(codes, encoder):
+        return pa.DictionaryArray.from_arrays(column(codes), encoder.dictionary())
+
+    technologies = pa.ListArray.from_arrays(column(tech_offsets), dictionary_column(tech_codes, techs))
+    table = pa.table({
+        'posted_day': column(days),
+        'posted_month': column(months),
+        'representative': column(representative, np.int8),
+        'location': dictionary_column(location_codes, locations),
+        'company': dictionary_column(company_codes, companies),
+        'source_site': dictionary_column(source_codes, sources),
+        'technologies': technologies,
+    })
+    table = table.replace_schema_metadata({
+        'data_version': str(version),
+        'built_at': datetime.utcnow().isoformat(),
+    })
+
+    os.makedirs(directory, exist_ok=True)
+    path = snapshot_path(directory, version)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with pa.OSFile(tmp, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp, path)
+    _remove_old_snapshots(directory, keep=path)
+    return path, table.num_rows
+
+
+def _remove_old_snapshots(directory, keep):
+    for old in glob.glob(os.path.join(directory, 'jobs_snapshot-v*.arrow')):
+        if old != keep:
+            try:
+                os.remove(old)
+            except OSError:
+                # Encore mappé par un serveur (Windows) : supprimé au prochain build
+                pass
+
+
+def _column(table, name):
+    column = table.column(name)
+    return column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+
+
+def _dictionary_codes(array):
+    """(codes NumPy, valeurs) d'un tableau encodé en dictionnaire"""
+    return array.indices.to_numpy(zero_copy_only=False), array.dictionary.to_pylist()
+
+
+class SnapshotEngine:
+    """Agrégations vectorisées sur un snapshot mappé en mémoire"""
+
+    def __init__(self, path):
+        self._source = pa.memory_map(path, 'r')
+        table = pa.ipc.open_file(self._source).read_all()
+        self.version = int(table.schema.metadata[b'data_version'])
+        self.rows = table.num_rows
+        self.day = _column(table, 'posted_day').to_numpy(zero_copy_only=False)
+        self.month = _column(table, 'posted_month').to_numpy(zero_copy_only=False)
+        self.representative = _column(table, 'representative').to_numpy(zero_copy_only=False).view(np.bool_)
+        self.location, self.locations = _dictionary_codes(_column(table, 'location'))
+        self.company, self.companies = _dictionary_codes(_column(table, 'company'))
+        self.source, self.sources = _dictionary_codes(_column(table, 'source_site'))
+        technologies = _column(table, 'technologies')
+        self.tech_offsets = technologies.offsets.to_numpy(zero_copy_only=False)
+        self.tech, self.technologies = _dictionary_codes(technologies.values)
+        self.tech_index = {name: code for code, name in enumerate(self.technologies)}
+        # Mois de chaque valeur des listes de technologies, NO_DATE hors représentants de cluster
+        # (calculé une fois : les comptes par technologie ne portent que sur les offres uniques)
+        tech_job = np.repeat(np.arange(self.rows, dtype=np.int32), np.diff(self.tech_offsets))
+        self.tech_month = np.where(self.representative[tech_job], self.month[tech_job], NO_DATE).astype(np.int32)
+
+    def jobs_per_month(self, start_month, unique=False):
+        """[('YYYY-MM', n)] des mois non vides depuis `start_month`"""
+        start = month_code(start_month)
+        mask = self.month >= start
+        if unique:
+            mask &= self.representative
+        counts = np.bincount(self.month[mask] - start)
+        return [(month_label(start + i), int(counts[i])) for i in np.flatnonzero(counts)]
+
+    @functools.cached_property
+    def tech_month_matrix(self):
+        """
+        (premier mois, matrice [mois, code de technologie]) des offres uniques.
+        Calculée une fois par snapshot (un bincount sur toutes les valeurs), les requêtes la découpent.
+        """
+        width = len(self.technologies)
+        valid = self.tech_month != NO_DATE
+        if not width or not valid.any():
+            return 0, np.zeros((0, width), dtype=np.int64)
+        first = int(self.tech_month[valid].min())
+        # Clé (mois, technologie) décalée de 1 ; les valeurs écartées tombent dans la case 0
+        keys = np.where(valid, (self.tech_month - first) * width + self.tech + 1, 0)
+        counts = np.bincount(keys)[1:]
+        return first, np.pad(counts, (0, -len(counts) % width)).reshape(-1, width)
+
+    def tech_month_counts(self, tech_names, start_month):
+        """{'YYYY-MM': {tech: n}} pour les offres uniques, comme le rollup tech_monthly_counts"""
+        first, matrix = self.tech_month_matrix
+        start = max(month_code(start_month), first)
+        known = [(name, self.tech_index[name]) for name in tech_names if name in self.tech_index]
+        if not known:
+            return {}
+        counts = matrix[start - first:, [code for _, code in known]]
+        return {
+            month_label(start + m): {name: int(n) for (name, _), n in zip(known, counts[m]) if n}
+            for m in np.flatnonzero(counts.any(axis=1))
+        }
+
+    def value_counts(self, dimension, unique=False, exclude=(), limit=None):
+        """[(valeur, n)] par ordre décroissant pour 'location', 'company' ou 'source_site'"""
+        codes, values = {
+            'location': (self.location, self.locations),
+            'company': (self.company, self.companies),
+            'source_site': (self.source, self.sources),
+        }[dimension]
+        if unique:
+            codes = codes[self.representative]
+        counts = np.bincount(codes, minlength=len(values))
+        for value in exclude:
+            if value in values:
+                counts[values.index(value)] = 0
+        order = np.argsort(-counts, kind='stable')[:limit]
+        return [(values[i] or None, int(counts[i])) for i in order if counts[i]]
+
+
+class SnapshotStore:
+    """Snapshot du process : rouvert quand la version des données change"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._engine = None
+        self._lock = threading.Lock()
+
+    def get(self, version):
+        """Moteur du snapshot de `version`, ou None s'il n'a pas (encore) été construit"""
+        engine = self._engine
+        if engine is not None and engine.version == version:
+            return engine
+        path = snapshot_path(self.directory, version)
+        if not os.path.exists(path):
+            return None
+        with self._lock:
+            if self._engine is None or self._engine.version != version:
+                self._engine = SnapshotEngine(path)
+            return self._engine
+
+
+def refresh_snapshot():
+    """Reconstruit le snapshot après un run (sans effet si désactivé ; une erreur n'interrompt pas le run)"""
+    from config import Config
+    from database import session_scope
+
+    if not Config.ANALYTICS_SNAPSHOT_ENABLED or pa is None:
+        return None
+    try:
+        with session_scope() as session:
+            path, rows = build_snapshot(session, Config.ANALYTICS_SNAPSHOT_DIR)
+        print(f"🧊 Snapshot analytique: {rows} offres -> {os.path.basename(path)}")
+        return path
+    except Exception as e:
+        print(f"⚠️ Snapshot analytique non construit: {e}")
+        return None
+
+
+if __name__ == '__main__':
+    from database import init_db
+
+    init_db()
+    refresh_snapshot()
@@ -2,34 +2,52 @@ import os
 from flask import Flask
 from flask_cors import CORS
 from config import Config
-from models import db
+from extensions import db
 from routes import api
 
 from flask_apscheduler import APScheduler
-import subprocess
-import threading
+from sqlalchemy.exc import OperationalError, ProgrammingError
 import time
 
 scheduler = APScheduler()
 
-def run_scraper_task():
-    """Exécute le script de scraping en arrière-plan"""
+def run_scraper_task(app=None, trigger='scheduler'):
+    """Lance le scraping en arrière-plan (sans effet si un run 'standard' est déjà en cours)"""
     try:
         print(f"🔄 Lancement du scraping automatique : {time.ctime()}")
-        # Exécuter run_scrapers.py comme un sous-processus pour éviter les conflits d'event loop async
-        # Assumant que le script est dans backend/scraper/run_scrapers.py
-        scraper_path = os.path.join(os.path.dirname(__file__), 'scraper', 'run_scrapers.py')
-        # Ne pas capturer la sortie pour qu'elle s'affiche dans le terminal du backend
-        result = subprocess.run(['python', '-u', scraper_path])
-        
-        if result.returncode == 0:
-            print("✅ Scraping terminé avec succès")
-        else:
-            print("❌ Erreur lors du scraping (voir logs ci-dessus)")
+        app = app or scheduler.app
+        run_id, started = app.extensions['scrape_runs'].start('standard', trigger=trigger)
+        if not started:
+            print(f"⏭️  Scraping déjà en cours (run {run_id})")
     except Exception as e:
         print(f"❌ Exception tache scraping: {e}")
 
-def create_app(with_scheduler=True):
+def on_scrape_finished(app, kind, run_id, returncode):
+    if returncode == 0:
+        print(f"✅ Scraping {kind} terminé avec succès (run {run_id})")
+        # Nouvelle version des données : invalider et réchauffer le cache des stats sans attendre le poll
+        cache = app.extensions.get('stats_cache')
+        if cache is not None:
+            cache.refresh()
+    else:
+        print(f"❌ Erreur lors du scraping {kind} (run {run_id}, voir logs ci-dessus)")
+
+def create_tables(attempts=5):
+    for attempt in range(attempts):
+        try:
+            db.create_all()
+            return
+        except (OperationalError, ProgrammingError):
+            # Workers démarrés ensemble sur une base neuve : un autre process vient de créer la table
+            if attempt == attempts - 1:
+                raise
+            db.session.rollback()
+
+def create_app(with_scheduler=True, elect_scheduler=False):
+    """
+    with_scheduler : tâches de fond du serveur (scraping horaire, notifications, surveillance du cache).
+    elect_scheduler : plusieurs workers (wsgi.py) ; seul le worker élu exécute le scraping et les notifications.
+    """
     app = Flask(__name__)
     app.config.from_object(Config)
     
@@ -51,25 +69,94 @@ def create_app(with_scheduler=True):
     
     with app.app_context():
         # Create Tables if not exist
-        db.create_all()
+        create_tables()
+    
+    # Runs de scraping (API, scheduler) : un run actif par type, progression dans scrape_runs
+    from database import get_session
+    from scrape_runs import RunManager
+    app.extensions['scrape_runs'] = RunManager(
+        get_session,
+        stale_after=Config.SCRAPE_RUN_STALE_AFTER,
+        on_finished=lambda kind, run_id, returncode: on_scrape_finished(app, kind, run_id, returncode),
+    )
+    
+    if Config.LIVE_EVENTS_ENABLED:
+        # Flux SSE des nouvelles offres : un thread par process relit live_events pour tous les clients
+        from live_events import EventBroker
+        app.extensions['live_events'] = EventBroker(get_session)
+    
+    if Config.STATS_CACHE_ENABLED:
+        # Cache des réponses /api/stats/*, réchauffé à chaque nouvelle version des données
+        from stats_cache import StatsCache, cacheable_paths
+        stats_cache = StatsCache(app)
+        stats_cache.paths = cacheable_paths(app)
+        app.extensions['stats_cache'] = stats_cache
+        if with_scheduler:
+            stats_cache.start_watcher()
         
-    if with_scheduler:
-        # Programmer le job récurrent (toutes les 1 heures)
-        # id permet de ne pas le dupliquer si on reload
-        try:
-            scheduler.add_job(id='scraping_job', func=run_scraper_task, trigger='interval', hours=1, replace_existing=True)
-            
-            if not scheduler.running:
-                scheduler.start()
-        except Exception as e:
-            print(f"⚠️ Scheduler start skipped: {e}")
+    if Config.ANALYTICS_SNAPSHOT_ENABLED:
+        # Agrégations analytiques depuis le snapshot colonnaire du dernier run (repli SQL sinon)
+        from analytics_snapshot import SnapshotStore, pa
+        if pa is not None:
+            app.extensions['analytics_snapshot'] = SnapshotStore(Config.ANALYTICS_SNAPSHOT_DIR)
+        
+    if with_scheduler and elect_scheduler:
+        from leader import LeaderElection, make_lock
+        app.extensions['scheduler_election'] = LeaderElection(
+            make_lock(Config, get_session),
+            on_elected=lambda: start_background_tasks(app),
+            on_lost=pause_background_tasks,
+            interval=Config.SCHEDULER_ELECTION_INTERVAL,
+        ).start()
+    elif with_scheduler:
+        start_background_tasks(app)
     
     return app
 
-app = create_app()
+def start_background_tasks(app):
+    """Tâches d'un seul process : scraping programmé et envoi des notifications"""
+    if app.config.get('NOTIFY_WEBHOOK_URL') and 'notification_dispatcher' not in app.extensions:
+        # Envoi des notifications en attente dans l'outbox (y compris après un redémarrage)
+        from database import get_session
+        from notifications import NotificationDispatcher
+        app.extensions['notification_dispatcher'] = NotificationDispatcher(get_session).start()
+    
+    # Programmer le job récurrent (toutes les 1 heures)
+    # id permet de ne pas le dupliquer si on reload
+    try:
+        scheduler.add_job(id='scraping_job', func=run_scraper_task, trigger='interval', hours=1, replace_existing=True)
+        
+        if not scheduler.running:
+            scheduler.start()
+        else:
+            # Leader à nouveau élu après avoir perdu son verrou
+            scheduler.resume()
+    except Exception as e:
+        print(f"⚠️ Scheduler start skipped: {e}")
+
+def pause_background_tasks():
+    # Le dispatcher de notifications peut tourner dans plusieurs process (lots verrouillés) : seul le scraping est suspendu
+    if scheduler.running:
+        scheduler.pause()
+
+_app = None
+
+def get_app():
+    """Application du process, créée au premier accès"""
+    global _app
+    if _app is None:
+        _app = create_app()
+    return _app
+
+def __getattr__(name):
+    # Création paresseuse : importer ce module ne construit plus Flask, le scheduler ni les tables
+    if name == 'app':
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == '__main__':
-    # Lancer un premier scraping au démarrage dans un thread séparé
+    app = get_app()
+    # Premier scraping au démarrage (sous-process, la réponse ne l'attend pas)
     print("🚀 Démarrage du scraping initial...")
-    threading.Thread(target=run_scraper_task).start()
+    run_scraper_task(app, trigger='startup')
     app.run(debug=True, port=int(os.getenv('PORT', 5000)), use_reloader=False) # use_reloader=False évite les doublons de scheduler avec le debug mode
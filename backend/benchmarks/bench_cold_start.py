@@ -0,0 +1,132 @@
+"""
+Benchmark du démarrage à froid des process scrapers.
+
+Compare, dans des interpréteurs neufs, le DataPipeline() du commit de référence
+(--baseline, extrait dans un worktree git temporaire : create_app avec Flask,
+APScheduler, create_all et blueprint) au DataPipeline actuel (session
+SQLAlchemy simple + chargement de l'index d'URLs, numpy et requests chargés
+seulement quand ils servent). Les deux tournent sur la même DATABASE_URL.
+Le temps mesuré va du lancement du process à la fin du code du scénario
+(prêt à crawler) : l'arrêt de l'interpréteur n'est pas compté.
+
+Chaque ligne donne min / médiane / max : sur une machine chargée l'écart
+peut dépasser 100 ms, le max est donc affiché avec la marge restante.
+
+Vérifie ensuite l'objectif : médiane de DataPipeline(buffered=True) sous
+--target-ms, sans que Flask ne soit chargé. Code de sortie 1 sinon.
+
+Usage: DATABASE_URL=... python benchmarks/bench_cold_start.py [--runs 5] [--target-ms 1000] [--baseline REV]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+import statistics
+import importlib.util
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+# Démarrage à froid visé pour un process scraper, en millisecondes
+TARGET_MS = 1000
+# Dernier commit où DataPipeline() construisait l'app Flask
+BASELINE_REV = 'af9359c^'
+BASELINE_SCENARIO = "DataPipeline() @ {rev}"
+TARGET_SCENARIO = "DataPipeline(buffered=True)"
+# Les modèles ne doivent pas tirer Flask / Flask-SQLAlchemy (réservés à app.py, voir extensions.py)
+FLASK_FREE = (
+    "import sys; from scraper.pipeline import DataPipeline; DataPipeline(buffered=True); "
+    "sys.exit(int('flask' in sys.modules or 'flask_sqlalchemy' in sys.modules))"
+)
+
+SCENARIOS = [
+    ("interpréteur seul", "pass"),
+    (TARGET_SCENARIO, "from scraper.pipeline import DataPipeline; DataPipeline(buffered=True)"),
+]
+
+if importlib.util.find_spec('playwright') is not None:
+    SCENARIOS.append((
+        "run_scrapers jusqu'au crawl",
+        "import scraper.run_scrapers; from scraper.pipeline import DataPipeline; DataPipeline(buffered=True)",
+    ))
+
+
+def measure(code, runs, cwd=BACKEND_DIR):
+    """Temps jusqu'à « prêt » de `runs` process neufs, en ms (triés)."""
+    # Le process écrit l'heure à laquelle il est prêt (dernière ligne de sa sortie)
+    code = f"{code}\nimport time as _t; print(_t.time())"
+    timings = []
+    for _ in range(runs):
+        start = time.time()
+        result = subprocess.run([sys.executable, '-c', code], cwd=cwd, check=True,
+                                stdout=subprocess.PIPE, text=True)
+        timings.append((float(result.stdout.split()[-1]) - start) * 1000)
+    return sorted(timings)
+
+
+def measure_baseline(rev, runs):
+    """Mesure DataPipeline() tel qu'il était à `rev` ; None si le worktree ne peut pas être créé."""
+    repo = subprocess.run(['git', 'rev-parse', '--show-toplevel'], cwd=BACKEND_DIR,
+                          stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    if repo.returncode:
+        return None
+    root = repo.stdout.strip()
+    with tempfile.TemporaryDirectory() as tmp:
+        worktree = os.path.join(tmp, 'baseline')
+        added = subprocess.run(['git', 'worktree', 'add', '--detach', '-q', worktree, rev], cwd=root,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if added.returncode:
+            return None
+        try:
+            backend = os.path.join(worktree, os.path.relpath(BACKEND_DIR, root))
+            return measure("from scraper.pipeline import DataPipeline; DataPipeline()", runs, cwd=backend)
+        finally:
+            subprocess.run(['git', 'worktree', 'remove', '--force', worktree], cwd=root,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def report(label, timings):
+    print(f"  {label:<36s}: min {timings[0]:6.0f}  médiane {statistics.median(timings):6.0f}"
+          f"  max {timings[-1]:6.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mesure le démarrage à froid des process scrapers")
+    parser.add_argument('--runs', type=int, default=5, help="process lancés par scénario")
+    parser.add_argument('--target-ms', type=float, default=TARGET_MS, help="objectif pour la médiane")
+    parser.add_argument('--baseline', default=BASELINE_REV, help="commit de référence (vide pour l'ignorer)")
+    args = parser.parse_args()
+
+    print(f"🚀 Démarrage à froid ({args.runs} process par scénario)")
+    results = {}
+    if args.baseline:
+        label = BASELINE_SCENARIO.format(rev=args.baseline)
+        timings = measure_baseline(args.baseline, args.runs)
+        if timings is None:
+            print(f"  {label:<36s}: ignoré (worktree git impossible)")
+        else:
+            results[label] = timings
+            report(label, timings)
+    for label, code in SCENARIOS:
+        results[label] = measure(code, args.runs)
+        report(label, results[label])
+
+    failures = []
+    if subprocess.run([sys.executable, '-c', FLASK_FREE], cwd=BACKEND_DIR, stdout=subprocess.DEVNULL).returncode:
+        failures.append("Flask est chargé par le pipeline des scrapers")
+    timings = results[TARGET_SCENARIO]
+    median = statistics.median(timings)
+    if median >= args.target_ms:
+        failures.append(f"{TARGET_SCENARIO} : médiane {median:.0f} ms >= objectif {args.target_ms:.0f} ms")
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"✅ {TARGET_SCENARIO} prêt en {median:.0f} ms médiane (objectif < {args.target_ms:.0f} ms, "
+          f"marge {args.target_ms - median:.0f} ms), sans Flask")
+    if timings[-1] >= args.target_ms:
+        print(f"⚠️  max {timings[-1]:.0f} ms au-dessus de l'objectif : machine chargée, relancer avec plus de --runs")
+
+
+if __name__ == '__main__':
+    main()
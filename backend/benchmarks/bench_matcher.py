@@ -0,0 +1,81 @@
+"""
+Benchmark : ancienne extraction (un re.search par terme) vs matcher compilé une passe.
+
+Usage: python benchmarks/bench_matcher.py [nombre_de_descriptions]
+"""
+import sys
+import os
+import re
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scraper.matcher import TECHNOLOGIES, SKILLS, TaxonomyMatcher
+
+FILLER = (
+    "Nous recherchons un profil motivé pour rejoindre notre équipe à Casablanca. "
+    "Vous participerez à la conception et au développement de nos solutions. "
+    "Poste en CDI, télétravail partiel, avantages sociaux. Expérience de 3 ans minimum. "
+    "Rejoignez une entreprise en forte croissance au Maroc."
+).split()
+
+NOISE = ['Javascripting', 'Golang', 'C#', 'C++,', 'R&D', 'Reactive', 'goal', 'ai-driven', 'Spring', 'Vue', '.NET']
+
+
+def legacy_extract(text):
+    """Copie de l'ancienne implémentation de DataPipeline.extract_details"""
+    found_tech = list(set([t for t in TECHNOLOGIES if re.search(r'\b' + re.escape(t) + r'\b', text, re.IGNORECASE)]))
+    found_skills = list(set([s for s in SKILLS if re.search(r'\b' + re.escape(s) + r'\b', text, re.IGNORECASE)]))
+    return found_tech, found_skills
+
+
+def build_corpus(n, seed=42):
+    rng = random.Random(seed)
+    terms = TECHNOLOGIES + SKILLS
+    corpus = []
+    for _ in range(n):
+        words = rng.sample(FILLER, k=min(len(FILLER), rng.randint(20, 45)))
+        for term in rng.sample(terms, k=rng.randint(0, 8)) + rng.sample(NOISE, k=rng.randint(0, 2)):
+            variant = rng.choice([term, term.lower(), term.upper()])
+            words.insert(rng.randrange(len(words) + 1), variant + rng.choice(['', ',', '.', ' /', ')']))
+        corpus.append(' '.join(words))
+    return corpus
+
+
+def run(label, fn, corpus):
+    start = time.perf_counter()
+    results = [fn(text) for text in corpus]
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<22s}: {elapsed:7.2f}s  ({len(corpus) / elapsed:>10,.0f} descriptions/s)")
+    return results, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare l'ancienne extraction au matcher compilé")
+    parser.add_argument('descriptions', type=int, nargs='?', default=100_000,
+                        help="nombre de descriptions synthétiques (défaut: 100 000)")
+    n = parser.parse_args().descriptions
+    print(f"📦 Génération de {n:,} descriptions synthétiques...")
+    corpus = build_corpus(n)
+
+    start = time.perf_counter()
+    matcher = TaxonomyMatcher()
+    print(f"⚙️  Compilation du matcher: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    print("⏱️  Extraction:")
+    old_results, old_time = run("ancien (re par terme)", legacy_extract, corpus)
+    new_results, new_time = run("matcher une passe", matcher.extract, corpus)
+
+    mismatches = sum(
+        1 for (ot, os_), (nt, ns) in zip(old_results, new_results)
+        if set(ot) != set(nt) or set(os_) != set(ns)
+    )
+    print(f"🔍 Résultats différents: {mismatches} / {n}")
+    print(f"🚀 Accélération: x{old_time / new_time:.1f}")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+Benchmark : coût d'une recherche de quasi-doublon (LSH) quand la table grossit.
+
+Remplit une base SQLite temporaire avec des signatures MinHash synthétiques
+(10k, 100k puis 1M représentants par défaut) et mesure la latence de
+NearDuplicateIndex.assign pour une offre, moitié quasi-doublons, moitié nouvelles.
+
+Mesure d'abord le rappel du LSH sur des republications synthétiques (même offre,
+casse, accents, "(H/F)", "- Maroc", quelques mots de description changés) :
+part des paires de similarité >= SIMILARITY_THRESHOLD qui partagent une bande.
+
+Usage: python benchmarks/bench_near_dup.py [taille1 taille2 ...]
+"""
+import os
+import sys
+import time
+import random
+import unicodedata
+import tempfile
+import statistics
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from models import Base, JobSignature, JobLshBucket
+from scraper.near_dup import (
+    NearDuplicateIndex, band_keys, minhash, shingles, similarity, NUM_PERM, BANDS, ROWS, SIMILARITY_THRESHOLD,
+)
+
+CHUNK = 50_000
+QUERIES = 200
+REPOSTS = 300
+
+WORDS = (
+    "développeur ingénieur data python java react devops cloud sécurité réseau analyste projet équipe client "
+    "expérience maîtrise agile scrum docker kubernetes sql api web mobile backend frontend stage junior senior "
+    "mission poste profil formation bac diplôme anglais français autonomie rigueur communication gestion support"
+).split()
+TITLES = ["Développeur Full Stack", "Ingénieur DevOps", "Data Analyst", "Chef de projet IT", "Développeur Java",
+          "Administrateur Réseau", "Consultant SAP", "Ingénieur Sécurité"]
+COMPANIES = ["Capgemini", "CGI", "Atos", "OCP", "Inwi", "Orange Maroc", "Sofrecom", "HPS"]
+CITIES = ["Casablanca", "Rabat", "Tanger", "Marrakech", "Fès"]
+
+
+def repost(rnd, title, company, location, words):
+    """La même offre telle qu'un autre site la publie"""
+    if rnd.random() < 0.5:
+        title += " (H/F)"
+    if rnd.random() < 0.5:
+        title = title.upper()
+    if rnd.random() < 0.5:
+        title = ''.join(c for c in unicodedata.normalize('NFD', title) if not unicodedata.combining(c))
+    if rnd.random() < 0.5:
+        location += " - Maroc"
+    words = list(words)
+    for _ in range(rnd.randint(1, 12)):
+        words[rnd.randrange(len(words))] = rnd.choice(WORDS)
+    return title, company, location, ' '.join(words)
+
+
+def lsh_recall(seed=3):
+    """(paires confirmables, paires qui partagent au moins une bande)"""
+    rnd = random.Random(seed)
+    confirmable = found = 0
+    for _ in range(REPOSTS):
+        title, company, location = rnd.choice(TITLES), rnd.choice(COMPANIES), rnd.choice(CITIES)
+        words = [rnd.choice(WORDS) for _ in range(rnd.randint(40, 120))]
+        original = minhash(shingles(title, company, location, ' '.join(words)))
+        copy = minhash(shingles(*repost(rnd, title, company, location, words)))
+        if similarity(original, copy) >= SIMILARITY_THRESHOLD:
+            confirmable += 1
+            found += bool(set(band_keys(original)) & set(band_keys(copy)))
+    return confirmable, found
+
+
+def grow(engine, rng, start, stop):
+    with engine.begin() as conn:
+        for lo in range(start, stop, CHUNK):
+            hi = min(stop, lo + CHUNK)
+            sigs = rng.randint(0, 2 ** 32, size=(hi - lo, NUM_PERM), dtype=np.uint64).astype(np.uint32)
+            conn.execute(JobSignature.__table__.insert(), [
+                {'job_id': lo + i + 1, 'signature': sig.tobytes()} for i, sig in enumerate(sigs)
+            ])
+            conn.execute(JobLshBucket.__table__.insert(), [
+                {'bucket_key': k, 'job_id': lo + i + 1} for i, sig in enumerate(sigs) for k in set(band_keys(sig))
+            ])
+
+
+def measure(engine, rng, size):
+    index = NearDuplicateIndex()
+    timings, matched = [], 0
+    with Session(engine) as session:
+        for q in range(QUERIES):
+            if q % 2 == 0:
+                # Quasi-doublon d'un représentant existant : quelques permutations modifiées
+                job_id = int(rng.randint(1, size + 1))
+                raw = session.get(JobSignature, job_id).signature
+                sig = np.frombuffer(raw, dtype=np.uint32).copy()
+                sig[rng.choice(NUM_PERM, size=6, replace=False)] = rng.randint(0, 2 ** 32, size=6, dtype=np.uint64)
+            else:
+                sig = rng.randint(0, 2 ** 32, size=NUM_PERM, dtype=np.uint64).astype(np.uint32)
+            new_id = size + 10_000_000 + q
+            start = time.perf_counter()
+            clusters = index.assign(session, [(new_id, sig)])
+            timings.append(time.perf_counter() - start)
+            matched += clusters[new_id] != new_id
+            session.rollback()
+    timings.sort()
+    return statistics.mean(timings), timings[int(len(timings) * 0.95) - 1], matched
+
+
+def main():
+    sizes = [int(s) for s in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    rng = np.random.RandomState(7)
+    confirmable, found = lsh_recall()
+    print(f"🎯 Rappel LSH ({BANDS} bandes × {ROWS} lignes) : {found}/{confirmable} republications "
+          f"de similarité >= {SIMILARITY_THRESHOLD} retrouvées ({found / confirmable:.0%})")
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        print(f"🔗 Recherche LSH ({QUERIES} offres par palier, moitié quasi-doublons)")
+        current = 0
+        for size in sorted(sizes):
+            start = time.perf_counter()
+            grow(engine, rng, current, size)
+            current = size
+            fill = time.perf_counter() - start
+            mean, p95, matched = measure(engine, rng, size)
+            print(f"  {size:>9,} représentants : moyenne {mean * 1000:6.2f} ms, p95 {p95 * 1000:6.2f} ms, "
+                  f"{matched}/{QUERIES // 2} doublons retrouvés (remplissage {fill:.0f}s)")
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark : latence de la recherche plein texte (index inversé, mode embarqué SQLite).
+
+Remplit une base SQLite temporaire avec des offres synthétiques (vocabulaire à
+distribution de Zipf, titres de 4 mots, descriptions de 40 mots) par paliers de
+100k puis 1M par défaut, et mesure une page de /api/jobs/search (20 résultats +
+total) pour des requêtes rares, courantes et multi-mots, avec et sans filtre ville.
+
+Usage: python benchmarks/bench_search.py [taille1 taille2 ...]
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from models import Base, Job
+from search import SearchIndexer, search_query
+
+CHUNK = 20_000
+REPEAT = 20
+CITIES = ['Casablanca', 'Rabat', 'Marrakech', 'Tanger', 'Fès', 'Agadir', 'Meknès', 'Oujda']
+ROLES = ['développeur', 'ingénieur', 'technicien', 'comptable', 'commercial', 'chef', 'analyste', 'stagiaire']
+VOCAB = ROLES + [f"mot{i}" for i in range(5000)]
+WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCAB))]
+
+QUERIES = [
+    ('mot rare', 'mot4000', None),
+    ('mot courant', 'développeur', None),
+    ('2 mots', 'ingénieur mot12', None),
+    ('3 mots', 'développeur mot3 mot40', None),
+    ('courant + ville', 'développeur', 'Rabat'),
+]
+
+
+def grow(engine, rng, start, stop):
+    indexer = SearchIndexer()
+    with Session(engine) as session:
+        for lo in range(start, stop, CHUNK):
+            hi = min(stop, lo + CHUNK)
+            rows = []
+            for i in range(lo, hi):
+                rows.append({
+                    'id': i + 1,
+                    'title': ' '.join(rng.choices(VOCAB, WEIGHTS, k=4)),
+                    'company': f"Société {rng.randint(1, 5000)}",
+                    'location': rng.choice(CITIES),
+                    'description_text': ' '.join(rng.choices(VOCAB, WEIGHTS, k=40)),
+                    'url_offre': f"https://example.ma/{i}",
+                    'source_site': 'bench',
+                })
+            session.execute(Job.__table__.insert(), rows)
+            indexer.index(session, [(r['id'], r['title'], r['company'], r['description_text']) for r in rows])
+            session.commit()
+
+
+def measure(engine):
+    results = []
+    with Session(engine) as session:
+        for label, q, city in QUERIES:
+            timings = []
+            for _ in range(REPEAT):
+                start = time.perf_counter()
+                query = session.query(Job)
+                if city:
+                    query = query.filter(Job.location.ilike(f'%{city}%'))
+                query = search_query(session, query, q)
+                total = query.order_by(None).count()
+                page = query.limit(20).all()
+                timings.append(time.perf_counter() - start)
+            timings.sort()
+            results.append((label, total, len(page), statistics.median(timings), timings[int(REPEAT * 0.95) - 1]))
+    return results
+
+
+def main():
+    sizes = [int(s) for s in sys.argv[1:]] or [100_000, 1_000_000]
+    rng = random.Random(13)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        current = 0
+        for size in sorted(sizes):
+            start = time.perf_counter()
+            grow(engine, rng, current, size)
+            current = size
+            print(f"🔎 {size:,} offres (remplissage + indexation {time.perf_counter() - start:.0f}s)")
+            for label, total, shown, median, p95 in measure(engine):
+                print(f"  {label:<16} {total:>9,} résultats : médiane {median * 1000:7.1f} ms, p95 {p95 * 1000:7.1f} ms")
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+Benchmark : débit de l'API, serveur de développement Flask contre gunicorn (wsgi.py).
+
+Lance chaque serveur sur la base de DATABASE_URL (remplie au préalable), attend
+qu'il réponde, puis envoie des requêtes en boucle depuis N clients concurrents
+(connexions keep-alive, répartis sur plusieurs process) pendant D secondes sur
+un mélange de routes : stats en cache, page d'offres, filtre ville, évolution.
+Affiche requêtes/s, latences médiane / p99 et erreurs.
+
+Usage: python benchmarks/bench_serving.py [--clients 32] [--duration 20] [--workers 4] [--threads 8]
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+import http.client
+import multiprocessing
+import threading
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PORT = 5077
+PATHS = (
+    '/api/stats/global',
+    '/api/jobs?per_page=20',
+    '/api/jobs?city=Casablanca&per_page=20',
+    '/api/stats/history/evolution?granularity=week',
+)
+
+
+def servers(args):
+    dev = (
+        "from app import create_app; "
+        f"create_app(with_scheduler=False).run(debug=True, port={PORT}, use_reloader=False)"
+    )
+    return [
+        ('Flask dev (app.run, debug)', [sys.executable, '-c', dev]),
+        (f'gunicorn {args.workers}x{args.threads} gthread', [
+            sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '-b', f'127.0.0.1:{PORT}',
+            '-w', str(args.workers), '--threads', str(args.threads), 'wsgi:app',
+        ]),
+    ]
+
+
+def wait_ready(timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', PORT, timeout=5)
+            connection.request('GET', PATHS[0])
+            if connection.getresponse().status == 200:
+                return True
+        except OSError:
+            pass
+        time.sleep(0.5)
+    return False
+
+
+def client_loop(deadline, latencies, errors):
+    connection = None
+    i = 0
+    while time.monotonic() < deadline:
+        path = PATHS[i % len(PATHS)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            if connection is None:
+                connection = http.client.HTTPConnection('127.0.0.1', PORT, timeout=30)
+            connection.request('GET', path)
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+            if response.getheader('Connection', '').lower() == 'close' or response.version == 10:
+                connection.close()
+                connection = None
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(type(e).__name__)
+            connection = None
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+def load_process(threads, deadline, queue):
+    latencies, errors = [], []
+    workers = [threading.Thread(target=client_loop, args=(deadline, latencies, errors)) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    queue.put((latencies, errors))
+
+
+def run_load(clients, duration, processes):
+    queue = multiprocessing.Queue()
+    deadline = time.monotonic() + duration
+    per_process = [clients // processes + (1 if i < clients % processes else 0) for i in range(processes)]
+    procs = [multiprocessing.Process(target=load_process, args=(n, deadline, queue)) for n in per_process if n]
+    for proc in procs:
+        proc.start()
+    latencies, errors = [], []
+    for _ in procs:
+        lat, err = queue.get()
+        latencies += lat
+        errors += err
+    for proc in procs:
+        proc.join()
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--load-processes', type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"🏁 {args.clients} clients, {args.duration:.0f}s par serveur, {os.cpu_count()} CPU, "
+          f"base {os.getenv('DATABASE_URL', '(Config)')}")
+    for label, command in servers(args):
+        server = subprocess.Popen(command, cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            if not wait_ready():
+                print(f"  {label:<30} ne démarre pas")
+                continue
+            run_load(args.clients, 3, args.load_processes)  # échauffement (caches, pools, snapshot)
+            latencies, errors = run_load(args.clients, args.duration, args.load_processes)
+            latencies.sort()
+            p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0
+            print(f"  {label:<30} {len(latencies) / args.duration:8.0f} req/s   "
+                  f"médiane {statistics.median(latencies) * 1000 if latencies else 0:7.1f} ms   "
+                  f"p99 {p99 * 1000:7.1f} ms   erreurs {len(errors)}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark : agrégations analytiques, SQL (table jobs / rollups) contre le snapshot colonnaire.
+
+Remplit une base SQLite temporaire d'offres synthétiques (villes, sources, 3
+technologies par offre, 10% de quasi-doublons) par paliers de 100k puis 1M par
+défaut, construit les rollups et le snapshot Arrow, puis mesure :
+- offres par mois : GROUP BY sur jobs contre np.bincount ;
+- top technologies par mois : rollup tech_monthly_counts contre la matrice (mois, technologie) ;
+- offres par ville : GROUP BY sur jobs, rollup job_dimension_counts, np.bincount.
+
+Usage: python benchmarks/bench_snapshot.py [taille1 taille2 ...]
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+import statistics
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, select, func
+from sqlalchemy.orm import Session
+
+from models import Base, Job, TechMonthlyCount, JobDimensionCount
+from rollups import rebuild_tech_monthly, rebuild_dimension_counts
+from analytics_snapshot import build_snapshot, SnapshotEngine
+
+CHUNK = 50_000
+REPEAT = 20
+START_MONTH = '2024-01'
+CITIES = ['Casablanca', 'Rabat', 'Marrakech', 'Tanger', 'Fès', 'Agadir', 'Meknès', 'Oujda', 'Maroc']
+SOURCES = ['rekrute', 'emploi.ma', 'indeed.com', 'bayt.com']
+TECHS = [f'Tech{i}' for i in range(120)]
+TECH_WEIGHTS = [1 / (rank + 1) for rank in range(len(TECHS))]
+TOP_TECHS = TECHS[:50]
+
+
+def grow(engine, rng, start, stop):
+    origin = datetime(2023, 6, 1)
+    with Session(engine) as session:
+        for lo in range(start, stop, CHUNK):
+            rows = []
+            for i in range(lo, min(stop, lo + CHUNK)):
+                rows.append({
+                    'id': i + 1,
+                    'title': f'Offre {i}',
+                    'company': f'Société {rng.randint(1, 5000)}',
+                    'location': rng.choice(CITIES),
+                    'url_offre': f'https://example.ma/{i}',
+                    'source_site': rng.choice(SOURCES),
+                    'date_posted': origin + timedelta(minutes=rng.randint(0, 1_200_000)),
+                    'technologies': list(set(rng.choices(TECHS, TECH_WEIGHTS, k=3))),
+                    'cluster_id': i if i and rng.random() < 0.1 else None,
+                })
+            session.execute(Job.__table__.insert(), rows)
+            session.commit()
+
+
+def timed(fn):
+    fn()
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def measure(session, snapshot):
+    month = func.strftime('%Y-%m', Job.date_posted)
+    return [
+        ('offres / mois', 'SQL jobs', lambda: session.execute(
+            select(month, func.count(Job.id)).where(Job.date_posted >= datetime(2024, 1, 1)).group_by(month)
+        ).all()),
+        ('offres / mois', 'snapshot', lambda: snapshot.jobs_per_month(START_MONTH)),
+        ('technologies / mois', 'rollup SQL', lambda: session.execute(
+            select(TechMonthlyCount.month, TechMonthlyCount.technology, TechMonthlyCount.count)
+            .where(TechMonthlyCount.month >= START_MONTH, TechMonthlyCount.technology.in_(TOP_TECHS))
+        ).all()),
+        ('technologies / mois', 'snapshot', lambda: snapshot.tech_month_counts(TOP_TECHS, START_MONTH)),
+        ('offres / ville', 'SQL jobs', lambda: session.execute(
+            select(Job.location, func.count(Job.id)).where(Job.location != 'Maroc')
+            .group_by(Job.location).order_by(func.count(Job.id).desc()).limit(20)
+        ).all()),
+        ('offres / ville', 'rollup SQL', lambda: session.execute(
+            select(JobDimensionCount.value, JobDimensionCount.count)
+            .where(JobDimensionCount.dimension == 'location', JobDimensionCount.value != 'Maroc')
+            .order_by(JobDimensionCount.count.desc()).limit(20)
+        ).all()),
+        ('offres / ville', 'snapshot', lambda: snapshot.value_counts('location', exclude=('Maroc',), limit=20)),
+    ]
+
+
+def main():
+    sizes = [int(s) for s in sys.argv[1:]] or [100_000, 1_000_000]
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        current = 0
+        for size in sorted(sizes):
+            grow(engine, rng, current, size)
+            current = size
+            with Session(engine) as session:
+                rebuild_tech_monthly(session)
+                rebuild_dimension_counts(session)
+                session.commit()
+                start = time.perf_counter()
+                path, _ = build_snapshot(session, tmp)
+                built = time.perf_counter() - start
+            start = time.perf_counter()
+            snapshot = SnapshotEngine(path)
+            opened = time.perf_counter() - start
+            start = time.perf_counter()
+            snapshot.tech_month_matrix
+            matrix = time.perf_counter() - start
+            print(f"🧊 {size:,} offres : snapshot {os.path.getsize(path) / 1e6:.1f} Mo construit en {built:.1f}s, "
+                  f"ouvert en {opened * 1000:.1f} ms (+ matrice technologies {matrix * 1000:.0f} ms)")
+            with Session(engine) as session:
+                for label, path_label, fn in measure(session, snapshot):
+                    print(f"  {label:<20} {path_label:<11} médiane {timed(fn) * 1000:8.2f} ms")
+            del snapshot
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Helpers d'écriture en masse, indépendants du dialecte SQL (MySQL en prod, SQLite en local)
+"""
+import importlib
+
+from sqlalchemy import insert
+
+
+def _dialect(name):
+    # Import à la demande : seul le dialecte de l'engine utilisé est chargé (démarrage plus rapide)
+    return importlib.import_module(f'sqlalchemy.dialects.{name}')
+
+
+def insert_ignore(model, dialect_name):
+    """INSERT multi-lignes qui ignore silencieusement les doublons sur les clés uniques"""
+    if dialect_name == 'mysql':
+        return _dialect('mysql').insert(model).prefix_with('IGNORE')
+    if dialect_name in ('sqlite', 'postgresql'):
+        return _dialect(dialect_name).insert(model).on_conflict_do_nothing()
+    return insert(model)
+
+
+def upsert_counts(model, key, counts, dialect_name, column='count', **extra):
+    """
+    INSERT ... ON DUPLICATE KEY UPDATE count = count + n pour tout un Counter.
+    Une seule instruction, atomique côté base : pas d'incrément perdu entre writers concurrents.
+    `key` doit porter une contrainte d'unicité. Clé composite : `key` est un tuple de
+    colonnes et les clés du Counter des tuples de valeurs dans le même ordre.
+    `column` : colonne incrémentée (les autres colonnes de compteur gardent leur défaut à l'insertion).
+    """
+    keys = (key,) if isinstance(key, str) else tuple(key)
+    # Ordre stable des clés : les writers concurrents verrouillent les lignes dans le même ordre
+    rows = [
+        dict(zip(keys, name if len(keys) > 1 else (name,)), **{column: n}, **extra)
+        for name, n in sorted(counts.items()) if n
+    ]
+    if not rows:
+        return None
+
+    target = getattr(model, column)
+    if dialect_name == 'mysql':
+        stmt = _dialect('mysql').insert(model).values(rows)
+        updates = {column: target + stmt.inserted[column]}
+        updates.update({col: stmt.inserted[col] for col in extra})
+        return stmt.on_duplicate_key_update(**updates)
+
+    stmt = _dialect(dialect_name).insert(model).values(rows)
+    updates = {column: target + stmt.excluded[column]}
+    updates.update({col: stmt.excluded[col] for col in extra})
+    return stmt.on_conflict_do_update(index_elements=[getattr(model, k) for k in keys], set_=updates)
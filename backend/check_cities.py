@@ -5,13 +5,13 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from app import app, db
+from database import session_scope
 from models import Job
 from sqlalchemy import func
 
-with app.app_context():
+with session_scope() as session:
     # Compter les villes
-    city_stats = db.session.query(
+    city_stats = session.query(
         Job.location,
         func.count(Job.id).label('count')
     ).group_by(Job.location)\
@@ -24,10 +24,10 @@ with app.app_context():
     for location, count in city_stats:
         print(f"  {location:30s} : {count:5d} offres")
     
-    print(f"\n📊 Total de villes différentes: {db.session.query(func.count(func.distinct(Job.location))).scalar()}")
+    print(f"\n📊 Total de villes différentes: {session.query(func.count(func.distinct(Job.location))).scalar()}")
     
     # Compter "Maroc"
-    maroc_count = db.session.query(func.count(Job.id)).filter(Job.location == 'Maroc').scalar()
-    total_count = db.session.query(func.count(Job.id)).scalar()
+    maroc_count = session.query(func.count(Job.id)).filter(Job.location == 'Maroc').scalar()
+    total_count = session.query(func.count(Job.id)).scalar()
     
     print(f"\n⚠️  Offres avec 'Maroc' générique: {maroc_count} / {total_count} ({maroc_count*100/total_count:.1f}%)")
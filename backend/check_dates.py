@@ -2,27 +2,27 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from app import app, db
+from database import session_scope
 from models import Job
 from sqlalchemy import func
 from datetime import datetime, timedelta
 
-with app.app_context():
+with session_scope() as session:
     # Statistiques générales
-    total_jobs = db.session.query(func.count(Job.id)).scalar()
+    total_jobs = session.query(func.count(Job.id)).scalar()
     print(f"\n📊 STATISTIQUES DES DATES")
     print("=" * 80)
     print(f"Total d'offres dans la BD: {total_jobs}")
     
     # Offres avec dates NULL
-    null_dates = db.session.query(func.count(Job.id)).filter(Job.date_posted.is_(None)).scalar()
+    null_dates = session.query(func.count(Job.id)).filter(Job.date_posted.is_(None)).scalar()
     print(f"\n⚠️  Offres sans date (NULL): {null_dates} ({null_dates/total_jobs*100:.1f}%)")
     
     # Distribution par date
     print(f"\n📅 DISTRIBUTION PAR DATE:")
     print("-" * 80)
     
-    date_distribution = db.session.query(
+    date_distribution = session.query(
         func.date(Job.date_posted).label('date'),
         func.count(Job.id).label('count')
     ).filter(Job.date_posted.isnot(None))\
@@ -43,25 +43,25 @@ with app.app_context():
     now = datetime.now()
     
     # Dernières 24h
-    last_24h = db.session.query(func.count(Job.id))\
+    last_24h = session.query(func.count(Job.id))\
         .filter(Job.date_posted >= now - timedelta(hours=24))\
         .scalar()
     print(f"Dernières 24h: {last_24h} offres")
     
     # Derniers 7 jours
-    last_7d = db.session.query(func.count(Job.id))\
+    last_7d = session.query(func.count(Job.id))\
         .filter(Job.date_posted >= now - timedelta(days=7))\
         .scalar()
     print(f"Derniers 7 jours: {last_7d} offres")
     
     # Dernier mois
-    last_30d = db.session.query(func.count(Job.id))\
+    last_30d = session.query(func.count(Job.id))\
         .filter(Job.date_posted >= now - timedelta(days=30))\
         .scalar()
     print(f"Dernier mois: {last_30d} offres")
     
     # Plus de 30 jours
-    older_30d = db.session.query(func.count(Job.id))\
+    older_30d = session.query(func.count(Job.id))\
         .filter(Job.date_posted < now - timedelta(days=30))\
         .scalar()
     print(f"Plus de 30 jours: {older_30d} offres")
@@ -70,8 +70,8 @@ with app.app_context():
     print(f"\n📆 PLAGE DE DATES:")
     print("-" * 80)
     
-    oldest = db.session.query(func.min(Job.date_posted)).filter(Job.date_posted.isnot(None)).scalar()
-    newest = db.session.query(func.max(Job.date_posted)).filter(Job.date_posted.isnot(None)).scalar()
+    oldest = session.query(func.min(Job.date_posted)).filter(Job.date_posted.isnot(None)).scalar()
+    newest = session.query(func.max(Job.date_posted)).filter(Job.date_posted.isnot(None)).scalar()
     
     if oldest:
         print(f"Date la plus ancienne: {oldest}")
@@ -82,7 +82,7 @@ with app.app_context():
     print(f"\n🔍 EXEMPLES D'OFFRES RÉCENTES (10 dernières):")
     print("-" * 80)
     
-    recent_jobs = db.session.query(Job)\
+    recent_jobs = session.query(Job)\
         .filter(Job.date_posted.isnot(None))\
         .order_by(Job.date_posted.desc())\
         .limit(10)\
@@ -5,18 +5,18 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from app import app, db
+from database import session_scope
 from models import Job
 from sqlalchemy import func
 from datetime import datetime
 
-with app.app_context():
+with session_scope() as session:
     # Compter le total d'offres
-    total_jobs = db.session.query(func.count(Job.id)).scalar()
+    total_jobs = session.query(func.count(Job.id)).scalar()
     print(f"\n📊 Total d'offres dans la base: {total_jobs}")
     
     # Compter par mois
-    results = db.session.query(
+    results = session.query(
         func.date_format(Job.date_posted, '%Y-%m').label('month'),
         func.count(Job.id)
     ).group_by('month')\
@@ -29,15 +29,15 @@ with app.app_context():
         print(f"  {month}: {count} offres")
     
     # Date la plus ancienne
-    oldest = db.session.query(func.min(Job.date_posted)).scalar()
-    newest = db.session.query(func.max(Job.date_posted)).scalar()
+    oldest = session.query(func.min(Job.date_posted)).scalar()
+    newest = session.query(func.max(Job.date_posted)).scalar()
     
     print(f"\n📆 Période couverte:")
     print(f"  Plus ancienne: {oldest}")
     print(f"  Plus récente: {newest}")
     
     # Vérifier janvier 2024
-    jan_2024 = db.session.query(func.count(Job.id))\
+    jan_2024 = session.query(func.count(Job.id))\
         .filter(Job.date_posted >= datetime(2024, 1, 1))\
         .filter(Job.date_posted < datetime(2024, 2, 1))\
         .scalar()
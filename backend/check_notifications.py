@@ -0,0 +1,84 @@
+"""
+Vérifie la chaîne de notifications contre un webhook local (stand-in HTTP) :
+outbox écrite avec les offres, envoi par lots, retry après une erreur serveur.
+Utilise une base SQLite temporaire, aucune donnée réelle n'est touchée.
+
+Usage: python check_notifications.py
+"""
+import os
+import sys
+import json
+import time
+import random
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+class WebhookStandIn(BaseHTTPRequestHandler):
+    failures_left = 1
+    batches = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        if WebhookStandIn.failures_left > 0:
+            WebhookStandIn.failures_left -= 1
+            self.send_response(503)
+        else:
+            WebhookStandIn.batches.append(body)
+            self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+server = HTTPServer(('127.0.0.1', 0), WebhookStandIn)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+
+tmp_dir = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp_dir, 'check_notifications.db')}"
+os.environ['NOTIFY_WEBHOOK_URL'] = f"http://127.0.0.1:{server.server_port}/hook"
+
+from database import get_session, session_scope
+from models import NotificationOutbox
+from notifications import NotificationDispatcher
+from scraper.pipeline import DataPipeline
+
+TOTAL = 250
+
+# Offres sans rapport entre elles : seuls les représentants de cluster sont notifiés
+rng = random.Random(8)
+words = ['analyste', 'comptable', 'ingenieur', 'technicien', 'chef', 'projet', 'commercial', 'juriste',
+         'logistique', 'reseau', 'data', 'java', 'marketing', 'audit', 'qualite', 'maintenance']
+
+pipeline = DataPipeline(buffered=True, batch_size=1000)
+for i in range(TOTAL):
+    pipeline.save_job({
+        'title': ' '.join(rng.sample(words, 4)) + f" {i}",
+        'company': f"Société {rng.getrandbits(40):x}",
+        'location': 'Casablanca',
+        'url': f"https://example.ma/offre/{i}",
+        'source': 'check',
+    })
+pipeline.log_run('success')
+
+# Le premier envoi a reçu un 503 : on laisse passer le backoff puis on relance
+dispatcher = NotificationDispatcher(get_session, base_delay=0.1, max_delay=0.5)
+deadline = time.monotonic() + 10
+while time.monotonic() < deadline:
+    dispatcher.drain()
+    with session_scope() as session:
+        pending = session.query(NotificationOutbox).filter(NotificationOutbox.status != 'sent').count()
+    if not pending:
+        break
+    time.sleep(0.2)
+
+delivered = [job['id'] for batch in WebhookStandIn.batches for job in batch['jobs']]
+print(f"📨 Lots reçus: {len(WebhookStandIn.batches)} (tailles: {[b['count'] for b in WebhookStandIn.batches]})")
+print(f"✅ Offres notifiées: {len(delivered)} / {TOTAL}, doublons: {len(delivered) - len(set(delivered))}")
+print(f"⏳ Événements restants dans l'outbox: {pending}")
+server.shutdown()
+sys.exit(0 if len(set(delivered)) == TOTAL and len(delivered) == TOTAL and not pending else 1)
@@ -1,21 +1,21 @@
-from app import app
+from database import session_scope
 from models import Job
 from sqlalchemy import func
 
-with app.app_context():
+with session_scope() as session:
     print("Database check for Stagiaires.ma jobs:")
-    count = Job.query.filter(Job.source_site == 'stagiaires.ma').count()
+    count = session.query(Job).filter(Job.source_site == 'stagiaires.ma').count()
     print(f"Total jobs from stagiaires.ma: {count}")
     
     if count > 0:
-        latest = Job.query.filter(Job.source_site == 'stagiaires.ma').order_by(Job.date_posted.desc()).first()
+        latest = session.query(Job).filter(Job.source_site == 'stagiaires.ma').order_by(Job.date_posted.desc()).first()
         print(f"Latest job: {latest.title} | Date: {latest.date_posted}")
         
-        oldest = Job.query.filter(Job.source_site == 'stagiaires.ma').order_by(Job.date_posted.asc()).first()
+        oldest = session.query(Job).filter(Job.source_site == 'stagiaires.ma').order_by(Job.date_posted.asc()).first()
         print(f"Oldest job: {oldest.title} | Date: {oldest.date_posted}")
         
         # Breakdown by month
-        results = Job.query.with_entities(func.date_format(Job.date_posted, '%Y-%m'), func.count(Job.id))\
+        results = session.query(Job).with_entities(func.date_format(Job.date_posted, '%Y-%m'), func.count(Job.id))\
             .filter(Job.source_site == 'stagiaires.ma')\
             .group_by(func.date_format(Job.date_posted, '%Y-%m'))\
             .all()
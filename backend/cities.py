@@ -0,0 +1,212 @@
+"""
+Dimension normalisée des villes.
+
+La colonne ``location`` de jobs garde le libellé scrapé ("Casablanca / Sidi
+Maarouf", "Fes", "Rabat - Agdal"...) ; ``city_id`` pointe vers la ville
+canonique de la table cities, remplie depuis le gazetteer hors ligne ci-dessous
+(nom, région administrative, coordonnées). Les filtres par ville deviennent une
+égalité sur l'index (city_id, date_posted, id) et les stats par région un
+GROUP BY sur quelques dizaines de lignes du rollup.
+
+Les quartiers et zones d'activité sont rattachés à leur ville (Sidi Maarouf,
+Ain Sebaa -> Casablanca ; Agdal, Hay Riad -> Rabat). Un libellé de région seul
+("Casablanca-Settat") ou générique ("Maroc") ne désigne pas une ville :
+city_id reste NULL.
+
+Backfill des offres existantes: python cities.py
+"""
+import re
+import sys
+import os
+import unicodedata
+import functools
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import select, update
+
+from bulk import insert_ignore
+from models import Job, City
+
+REGIONS = (
+    'Tanger-Tétouan-Al Hoceïma', "L'Oriental", 'Fès-Meknès', 'Rabat-Salé-Kénitra',
+    'Béni Mellal-Khénifra', 'Casablanca-Settat', 'Marrakech-Safi', 'Drâa-Tafilalet',
+    'Souss-Massa', 'Guelmim-Oued Noun', 'Laâyoune-Sakia El Hamra', 'Dakhla-Oued Ed-Dahab',
+)
+(TANGER_TETOUAN, ORIENTAL, FES_MEKNES, RABAT_SALE, BENI_MELLAL, CASABLANCA_SETTAT,
+ MARRAKECH_SAFI, DRAA_TAFILALET, SOUSS_MASSA, GUELMIM, LAAYOUNE, DAKHLA) = REGIONS
+
+# (nom canonique, région, latitude, longitude, autres libellés)
+# Le nom lui-même, sans accents, est toujours reconnu.
+GAZETTEER = (
+    ('Casablanca', CASABLANCA_SETTAT, 33.5731, -7.5898, (
+        'casa', 'grand casablanca', 'dar el beida', 'ain chock', 'ain sebaa', 'anfa', 'hay hassani',
+        'hay mohammadi', 'sidi maarouf', 'sidi moumen', 'maarif', 'gauthier', 'bourgogne',
+        'californie', 'oulfa', 'derb sultan', 'roches noires', 'ain diab', 'sidi bernoussi',
+        'casanearshore',
+    )),
+    ('Mohammedia', CASABLANCA_SETTAT, 33.6866, -7.3830, ('mohammadia',)),
+    ('El Jadida', CASABLANCA_SETTAT, 33.2316, -8.5007, ('jadida',)),
+    ('Settat', CASABLANCA_SETTAT, 33.0010, -7.6166, ()),
+    ('Berrechid', CASABLANCA_SETTAT, 33.2655, -7.5875, ()),
+    ('Benslimane', CASABLANCA_SETTAT, 33.6122, -7.1211, ('ben slimane',)),
+    ('Bouskoura', CASABLANCA_SETTAT, 33.4489, -7.6486, ()),
+    ('Nouaceur', CASABLANCA_SETTAT, 33.3670, -7.5833, ('nouasseur',)),
+    ('Médiouna', CASABLANCA_SETTAT, 33.4530, -7.5170, ()),
+    ('Had Soualem', CASABLANCA_SETTAT, 33.4200, -7.8500, ()),
+    ('Bouznika', CASABLANCA_SETTAT, 33.7890, -7.1597, ()),
+    ('Sidi Bennour', CASABLANCA_SETTAT, 32.6500, -8.4333, ()),
+    ('Rabat', RABAT_SALE, 34.0209, -6.8416, ('agdal', 'hay riad', 'souissi', 'akkari', 'technopolis')),
+    ('Salé', RABAT_SALE, 34.0531, -6.7985, ()),
+    ('Témara', RABAT_SALE, 33.9287, -6.9063, ()),
+    ('Skhirat', RABAT_SALE, 33.8520, -7.0310, ()),
+    ('Kénitra', RABAT_SALE, 34.2610, -6.5802, ()),
+    ('Khémisset', RABAT_SALE, 33.8240, -6.0661, ('khmisset',)),
+    ('Tiflet', RABAT_SALE, 33.8947, -6.3066, ()),
+    ('Sidi Kacem', RABAT_SALE, 34.2214, -5.7078, ()),
+    ('Sidi Slimane', RABAT_SALE, 34.2646, -5.9256, ()),
+    ('Fès', FES_MEKNES, 34.0181, -5.0078, ('fez',)),
+    ('Meknès', FES_MEKNES, 33.8935, -5.5473, ()),
+    ('Taza', FES_MEKNES, 34.2100, -4.0100, ()),
+    ('Sefrou', FES_MEKNES, 33.8310, -4.8280, ()),
+    ('Ifrane', FES_MEKNES, 33.5228, -5.1106, ()),
+    ('Azrou', FES_MEKNES, 33.4342, -5.2214, ()),
+    ('Tanger', TANGER_TETOUAN, 35.7595, -5.8340, ('tangier', 'tanja', 'tanger med')),
+    ('Tétouan', TANGER_TETOUAN, 35.5889, -5.3626, ()),
+    ('Larache', TANGER_TETOUAN, 35.1932, -6.1557, ()),
+    ('Ksar El Kébir', TANGER_TETOUAN, 35.0017, -5.9090, ()),
+    ('Al Hoceïma', TANGER_TETOUAN, 35.2517, -3.9372, ('hoceima',)),
+    ('Chefchaouen', TANGER_TETOUAN, 35.1688, -5.2636, ('chaouen',)),
+    ("M'diq", TANGER_TETOUAN, 35.6858, -5.3253, ('mdiq',)),
+    ('Fnideq', TANGER_TETOUAN, 35.8491, -5.3571, ()),
+    ('Martil', TANGER_TETOUAN, 35.6167, -5.2750, ()),
+    ('Oujda', ORIENTAL, 34.6814, -1.9086, ()),
+    ('Nador', ORIENTAL, 35.1681, -2.9335, ()),
+    ('Berkane', ORIENTAL, 34.9218, -2.3190, ()),
+    ('Taourirt', ORIENTAL, 34.4073, -2.8973, ()),
+    ('Marrakech', MARRAKECH_SAFI, 31.6295, -7.9811, ('marrakesh',)),
+    ('Safi', MARRAKECH_SAFI, 32.2994, -9.2372, ()),
+    ('Essaouira', MARRAKECH_SAFI, 31.5085, -9.7595, ()),
+    ('Benguerir', MARRAKECH_SAFI, 32.2360, -7.9540, ('ben guerir',)),
+    ('El Kelâa des Sraghna', MARRAKECH_SAFI, 32.0481, -7.4083, ('el kelaa', 'kelaa des sraghna')),
+    ('Youssoufia', MARRAKECH_SAFI, 32.2463, -8.5294, ()),
+    ('Béni Mellal', BENI_MELLAL, 32.3373, -6.3498, ()),
+    ('Khouribga', BENI_MELLAL, 32.8811, -6.9063, ()),
+    ('Khénifra', BENI_MELLAL, 32.9394, -5.6675, ()),
+    ('Fquih Ben Salah', BENI_MELLAL, 32.5000, -6.6833, ('fkih ben salah',)),
+    ('Agadir', SOUSS_MASSA, 30.4278, -9.5981, ()),
+    ('Inezgane', SOUSS_MASSA, 30.3553, -9.5364, ()),
+    ('Aït Melloul', SOUSS_MASSA, 30.3342, -9.4972, ()),
+    ('Taroudant', SOUSS_MASSA, 30.4703, -8.8770, ()),
+    ('Tiznit', SOUSS_MASSA, 29.6974, -9.7316, ()),
+    ('Ouarzazate', DRAA_TAFILALET, 30.9335, -6.9370, ()),
+    ('Errachidia', DRAA_TAFILALET, 31.9314, -4.4244, ()),
+    ('Midelt', DRAA_TAFILALET, 32.6852, -4.7451, ()),
+    ('Guelmim', GUELMIM, 28.9870, -10.0574, ()),
+    ('Tan-Tan', GUELMIM, 28.4380, -11.1032, ()),
+    ('Laâyoune', LAAYOUNE, 27.1536, -13.2033, ('layoune', 'el aaiun')),
+    ('Dakhla', DAKHLA, 23.6848, -15.9580, ()),
+)
+
+
+def normalize(text):
+    """Minuscules sans accents ni ponctuation : 'Fès - Agdal' -> 'fes agdal'"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(c for c in text if not unicodedata.combining(c)).lower()
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', text).split())
+
+
+# libellé normalisé -> nom canonique (None : région ou libellé générique, pas une ville)
+ALIASES = {normalize(region): None for region in REGIONS}
+ALIASES.update({normalize(name): None for name in (
+    'Maroc', 'Morocco', 'Tout le Maroc', 'Rabat Salé Zemmour Zaer',
+)})
+for _name, _region, _lat, _lon, _aliases in GAZETTEER:
+    ALIASES[normalize(_name)] = _name
+    ALIASES.update({alias: _name for alias in _aliases})
+MAX_ALIAS_WORDS = max(len(alias.split()) for alias in ALIASES)
+
+
+@functools.lru_cache(maxsize=4096)
+def resolve_city(location):
+    """
+    Nom canonique de la ville désignée par un libellé libre, None si aucune.
+    Le libellé connu le plus long l'emporte, puis le plus à gauche :
+    'Casablanca / Sidi Maarouf' -> 'Casablanca', 'Région Rabat-Salé-Kénitra' -> None.
+    """
+    words = normalize(location).split()
+    for size in range(min(MAX_ALIAS_WORDS, len(words)), 0, -1):
+        for start in range(len(words) - size + 1):
+            phrase = ' '.join(words[start:start + size])
+            if phrase in ALIASES:
+                return ALIASES[phrase]
+    return None
+
+
+def seed_cities(session):
+    """Insère les villes du gazetteer absentes de la table (relançable)"""
+    session.execute(insert_ignore(City, session.get_bind().dialect.name).values([
+        {'name': name, 'region': region, 'latitude': lat, 'longitude': lon}
+        for name, region, lat, lon, _ in GAZETTEER
+    ]))
+
+
+class CityIndex:
+    """Ids des villes chargés une fois (la table ne change qu'avec le gazetteer)"""
+
+    def __init__(self):
+        self._ids = {}
+
+    def load(self, session):
+        self._ids = dict(session.execute(select(City.name, City.id)).all())
+        if len(self._ids) < len(GAZETTEER):
+            # Base neuve (create_all sans migration) ou gazetteer enrichi depuis le dernier seed
+            seed_cities(session)
+            self._ids = dict(session.execute(select(City.name, City.id)).all())
+        return self
+
+    def city_id(self, location):
+        """city_id d'un libellé scrapé (None : pas de ville reconnue)"""
+        name = resolve_city(location)
+        return self._ids.get(name) if name else None
+
+
+def city_filter(value):
+    """
+    Critère du filtre ?city= : égalité sur jobs.city_id (index) pour une ville reconnue
+    ('casa', 'Fes', 'Sidi Maarouf' -> la ville canonique), sinon égalité sur le libellé location.
+    """
+    name = resolve_city(value)
+    if name is None:
+        return Job.location == value
+    return Job.city_id == select(City.id).where(City.name == name).scalar_subquery()
+
+
+def backfill(session):
+    """Renseigne city_id des offres qui n'en ont pas : un UPDATE par libellé distinct (index sur location)"""
+    index = CityIndex().load(session)
+    locations = session.execute(
+        select(Job.location).where(Job.city_id.is_(None), Job.location.isnot(None)).distinct()
+    ).scalars().all()
+    total = 0
+    for location in locations:
+        city_id = index.city_id(location)
+        if city_id is None:
+            continue
+        result = session.execute(
+            update(Job).where(Job.location == location, Job.city_id.is_(None)).values(city_id=city_id)
+        )
+        total += result.rowcount or 0
+    return total
+
+
+if __name__ == '__main__':
+    from database import session_scope, init_db
+    from rollups import rebuild_dimension_counts
+
+    init_db()
+    with session_scope() as session:
+        print("🏙️  Rattachement des offres aux villes du gazetteer...")
+        count = backfill(session)
+        rebuild_dimension_counts(session)
+    print(f"✅ {count} offres rattachées à une ville")
@@ -5,7 +5,7 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from app import app, db
+from database import session_scope
 from models import Job
 import re
 
@@ -87,12 +87,12 @@ def clean_location(loc_str):
     
     return "Maroc"
 
-with app.app_context():
+with session_scope() as session:
     print("\n🔧 Nettoyage des villes dans la base de données...")
     print("=" * 60)
     
     # Récupérer toutes les offres
-    jobs = Job.query.all()
+    jobs = session.query(Job).all()
     updated = 0
     
     for job in jobs:
@@ -106,13 +106,13 @@ with app.app_context():
                 print(f"  '{old_location}' → '{new_location}'")
     
     # Sauvegarder
-    db.session.commit()
+    session.commit()
     
     print(f"\n✅ {updated} villes normalisées sur {len(jobs)} offres")
     
     # Afficher les nouvelles stats
     from sqlalchemy import func
-    city_stats = db.session.query(
+    city_stats = session.query(
         Job.location,
         func.count(Job.id).label('count')
     ).group_by(Job.location)\
@@ -125,6 +125,6 @@ with app.app_context():
     for location, count in city_stats:
         print(f"  {location:30s} : {count:5d} offres")
     
-    maroc_count = db.session.query(func.count(Job.id)).filter(Job.location == 'Maroc').scalar()
-    total_count = db.session.query(func.count(Job.id)).scalar()
+    maroc_count = session.query(func.count(Job.id)).filter(Job.location == 'Maroc').scalar()
+    total_count = session.query(func.count(Job.id)).scalar()
     print(f"\n📊 Offres 'Maroc' générique: {maroc_count} / {total_count} ({maroc_count*100/total_count:.1f}%)")
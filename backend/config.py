@@ -5,6 +5,23 @@ class Config:
     # Replace with your actual MySQL credentials or use environment variables
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'mysql+pymysql://root:@localhost/observatoire_emploi')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Pool de connexions, par process (chaque worker WSGI et chaque scraper a le sien)
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 30))
+    # Connexions recyclées avant le wait_timeout de MySQL (connexions coupées côté serveur)
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', '1') != '0'
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_pre_ping': DB_POOL_PRE_PING,
+        'pool_recycle': DB_POOL_RECYCLE,
+        # SQLite (développement) : pool par défaut de SQLAlchemy
+        **({} if SQLALCHEMY_DATABASE_URI.startswith('sqlite') else {
+            'pool_size': DB_POOL_SIZE,
+            'max_overflow': DB_MAX_OVERFLOW,
+            'pool_timeout': DB_POOL_TIMEOUT,
+        }),
+    }
     
     # Security
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-prod')
@@ -13,3 +30,76 @@ class Config:
     SCRAPER_HEADLESS = True
     SCRAPER_DELAY_MIN = 1
     SCRAPER_DELAY_MAX = 4
+
+    # Détection de doublons : au-delà de ce nombre d'offres, l'index d'URLs
+    # passe d'un set exact à un filtre de Bloom (confirmation en base)
+    URL_INDEX_BLOOM_THRESHOLD = int(os.getenv('URL_INDEX_BLOOM_THRESHOLD', 2000000))
+    URL_INDEX_BLOOM_FP_RATE = float(os.getenv('URL_INDEX_BLOOM_FP_RATE', 0.001))
+
+    # Écriture asynchrone des offres : file bornée vidée par lots sur un pool de threads
+    SCRAPER_ASYNC_WRITES = os.getenv('SCRAPER_ASYNC_WRITES', '1') != '0'
+    SCRAPER_WRITE_QUEUE_SIZE = int(os.getenv('SCRAPER_WRITE_QUEUE_SIZE', 500))
+    # Au-delà de 1, seule la préparation des lots (extraction) est parallèle : l'écriture est sérialisée
+    SCRAPER_WRITE_WORKERS = int(os.getenv('SCRAPER_WRITE_WORKERS', 1))
+    SCRAPER_WRITE_BATCH_SIZE = int(os.getenv('SCRAPER_WRITE_BATCH_SIZE', 100))
+
+    # Notifications de nouvelles offres (webhook, envoi par lots depuis un worker en arrière-plan)
+    NOTIFY_WEBHOOK_URL = os.getenv('NOTIFY_WEBHOOK_URL')
+    NOTIFY_BATCH_SIZE = int(os.getenv('NOTIFY_BATCH_SIZE', 100))
+    NOTIFY_MAX_ATTEMPTS = int(os.getenv('NOTIFY_MAX_ATTEMPTS', 8))
+    NOTIFY_POLL_INTERVAL = float(os.getenv('NOTIFY_POLL_INTERVAL', 10))
+
+    # Cache disque des extractions (technologies, villes, dates) par hash du contenu
+    EXTRACTION_CACHE_ENABLED = os.getenv('EXTRACTION_CACHE', '1') != '0'
+    EXTRACTION_CACHE_PATH = os.getenv(
+        'EXTRACTION_CACHE_PATH',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'extraction_cache.sqlite3'),
+    )
+    EXTRACTION_CACHE_MAX_ENTRIES = int(os.getenv('EXTRACTION_CACHE_MAX_ENTRIES', 200000))
+
+    # Cache des réponses /api/stats/* (invalidé par la version des données, voir stats_cache.py)
+    STATS_CACHE_ENABLED = os.getenv('STATS_CACHE', '1') != '0'
+    STATS_CACHE_BACKEND = os.getenv('STATS_CACHE_BACKEND', 'memory')  # memory | redis
+    STATS_CACHE_REDIS_URL = os.getenv('STATS_CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    STATS_CACHE_TTL = int(os.getenv('STATS_CACHE_TTL', 3600))
+    STATS_CACHE_MAX_ENTRIES = int(os.getenv('STATS_CACHE_MAX_ENTRIES', 512))
+    STATS_CACHE_MAX_BYTES = int(os.getenv('STATS_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    STATS_CACHE_POLL_INTERVAL = float(os.getenv('STATS_CACHE_POLL_INTERVAL', 5))
+
+    # Réponses HTTP de l'API : compression au-delà d'un seuil, ETag / Cache-Control (voir http_cache.py)
+    HTTP_COMPRESS_MIN_SIZE = int(os.getenv('HTTP_COMPRESS_MIN_SIZE', 1024))
+    HTTP_GZIP_LEVEL = int(os.getenv('HTTP_GZIP_LEVEL', 6))
+    HTTP_BROTLI_QUALITY = int(os.getenv('HTTP_BROTLI_QUALITY', 5))
+    # max-age fixe en secondes ; 0 = no-cache (revalidation par ETag à chaque requête)
+    HTTP_CACHE_MAX_AGE = int(os.getenv('HTTP_CACHE_MAX_AGE', 0))
+
+    # Snapshot colonnaire (Arrow) reconstruit après chaque scraping, agrégations NumPy (voir analytics_snapshot.py)
+    ANALYTICS_SNAPSHOT_ENABLED = os.getenv('ANALYTICS_SNAPSHOT', '1') != '0'
+    ANALYTICS_SNAPSHOT_DIR = os.getenv(
+        'ANALYTICS_SNAPSHOT_DIR',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'snapshots'),
+    )
+
+    # Runs de scraping : un seul run actif par type, progression publiée toutes les quelques secondes (voir scrape_runs.py)
+    SCRAPE_RUN_PROGRESS_INTERVAL = float(os.getenv('SCRAPE_RUN_PROGRESS_INTERVAL', 2))
+    SCRAPE_RUN_HEARTBEAT_INTERVAL = float(os.getenv('SCRAPE_RUN_HEARTBEAT_INTERVAL', 10))
+    # Verrou d'un run sans heartbeat depuis ce délai (process tué) : repris par la demande suivante
+    SCRAPE_RUN_STALE_AFTER = int(os.getenv('SCRAPE_RUN_STALE_AFTER', 120))
+
+    # Flux SSE /api/stream/events : lots d'offres commités par les scrapers, relus par un seul thread par process
+    LIVE_EVENTS_ENABLED = os.getenv('LIVE_EVENTS', '1') != '0'
+    LIVE_EVENTS_POLL_INTERVAL = float(os.getenv('LIVE_EVENTS_POLL_INTERVAL', 1))
+    LIVE_EVENTS_RETENTION = int(os.getenv('LIVE_EVENTS_RETENTION', 3600))  # secondes gardées en base
+    SSE_CLIENT_BUFFER = int(os.getenv('SSE_CLIENT_BUFFER', 100))  # événements en attente par client
+    SSE_MAX_CLIENTS = int(os.getenv('SSE_MAX_CLIENTS', 100))
+    SSE_KEEPALIVE = float(os.getenv('SSE_KEEPALIVE', 15))
+
+    # Serveur de production (wsgi.py) : un seul worker possède le scheduler (voir leader.py)
+    SCHEDULER_LOCK = os.getenv('SCHEDULER_LOCK', 'file')  # file (une machine) | db (plusieurs machines)
+    SCHEDULER_LOCK_FILE = os.getenv(
+        'SCHEDULER_LOCK_FILE',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'scheduler.lock'),
+    )
+    SCHEDULER_LEASE_TTL = int(os.getenv('SCHEDULER_LEASE_TTL', 60))
+    # Intervalle de renouvellement du bail / de candidature des autres workers
+    SCHEDULER_ELECTION_INTERVAL = float(os.getenv('SCHEDULER_ELECTION_INTERVAL', 15))
@@ -0,0 +1,32 @@
+"""
+Version des données servies par l'API.
+
+Les scrapers et l'import AI tournent dans d'autres process que Flask : ils
+incrémentent la version en base (table data_versions) dans la transaction qui
+termine leur run. Le serveur compare cette version à celle de ses caches
+(stats_cache.py) pour les invalider puis les réchauffer.
+"""
+from datetime import datetime
+
+from sqlalchemy import select, update
+
+from bulk import insert_ignore
+from models import DataVersion
+
+JOBS = 'jobs'
+
+
+def bump_data_version(session, name=JOBS):
+    """Incrémente la version (atomique : UPDATE version = version + 1)"""
+    table = DataVersion.__table__
+    now = datetime.utcnow()
+    result = session.execute(
+        update(table).where(table.c.name == name).values(version=table.c.version + 1, updated_at=now)
+    )
+    if not result.rowcount:
+        dialect = session.get_bind().dialect.name
+        session.execute(insert_ignore(DataVersion, dialect).values(name=name, version=1, updated_at=now))
+
+
+def read_data_version(session, name=JOBS):
+    return session.execute(select(DataVersion.version).where(DataVersion.name == name)).scalar() or 0
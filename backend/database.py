@@ -0,0 +1,52 @@
+"""
+Accès base de données sans application Flask.
+
+Les scrapers, l'import AI et les scripts de maintenance n'ont besoin que d'une
+session SQLAlchemy : pas de Flask, pas d'APScheduler, pas de blueprint.
+Les modèles de models.py sont des classes mappées classiques, utilisables
+directement avec ces sessions (session.query(Job), select(Job), ...).
+"""
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from config import Config
+from models import Base
+
+_engine = None
+_session_factory = None
+
+
+def get_engine():
+    """Engine partagé par le process, créé au premier appel"""
+    global _engine
+    if _engine is None:
+        _engine = create_engine(Config.SQLALCHEMY_DATABASE_URI, **Config.SQLALCHEMY_ENGINE_OPTIONS)
+    return _engine
+
+
+def get_session():
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = sessionmaker(bind=get_engine(), expire_on_commit=False)
+    return _session_factory()
+
+
+@contextmanager
+def session_scope():
+    """Session transactionnelle : commit en sortie, rollback sur exception"""
+    session = get_session()
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def init_db():
+    """Crée les tables manquantes (équivalent de db.create_all() sans app Flask)"""
+    Base.metadata.create_all(get_engine())
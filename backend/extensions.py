@@ -0,0 +1,13 @@
+"""
+Extensions Flask de l'application.
+
+models.py déclare les modèles sur une base SQLAlchemy simple (pas de Flask) ;
+Flask-SQLAlchemy s'y rattache ici : db.session, db.metadata et Model.query
+(routes) pointent sur les mêmes classes. Importé par app.py et les modules
+côté serveur uniquement, jamais par les scrapers.
+"""
+from flask_sqlalchemy import SQLAlchemy
+
+from models import Base
+
+db = SQLAlchemy(model_class=Base)
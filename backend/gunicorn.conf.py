@@ -0,0 +1,22 @@
+"""
+Configuration gunicorn : gunicorn -c gunicorn.conf.py wsgi:app
+
+Workers gthread : une requête lente (export, SSE) occupe un thread, pas un worker.
+Chaque client du flux /api/stream/events garde son thread : prévoir
+GUNICORN_THREADS x workers au-delà du nombre de dashboards ouverts.
+"""
+import os
+import multiprocessing
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+# Pas de preload : l'application (scheduler, threads de fond, pool) est créée dans chaque worker après le fork
+preload_app = False
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+keepalive = 5
+# Recyclage progressif des workers (fuites mémoire éventuelles des dépendances)
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = 1000
+accesslog = os.getenv('GUNICORN_ACCESS_LOG')  # '-' : stdout
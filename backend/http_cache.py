@@ -0,0 +1,100 @@
+"""
+Requêtes conditionnelles et compression des réponses de l'API.
+
+- ETag fort dérivé de la version des données (data_version.py) : tant qu'aucun run
+  n'a modifié les offres, un If-None-Match valide est résolu par un 304 avant
+  d'exécuter la vue (la version est déjà en mémoire via StatsCache : aucune requête SQL).
+- Cache-Control: no-cache (ou max-age court et fixe, HTTP_CACHE_MAX_AGE) : le
+  navigateur revalide à chaque affichage, le 304 suffit à éviter le transfert.
+  Un max-age calé sur le prochain scraping servirait des données périmées
+  jusqu'à une heure après un run manuel, et différerait d'un worker à l'autre.
+- Corps JSON au-delà de HTTP_COMPRESS_MIN_SIZE compressés selon Accept-Encoding :
+  brotli si le module est installé (pip install brotli), sinon gzip.
+"""
+import gzip
+
+from flask import current_app, g, request
+
+from data_version import read_data_version
+
+try:
+    import brotli
+except ImportError:  # dépendance optionnelle
+    brotli = None
+
+ENCODINGS = ('br', 'gzip')
+
+
+def current_data_version():
+    cache = current_app.extensions.get('stats_cache')
+    if cache is not None:
+        return cache.version()
+    from extensions import db
+
+    return read_data_version(db.session)
+
+
+def make_etag(version, encoding=None):
+    # Une représentation compressée est une autre représentation : ETag distinct (RFC 9110 §8.8.3)
+    return f'v{version}-{encoding}' if encoding else f'v{version}'
+
+
+def not_modified():
+    """
+    À appeler avant la vue (GET) : mémorise la version des données dans `g` et
+    retourne une réponse 304 si le client possède déjà cette version.
+    """
+    version = g.data_version = current_data_version()
+    if not request.if_none_match:
+        return None
+    for encoding in (None,) + ENCODINGS:
+        etag = make_etag(version, encoding)
+        if request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
+            response.set_etag(etag)
+            return response
+    return None
+
+
+def accepted_encoding(response):
+    """Encodage à appliquer à `response` (None : envoyer tel quel)"""
+    if (response.status_code != 200 or response.is_streamed or response.direct_passthrough
+            or 'Content-Encoding' in response.headers or not response.is_json):
+        return None
+    if response.content_length is None or response.content_length < current_app.config.get('HTTP_COMPRESS_MIN_SIZE', 1024):
+        return None
+    for encoding in ENCODINGS:
+        if encoding == 'br' and brotli is None:
+            continue
+        if request.accept_encodings[encoding]:
+            return encoding
+    return None
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=current_app.config.get('HTTP_BROTLI_QUALITY', 5))
+    return gzip.compress(body, compresslevel=current_app.config.get('HTTP_GZIP_LEVEL', 6), mtime=0)
+
+
+def finalize(response):
+    """À appeler après la vue : compression, ETag et Cache-Control"""
+    if response.is_streamed or response.direct_passthrough:
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = accepted_encoding(response)
+    if encoding:
+        response.set_data(compress(response.get_data(), encoding))
+        response.headers['Content-Encoding'] = encoding
+    version = g.get('data_version')
+    if version is None or response.status_code not in (200, 304):
+        return response
+    if response.status_code == 200:
+        response.set_etag(make_etag(version, encoding))
+    max_age = current_app.config.get('HTTP_CACHE_MAX_AGE', 0)
+    response.cache_control.public = True
+    if max_age > 0:
+        response.cache_control.max_age = max_age
+    else:
+        response.cache_control.no_cache = True
+    return response
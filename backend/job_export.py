@@ -0,0 +1,171 @@
+"""
+Export des offres en flux (GET /api/jobs/export).
+
+Les lignes sont lues par un curseur côté serveur (colonnes seulement, pas d'objets
+ORM) et écrites par blocs d'environ 64 Ko : la mémoire reste constante quel que
+soit le nombre d'offres exportées.
+
+Formats : csv (défaut), ndjson, parquet (dépendance optionnelle : pip install pyarrow).
+csv et ndjson peuvent être compressés en gzip à la volée.
+"""
+import io
+import csv
+import json
+import zlib
+
+from sqlalchemy import String, type_coerce
+
+from models import Job
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # dépendance optionnelle
+    pa = pq = None
+
+
+def _raw_json(column):
+    # Listes JSON lues comme texte puis décodées par json.loads : le processeur de résultat
+    # du type JSON de SQLAlchemy coûtait plus que la lecture des lignes elle-même
+    return type_coerce(column, String).label(column.key)
+
+
+def _list(raw):
+    return json.loads(raw) if raw else []
+
+
+EXPORT_COLUMNS = (
+    Job.title, Job.company, Job.location, Job.source_site, Job.date_posted,
+    Job.url_offre, _raw_json(Job.technologies), _raw_json(Job.skills),
+)
+FIELDS = ('title', 'company', 'location', 'source_site', 'date_posted', 'url_offre', 'technologies', 'skills')
+CSV_HEADER = ('Titre', 'Entreprise', 'Ville', 'Source', 'Date Publication', 'URL', 'Technologies', 'Compétences')
+
+CHUNK_SIZE = 64 * 1024
+FETCH_SIZE = 2000
+PARQUET_ROW_GROUP = 20_000
+
+# format -> (mimetype, extension)
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+def format_available(fmt):
+    return fmt in FORMATS and (fmt != 'parquet' or pq is not None)
+
+
+def csv_chunks(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    for title, company, location, source, date_posted, url, techs, skills in rows:
+        writer.writerow((
+            title, company, location, source,
+            date_posted.isoformat() if date_posted else '',
+            url,
+            ', '.join(_list(techs)),
+            ', '.join(_list(skills)),
+        ))
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate(0)
+    yield buffer.getvalue().encode('utf-8')
+
+
+def ndjson_chunks(rows):
+    lines, size = [], 0
+    for row in rows:
+        record = dict(zip(FIELDS, row))
+        record['date_posted'] = record['date_posted'].isoformat() if record['date_posted'] else None
+        record['technologies'], record['skills'] = _list(record['technologies']), _list(record['skills'])
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        lines.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield ''.join(lines).encode('utf-8')
+            lines, size = [], 0
+    yield ''.join(lines).encode('utf-8')
+
+
+class _ChunkSink:
+    """Fichier en écriture seule pour ParquetWriter : le contenu écrit est récupéré au fil de l'eau"""
+
+    closed = False
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def parquet_chunks(rows):
+    schema = pa.schema([
+        ('title', pa.string()), ('company', pa.string()), ('location', pa.string()),
+        ('source_site', pa.string()), ('date_posted', pa.timestamp('us')), ('url_offre', pa.string()),
+        ('technologies', pa.list_(pa.string())), ('skills', pa.list_(pa.string())),
+    ])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression='snappy')
+
+    def write_group(batch):
+        columns = list(zip(*batch))
+        writer.write_table(pa.table([pa.array(col, type=f.type) for col, f in zip(columns, schema)], schema=schema))
+
+    batch = []
+    for row in rows:
+        batch.append(tuple(row[:6]) + (_list(row[6]), _list(row[7])))
+        if len(batch) >= PARQUET_ROW_GROUP:
+            write_group(batch)
+            batch = []
+            yield sink.drain()
+    if batch:
+        write_group(batch)
+    writer.close()
+    yield sink.drain()
+
+
+def gzip_chunks(chunks, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(rows, fmt, compress=False):
+    """Blocs d'octets du fichier exporté ; `rows` : tuples dans l'ordre d'EXPORT_COLUMNS"""
+    chunks = {'csv': csv_chunks, 'ndjson': ndjson_chunks, 'parquet': parquet_chunks}[fmt](rows)
+    if compress and fmt != 'parquet':
+        # Parquet est déjà compressé colonne par colonne
+        chunks = gzip_chunks(chunks)
+    for chunk in chunks:
+        if chunk:
+            yield chunk
+
+
+def export_filename(fmt, compress=False):
+    name = f'jobs_export.{FORMATS[fmt][1]}'
+    return name + '.gz' if compress and fmt != 'parquet' else name
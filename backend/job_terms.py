@@ -0,0 +1,129 @@
+"""
+Tables d'association normalisées offre <-> technologie / compétence.
+
+Les colonnes JSON ``technologies`` / ``skills`` de jobs restent la source
+affichée ; job_technologies / job_skills en sont une copie indexée qui sert
+les filtres (une technologie, plusieurs en ET / OU) et les comptes par
+technologie via des jointures indexées, au lieu d'un ILIKE sur le JSON qui
+parcourt toute la table.
+
+Backfill des offres existantes: python job_terms.py
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import select, delete, func, and_, or_
+
+from bulk import insert_ignore
+from models import Job, Technology, Skill, JobTechnology, JobSkill
+
+# (dictionnaire, table d'association, colonne de clé étrangère)
+TERM_TABLES = {
+    'technologies': (Technology, JobTechnology, 'technology_id'),
+    'skills': (Skill, JobSkill, 'skill_id'),
+}
+
+
+def _names(values):
+    # Données AI importées : on ignore les valeurs non textuelles ou trop longues pour le dictionnaire
+    return [v for v in values or () if isinstance(v, str) and 0 < len(v) <= 100]
+
+
+class TermLinker:
+    """Écrit les associations d'un lot d'offres (ids des termes gardés en cache : ils ne changent jamais)"""
+
+    def __init__(self):
+        self._ids = {name: {} for name in TERM_TABLES}
+
+    def _term_ids(self, session, kind, names):
+        model = TERM_TABLES[kind][0]
+        cache = self._ids[kind]
+        missing = sorted({n for n in names if n not in cache})
+        if missing:
+            dialect = session.get_bind().dialect.name
+            session.execute(insert_ignore(model, dialect).values([{'name': n} for n in missing]))
+            # Comparaison insensible à la casse : MySQL considère 'React' et 'react' comme le même nom
+            found = {n.lower(): i for i, n in session.execute(select(model.id, model.name).where(model.name.in_(missing)))}
+            for n in missing:
+                if n.lower() in found:
+                    cache[n] = found[n.lower()]
+        return cache
+
+    def link(self, session, jobs):
+        """Associations de [(job_id, technologies, skills), ...] (offres nouvellement insérées)"""
+        dialect = session.get_bind().dialect.name
+        for position, kind in enumerate(TERM_TABLES, start=1):
+            _, assoc, fk = TERM_TABLES[kind]
+            names = {n for job in jobs for n in _names(job[position])}
+            if not names:
+                continue
+            ids = self._term_ids(session, kind, names)
+            rows = {(job[0], ids[n]) for job in jobs for n in _names(job[position]) if n in ids}
+            session.execute(
+                insert_ignore(assoc, dialect),
+                [{'job_id': job_id, fk: term_id} for job_id, term_id in sorted(rows)],
+            )
+
+    def relink(self, session, jobs):
+        """Remplace les associations d'offres existantes (après ré-extraction)"""
+        job_ids = [job[0] for job in jobs]
+        for _, assoc, _ in TERM_TABLES.values():
+            session.execute(delete(assoc).where(assoc.job_id.in_(job_ids)))
+        self.link(session, jobs)
+
+
+def term_filter(kind, names, mode='and'):
+    """
+    Critère sur Job.id : offres associées à toutes (mode 'and') ou à l'une (mode 'or') des
+    technologies / compétences `names` (insensible à la casse). Chaque terme est une semi-jointure
+    sur l'index (terme, job_id) de la table d'association.
+    """
+    model, assoc, fk = TERM_TABLES[kind]
+
+    def jobs_with(name):
+        return select(assoc.job_id).join(model, model.id == getattr(assoc, fk)).where(
+            func.lower(model.name) == name.lower()
+        )
+
+    criteria = [Job.id.in_(jobs_with(n)) for n in names]
+    return and_(*criteria) if mode == 'and' else or_(*criteria)
+
+
+def term_counts(kind, job_ids=None, limit=50):
+    """Requête (nom, nombre d'offres) par terme, restreinte à la sous-requête d'ids `job_ids` si fournie"""
+    model, assoc, fk = TERM_TABLES[kind]
+    count = func.count(assoc.job_id)
+    query = select(model.name, count).join(assoc, getattr(assoc, fk) == model.id)
+    if job_ids is not None:
+        query = query.where(assoc.job_id.in_(job_ids))
+    return query.group_by(model.name).order_by(count.desc()).limit(limit)
+
+
+def backfill(session, chunk_size=2000):
+    """Crée les associations de toutes les offres existantes (relançable : doublons ignorés)"""
+    linker = TermLinker()
+    last_id, total = 0, 0
+    while True:
+        rows = session.execute(
+            select(Job.id, Job.technologies, Job.skills)
+            .where(Job.id > last_id)
+            .order_by(Job.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            return total
+        linker.link(session, [tuple(r) for r in rows])
+        last_id = rows[-1].id
+        total += len(rows)
+
+
+if __name__ == '__main__':
+    from database import session_scope, init_db
+
+    init_db()
+    with session_scope() as session:
+        print("🏷️  Remplissage de job_technologies / job_skills...")
+        count = backfill(session)
+    print(f"✅ {count} offres associées")
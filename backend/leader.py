@@ -0,0 +1,161 @@
+"""
+Élection du process qui exécute le scheduler (scraping horaire, envoi des notifications).
+
+Sous un serveur WSGI multi-workers (wsgi.py), chaque worker crée l'application :
+sans élection, chacun démarrerait APScheduler et lancerait son scraping horaire.
+Un seul worker est élu ; les autres retentent toutes les
+SCHEDULER_ELECTION_INTERVAL secondes et prennent le relais si le leader disparaît.
+
+- SCHEDULER_LOCK=file (défaut) : verrou exclusif non bloquant sur un fichier
+  (flock, msvcrt sous Windows), libéré par le système à la mort du process.
+  Workers d'une même machine.
+- SCHEDULER_LOCK=db : bail dans scheduler_leases, renouvelé par le leader et
+  repris après SCHEDULER_LEASE_TTL secondes sans renouvellement. Plusieurs machines
+  (horloges supposées synchronisées).
+"""
+import os
+import uuid
+import socket
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import update, or_
+
+from bulk import insert_ignore
+from models import SchedulerLease
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+SCHEDULER = 'scheduler'
+
+
+class FileLock:
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def acquire(self):
+        """Prend le verrou ou confirme qu'on le détient ; False s'il appartient à un autre process"""
+        if self._file is not None:
+            return True
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        lock_file = open(self.path, 'a+')
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            lock_file.close()
+            return False
+        self._file = lock_file
+        return True
+
+    def release(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class DbLease:
+    def __init__(self, session_factory, name=SCHEDULER, ttl=60):
+        self.session_factory = session_factory
+        self.name = name
+        self.ttl = ttl
+        self.owner = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+    def acquire(self):
+        """Prend ou renouvelle le bail (UPDATE conditionnel atomique) ; False s'il est détenu ailleurs"""
+        now = datetime.utcnow()
+        session = self.session_factory()
+        try:
+            session.execute(
+                insert_ignore(SchedulerLease, session.get_bind().dialect.name).values(name=self.name, expires_at=now)
+            )
+            result = session.execute(
+                update(SchedulerLease)
+                .where(
+                    SchedulerLease.name == self.name,
+                    or_(SchedulerLease.owner == self.owner, SchedulerLease.owner.is_(None), SchedulerLease.expires_at < now),
+                )
+                .values(owner=self.owner, expires_at=now + timedelta(seconds=self.ttl))
+            )
+            session.commit()
+            return bool(result.rowcount)
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def release(self):
+        session = self.session_factory()
+        try:
+            session.execute(
+                update(SchedulerLease)
+                .where(SchedulerLease.name == self.name, SchedulerLease.owner == self.owner)
+                .values(owner=None)
+            )
+            session.commit()
+        finally:
+            session.close()
+
+
+class LeaderElection:
+    """
+    Candidature périodique sur `lock` : on_elected() à la prise du verrou,
+    on_lost() si le leader ne peut plus le renouveler (bail repris, base injoignable).
+    """
+
+    def __init__(self, lock, on_elected, on_lost=None, interval=15):
+        self.lock = lock
+        self.on_elected = on_elected
+        self.on_lost = on_lost
+        self.interval = interval
+        self.leader = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        # Première tentative tout de suite : le scheduler démarre avec le premier worker
+        self.check()
+        self._thread = threading.Thread(target=self._run, name='scheduler-election', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self.leader:
+            self.lock.release()
+            self.leader = False
+
+    def check(self):
+        try:
+            held = self.lock.acquire()
+        except Exception as e:
+            print(f"⚠️ Élection du scheduler: {e}")
+            held = False
+        if held and not self.leader:
+            self.leader = True
+            print(f"👑 Process {os.getpid()} élu : scheduler actif")
+            self.on_elected()
+        elif not held and self.leader:
+            self.leader = False
+            print(f"⚠️ Process {os.getpid()} n'est plus leader : scheduler suspendu")
+            if self.on_lost is not None:
+                self.on_lost()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+
+def make_lock(config, session_factory):
+    if config.SCHEDULER_LOCK == 'db':
+        return DbLease(session_factory, ttl=config.SCHEDULER_LEASE_TTL)
+    return FileLock(config.SCHEDULER_LOCK_FILE)
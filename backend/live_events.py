@@ -0,0 +1,238 @@
+"""
+Flux temps réel des nouvelles offres (GET /api/stream/events, Server-Sent Events).
+
+Les scrapers tournent dans d'autres process : chaque lot commité par le
+pipeline écrit une ligne live_events (résumés des nouvelles offres uniques +
+deltas de stats) dans la même transaction que les offres. Côté serveur, un seul
+thread par process (EventBroker) relit les nouvelles lignes toutes les
+LIVE_EVENTS_POLL_INTERVAL secondes, formate chaque événement une fois et le
+pose dans le buffer de chaque client : une requête par intervalle quel que soit
+le nombre de dashboards ouverts, et aucune quand personne n'écoute.
+
+Chaque client a un buffer borné (SSE_CLIENT_BUFFER événements). Un client trop
+lent perd les plus anciens et reçoit un événement `resync` (recharger les stats)
+au lieu de ralentir les autres. L'id SSE est celui de la ligne : un navigateur
+qui se reconnecte (Last-Event-ID) reçoit les événements récents manqués.
+"""
+import json
+import time
+import threading
+from collections import Counter, deque
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, delete, func
+
+from config import Config
+from models import LiveEvent, StatsSummary
+from notifications import job_payload
+from rollups import SUMMARY
+
+BATCH_SIZE = 500
+# Délai avant de considérer perdu un id manquant (transaction plus ancienne commitée après une plus récente)
+GAP_GRACE = 10.0
+PRUNE_INTERVAL = 300.0
+
+
+def record(session, new_jobs, rows, unique_rows):
+    """
+    Ajoute l'événement d'un lot dans la transaction en cours.
+    `new_jobs` : [(job_id, row)] des offres uniques, `rows` / `unique_rows` comme pour les rollups.
+    """
+    if not Config.LIVE_EVENTS_ENABLED or not rows:
+        return
+    session.execute(LiveEvent.__table__.insert().values(
+        payload={
+            'jobs': [job_payload(job_id, row) for job_id, row in new_jobs],
+            'stats': {
+                'jobs': len(rows),
+                'unique_jobs': len(unique_rows),
+                'technologies': dict(Counter(t for r in unique_rows for t in r['technologies'])),
+                'sources': dict(Counter(r['source_site'] for r in rows)),
+            },
+        },
+        created_at=datetime.utcnow(),
+    ))
+
+
+def encode(event, data, event_id=None):
+    """Message SSE (texte prêt à envoyer)"""
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data, ensure_ascii=False, separators=(",", ":"))}')
+    return '\n'.join(lines) + '\n\n'
+
+
+class Subscriber:
+    """Buffer borné d'un client : les messages les plus anciens sont perdus s'il ne suit pas"""
+
+    def __init__(self, size):
+        self._messages = deque(maxlen=size)
+        self._cond = threading.Condition()
+        self.overflowed = False
+
+    def put(self, message):
+        with self._cond:
+            if len(self._messages) == self._messages.maxlen:
+                self.overflowed = True
+            self._messages.append(message)
+            self._cond.notify()
+
+    def take(self, timeout):
+        """(messages en attente, perte depuis le dernier appel) ; attend au plus `timeout` secondes"""
+        with self._cond:
+            if not self._messages:
+                self._cond.wait(timeout)
+            messages = list(self._messages)
+            self._messages.clear()
+            overflowed, self.overflowed = self.overflowed, False
+        return messages, overflowed
+
+
+class EventBroker:
+    def __init__(self, session_factory, poll_interval=None, retention=None, client_buffer=None,
+                 max_clients=None, keepalive=None, history=256):
+        self.session_factory = session_factory
+        self.poll_interval = poll_interval if poll_interval is not None else Config.LIVE_EVENTS_POLL_INTERVAL
+        self.retention = retention if retention is not None else Config.LIVE_EVENTS_RETENTION
+        self.client_buffer = client_buffer or Config.SSE_CLIENT_BUFFER
+        self.max_clients = max_clients or Config.SSE_MAX_CLIENTS
+        self.keepalive = keepalive if keepalive is not None else Config.SSE_KEEPALIVE
+        self.published = 0
+        self._subscribers = set()
+        # (id, messages) des derniers événements, rejoués aux clients qui se reconnectent
+        self._history = deque(maxlen=history)
+        self._cursor = None  # plus grand id tel que tous les ids <= cursor ont été traités
+        self._seen = set()  # ids > cursor déjà publiés
+        self._gap_since = None
+        self._pruned_at = 0.0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    @property
+    def clients(self):
+        return len(self._subscribers)
+
+    def subscribe(self, last_event_id=None):
+        """Nouveau client (None au-delà de max_clients) ; rejoue les événements postérieurs à `last_event_id`"""
+        with self._lock:
+            if len(self._subscribers) >= self.max_clients:
+                return None
+            subscriber = Subscriber(self.client_buffer)
+            if last_event_id is not None and self._history:
+                if last_event_id < self._history[0][0] - 1:
+                    # Reconnexion après plus d'événements que l'historique n'en garde
+                    subscriber.overflowed = True
+                for event_id, messages in self._history:
+                    if event_id > last_event_id:
+                        for message in messages:
+                            subscriber.put(message)
+            self._subscribers.add(subscriber)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='live-events', daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, event_id, messages):
+        """Un formatage par événement, puis un append par client"""
+        with self._lock:
+            self._history.append((event_id, messages))
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            for message in messages:
+                subscriber.put(message)
+        self.published += 1
+
+    def stream(self, subscriber):
+        """Corps de la réponse text/event-stream d'un client"""
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                messages, overflowed = subscriber.take(self.keepalive)
+                if overflowed:
+                    yield encode('resync', {'reason': 'Événements perdus : recharger les statistiques'})
+                if messages:
+                    yield ''.join(messages)
+                elif not overflowed:
+                    # Commentaire SSE : garde la connexion ouverte (proxies) et détecte les clients partis
+                    yield ': keepalive\n\n'
+        finally:
+            self.unsubscribe(subscriber)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            if not self._subscribers:
+                # Personne n'écoute : pas de requête. À la reprise, on repart des événements à venir
+                self._cursor = None
+                continue
+            session = self.session_factory()
+            try:
+                self.poll(session)
+                self._prune(session)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                print(f"⚠️ Flux temps réel: {e}")
+            finally:
+                session.close()
+
+    def poll(self, session):
+        """Publie les événements commités depuis le dernier appel"""
+        if self._cursor is None:
+            self._cursor = session.execute(select(func.max(LiveEvent.id))).scalar() or 0
+            self._seen.clear()
+            self._gap_since = None
+            return 0
+        rows = session.execute(
+            select(LiveEvent.id, LiveEvent.payload).where(LiveEvent.id > self._cursor).order_by(LiveEvent.id).limit(BATCH_SIZE)
+        ).all()
+        rows = [(event_id, payload) for event_id, payload in rows if event_id not in self._seen]
+        if rows:
+            # Totaux courants joints au dernier delta : une lecture par poll, pas par client
+            totals = session.execute(
+                select(StatsSummary.total_jobs, StatsSummary.unique_jobs, StatsSummary.total_companies)
+                .where(StatsSummary.name == SUMMARY)
+            ).first()
+            for event_id, payload in rows:
+                messages = []
+                if payload.get('jobs'):
+                    messages.append(encode('jobs', payload['jobs'], event_id))
+                stats = dict(payload.get('stats') or {})
+                if totals is not None:
+                    stats['totals'] = dict(zip(('total_jobs', 'unique_jobs', 'total_companies'), totals))
+                messages.append(encode('stats', stats, event_id))
+                self.publish(event_id, messages)
+                self._seen.add(event_id)
+        self._advance()
+        return len(rows)
+
+    def _advance(self):
+        # Le curseur ne dépasse un id manquant qu'après GAP_GRACE secondes : une transaction
+        # qui a pris un id plus petit peut encore commiter après une plus récente
+        while self._seen:
+            if self._cursor + 1 in self._seen:
+                self._cursor += 1
+                self._seen.discard(self._cursor)
+                self._gap_since = None
+                continue
+            now = time.monotonic()
+            if self._gap_since is None:
+                self._gap_since = now
+            if now - self._gap_since < GAP_GRACE:
+                return
+            self._cursor = min(self._seen) - 1
+            self._gap_since = None
+
+    def _prune(self, session):
+        now = time.monotonic()
+        if now - self._pruned_at < PRUNE_INTERVAL:
+            return
+        self._pruned_at = now
+        session.execute(delete(LiveEvent).where(LiveEvent.created_at < datetime.utcnow() - timedelta(seconds=self.retention)))
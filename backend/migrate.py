@@ -0,0 +1,208 @@
+"""
+Migrations idempotentes du schéma.
+
+db.create_all() crée les nouvelles tables mais ne modifie pas les tables existantes :
+ce script applique les changements sur une base déjà peuplée. Il peut être relancé sans risque.
+
+Usage: python migrate.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import inspect, select, func, update, delete
+from sqlalchemy.orm import Session
+
+from models import Base, Job, TechnologyStat, CompetenceStat, TechMonthlyCount, TechDailyCount, JobTechnology, JobSearchTerm, JobDimensionCount, StatsSummary
+from rollups import rebuild_tech_monthly, rebuild_tech_daily, rebuild_dimension_counts, rebuild_job_summary
+from job_terms import backfill as backfill_term_links
+from search import FULLTEXT_INDEX, uses_fulltext, backfill as backfill_search_index
+from cities import seed_cities, backfill as backfill_cities
+from scraper.near_dup import BANDS, ROWS, buckets_stale, rebuild_buckets
+
+MIGRATIONS = []
+
+
+def migration(fn):
+    MIGRATIONS.append(fn)
+    return fn
+
+
+def _index(model, column_name):
+    for idx in model.__table__.indexes:
+        if [c.name for c in idx.columns] == [column_name]:
+            return idx
+    raise LookupError(f"Pas d'index sur {model.__tablename__}.{column_name}")
+
+
+def _ensure_unique_index(conn, model, column_name):
+    """Fusionne les doublons éventuels puis remplace l'index simple par un index unique"""
+    table = model.__table__
+    column = table.c[column_name]
+    existing = {i['name']: i for i in inspect(conn).get_indexes(table.name)}
+    idx = _index(model, column_name)
+    if idx.name in existing and existing[idx.name]['unique']:
+        return False
+
+    duplicates = conn.execute(
+        select(column, func.sum(table.c.count), func.min(table.c.id))
+        .group_by(column)
+        .having(func.count(table.c.id) > 1)
+    ).all()
+    for name, total, keep_id in duplicates:
+        conn.execute(update(table).where(table.c.id == keep_id).values(count=total))
+        conn.execute(delete(table).where(column == name, table.c.id != keep_id))
+
+    if idx.name in existing:
+        idx.drop(conn)
+    idx.create(conn)
+    print(f"  ✅ {table.name}.{column_name}: {len(duplicates)} doublons fusionnés, index unique créé")
+    return True
+
+
+def _ensure_index(conn, model, index_name):
+    """Crée un index déclaré sur le modèle s'il n'existe pas encore en base"""
+    table = model.__table__
+    if index_name in {i['name'] for i in inspect(conn).get_indexes(table.name)}:
+        return False
+    next(i for i in table.indexes if i.name == index_name).create(conn)
+    print(f"  ✅ index {index_name} créé")
+    return True
+
+
+def _add_column(conn, model, column_name):
+    """ALTER TABLE ... ADD COLUMN (+ index éventuel) si la colonne n'existe pas encore"""
+    table = model.__table__
+    if column_name in {c['name'] for c in inspect(conn).get_columns(table.name)}:
+        return False
+    column = table.c[column_name]
+    col_type = column.type.compile(dialect=conn.dialect)
+    conn.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}')
+    for idx in table.indexes:
+        if column in idx.columns.values():
+            idx.create(conn)
+    print(f"  ✅ {table.name}.{column_name} ajoutée")
+    return True
+
+
+@migration
+def unique_stat_names(conn):
+    """technologies_stats / competences_stats : clé unique sur le nom (upserts atomiques)"""
+    _ensure_unique_index(conn, TechnologyStat, 'technology')
+    _ensure_unique_index(conn, CompetenceStat, 'competence')
+
+
+@migration
+def job_clusters(conn):
+    """jobs.cluster_id : clusters de quasi-doublons (backfill: python scraper/near_dup.py)"""
+    _add_column(conn, Job, 'cluster_id')
+
+
+@migration
+def job_cities(conn):
+    """cities + jobs.city_id : ville canonique (gazetteer de cities.py), filtres par égalité indexée"""
+    # Avant les backfills et rollups suivants : ils lisent jobs.city_id
+    _add_column(conn, Job, 'city_id')
+    if conn.dialect.name == 'mysql':
+        # SQLite n'ajoute pas de contrainte à une table existante (la colonne suffit)
+        if 'fk_jobs_city_id' not in {fk['name'] for fk in inspect(conn).get_foreign_keys('jobs')}:
+            conn.exec_driver_sql('ALTER TABLE jobs ADD CONSTRAINT fk_jobs_city_id FOREIGN KEY (city_id) REFERENCES cities (id)')
+    with Session(bind=conn) as session:
+        seed_cities(session)
+        count = backfill_cities(session)
+        session.flush()
+    if count:
+        print(f"  ✅ {count} offres rattachées à une ville")
+        rebuild_dimension_counts(conn)
+
+
+@migration
+def tech_monthly_rollup(conn):
+    """tech_monthly_counts : rollup mensuel des technologies (rempli une fois, puis maintenu à l'ingestion)"""
+    if conn.execute(select(TechMonthlyCount.month).limit(1)).first() is not None:
+        return
+    print(f"  ✅ {rebuild_tech_monthly(conn)} lignes (mois, technologie) calculées")
+
+
+@migration
+def job_term_links(conn):
+    """job_technologies / job_skills : associations normalisées (filtres par jointure indexée)"""
+    if conn.execute(select(JobTechnology.job_id).limit(1)).first() is not None:
+        return
+    with Session(bind=conn) as session:
+        print(f"  ✅ {backfill_term_links(session)} offres associées")
+        session.flush()
+
+
+@migration
+def job_search_index(conn):
+    """Recherche plein texte : index FULLTEXT (MySQL) ou index inversé job_search_terms (mode embarqué)"""
+    if uses_fulltext(conn.dialect.name):
+        _ensure_index(conn, Job, FULLTEXT_INDEX)
+        return
+    if conn.execute(select(JobSearchTerm.job_id).limit(1)).first() is not None:
+        return
+    with Session(bind=conn) as session:
+        print(f"  ✅ {backfill_search_index(session)} offres indexées")
+        session.flush()
+
+
+@migration
+def jobs_keyset_index(conn):
+    """jobs(date_posted, id) : index composite de la pagination par curseur"""
+    _ensure_index(conn, Job, 'ix_jobs_date_posted_id')
+
+
+@migration
+def job_dimension_rollup(conn):
+    """job_dimension_counts : offres par ville / entreprise / source (rempli une fois, puis maintenu à l'ingestion)"""
+    if conn.execute(select(JobDimensionCount.dimension).limit(1)).first() is not None:
+        return
+    print(f"  ✅ {rebuild_dimension_counts(conn)} lignes (dimension, valeur) calculées")
+
+
+@migration
+def job_summary(conn):
+    """stats_summary / job_ingest_buckets : indicateurs globaux maintenus à l'ingestion"""
+    if conn.execute(select(StatsSummary.name).limit(1)).first() is not None:
+        return
+    print(f"  ✅ résumé calculé sur {rebuild_job_summary(conn)} offres")
+
+
+@migration
+def tech_daily_rollup(conn):
+    """tech_daily_counts : cube journalier (technologie, source, ville) de /stats/history/evolution"""
+    if conn.execute(select(TechDailyCount.day).limit(1)).first() is not None:
+        return
+    print(f"  ✅ {rebuild_tech_daily(conn)} lignes (technologie, source, ville, jour) calculées")
+
+
+@migration
+def job_extraction_source(conn):
+    """jobs.extracted_by : offres dont technologies / compétences viennent de l'import AI (ignorées par reextract.py)"""
+    _add_column(conn, Job, 'extracted_by')
+
+
+@migration
+def lsh_bands(conn):
+    """job_lsh_buckets : clés recalculées si le découpage LSH (near_dup.BANDS × ROWS) a changé"""
+    with Session(bind=conn) as session:
+        if not buckets_stale(session):
+            return
+        print(f"  ✅ {rebuild_buckets(session)} représentants réindexés ({BANDS} bandes × {ROWS} lignes)")
+        session.flush()
+
+
+def run_migrations(engine):
+    Base.metadata.create_all(engine)
+    for step in MIGRATIONS:
+        print(f"🔧 {step.__name__}: {step.__doc__}")
+        with engine.begin() as conn:
+            step(conn)
+
+
+if __name__ == '__main__':
+    from database import get_engine
+
+    run_migrations(get_engine())
+    print("✅ Migrations terminées")
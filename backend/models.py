@@ -1,25 +1,50 @@
-from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+
+from sqlalchemy import (
+    Column, Integer, BigInteger, SmallInteger, String, Text, Boolean, Date, DateTime,
+    Float, LargeBinary, ForeignKey, Index,
+)
 from sqlalchemy.dialects.mysql import JSON
+from sqlalchemy.orm import declarative_base
+
+# Base déclarative SQLAlchemy simple : les scrapers et scripts importent les modèles
+# sans charger Flask. L'application les rattache à Flask-SQLAlchemy (extensions.py).
+Base = declarative_base()
 
-db = SQLAlchemy()
+# Job.extracted_by des offres importées par import_ai_data.py (technologies / compétences extraites par l'AI)
+EXTRACTED_BY_AI = 'ai'
 
-class Job(db.Model):
+class Job(Base):
     __tablename__ = 'jobs'
     
-    id = db.Column(db.Integer, primary_key=True)
-    title = db.Column(db.String(255), nullable=False)
-    company = db.Column(db.String(255))
-    location = db.Column(db.String(255), index=True)
-    skills = db.Column(JSON)  # Utilise JSON natif MySQL
-    technologies = db.Column(JSON)
-    description_text = db.Column(db.Text)
-    salary = db.Column(db.String(100))
-    date_posted = db.Column(db.DateTime, index=True)
-    source_site = db.Column(db.String(100))
-    url_offre = db.Column(db.String(500), unique=True, nullable=False)
-    date_scraped = db.Column(db.DateTime, default=datetime.utcnow)
-    is_new = db.Column(db.Boolean, default=True)
+    id = Column(Integer, primary_key=True)
+    title = Column(String(255), nullable=False)
+    company = Column(String(255))
+    location = Column(String(255), index=True)
+    # Ville canonique du libellé location (voir cities.py), NULL si aucune ville reconnue
+    city_id = Column(Integer, ForeignKey('cities.id', name='fk_jobs_city_id'))
+    skills = Column(JSON)  # Utilise JSON natif MySQL
+    technologies = Column(JSON)
+    description_text = Column(Text)
+    salary = Column(String(100))
+    date_posted = Column(DateTime, index=True)
+    source_site = Column(String(100))
+    url_offre = Column(String(500), unique=True, nullable=False)
+    date_scraped = Column(DateTime, default=datetime.utcnow)
+    is_new = Column(Boolean, default=True)
+    # Cluster de quasi-doublons (même offre publiée sur plusieurs sites) : id du représentant
+    cluster_id = Column(Integer, index=True)
+    # Origine de technologies / skills : NULL = matcher (scraper/matcher.py), EXTRACTED_BY_AI = import AI
+    extracted_by = Column(String(20))
+
+    __table_args__ = (
+        # Pagination par curseur de /api/jobs : ORDER BY date_posted DESC, id DESC
+        Index('ix_jobs_date_posted_id', 'date_posted', 'id'),
+        # Filtre par ville (égalité) avec le même ordre de pagination ; sert aussi la clé étrangère
+        Index('ix_jobs_city_date_posted_id', 'city_id', 'date_posted', 'id'),
+        # Recherche plein texte (search.py) : index FULLTEXT sur MySQL uniquement
+        Index('ft_jobs_search', 'title', 'company', 'description_text', mysql_prefix='FULLTEXT').ddl_if(dialect='mysql'),
+    )
 
     def to_dict(self):
         return {
@@ -32,32 +57,220 @@ class Job(db.Model):
             'date_posted': self.date_posted.isoformat() if self.date_posted else None,
             'source_site': self.source_site,
             'url_offre': self.url_offre,
-            'salaire': self.salary
+            'salaire': self.salary,
+            'cluster_id': self.cluster_id
         }
 
-class ScrapingLog(db.Model):
+class City(Base):
+    """Dictionnaire des villes (gazetteer hors ligne de cities.py)"""
+    __tablename__ = 'cities'
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), unique=True, nullable=False)
+    region = Column(String(100), index=True)
+    latitude = Column(Float)
+    longitude = Column(Float)
+
+class ScrapingLog(Base):
     __tablename__ = 'scraping_logs'
     
-    id = db.Column(db.Integer, primary_key=True)
-    start_time = db.Column(db.DateTime, default=datetime.utcnow)
-    end_time = db.Column(db.DateTime)
-    jobs_found = db.Column(db.Integer, default=0)
-    jobs_added = db.Column(db.Integer, default=0)
-    status = db.Column(db.String(50), default='running') # running, success, failed
-    error_message = db.Column(db.Text)
-
-class TechnologyStat(db.Model):
+    id = Column(Integer, primary_key=True)
+    start_time = Column(DateTime, default=datetime.utcnow)
+    end_time = Column(DateTime)
+    jobs_found = Column(Integer, default=0)
+    jobs_added = Column(Integer, default=0)
+    status = Column(String(50), default='running') # running, success, failed
+    error_message = Column(Text)
+
+class ScrapeRun(Base):
+    """Run de scraping demandé par l'API, le scheduler ou la ligne de commande (voir scrape_runs.py)"""
+    __tablename__ = 'scrape_runs'
+
+    id = Column(String(32), primary_key=True)  # run_id retourné à l'appelant
+    kind = Column(String(20), nullable=False)  # 'standard' | 'enhanced'
+    trigger = Column(String(20))  # api, scheduler, startup, cli
+    status = Column(String(20), default='queued', nullable=False)  # queued, running, success, failed
+    requested_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)
+    jobs_added = Column(Integer, default=0)
+    progress = Column(JSON)  # {site: {status, pages, found, added, elapsed}}
+    error = Column(Text)
+
+    __table_args__ = (Index('ix_scrape_runs_kind_requested', 'kind', 'requested_at'),)
+
+class ScrapeRunSlot(Base):
+    """Verrou d'un type de scraper : run_id du run actif, libéré en fin de run ou sans heartbeat"""
+    __tablename__ = 'scrape_run_slots'
+
+    kind = Column(String(20), primary_key=True)
+    run_id = Column(String(32))
+    heartbeat_at = Column(DateTime)
+
+class TechnologyStat(Base):
     __tablename__ = 'technologies_stats'
     
-    id = db.Column(db.Integer, primary_key=True)
-    technology = db.Column(db.String(100), index=True)
-    count = db.Column(db.Integer, default=0)
-    last_updated = db.Column(db.DateTime, default=datetime.utcnow)
+    id = Column(Integer, primary_key=True)
+    technology = Column(String(100), unique=True, index=True)
+    count = Column(Integer, default=0)
+    last_updated = Column(DateTime, default=datetime.utcnow)
 
-class CompetenceStat(db.Model):
+class CompetenceStat(Base):
     __tablename__ = 'competences_stats'
     
-    id = db.Column(db.Integer, primary_key=True)
-    competence = db.Column(db.String(100), index=True)
-    count = db.Column(db.Integer, default=0)
-    last_updated = db.Column(db.DateTime, default=datetime.utcnow)
+    id = Column(Integer, primary_key=True)
+    competence = Column(String(100), unique=True, index=True)
+    count = Column(Integer, default=0)
+    last_updated = Column(DateTime, default=datetime.utcnow)
+
+class Technology(Base):
+    """Dictionnaire des technologies (clé des tables d'association)"""
+    __tablename__ = 'technologies'
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), unique=True, nullable=False)
+
+class Skill(Base):
+    """Dictionnaire des compétences"""
+    __tablename__ = 'skills'
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), unique=True, nullable=False)
+
+class JobTechnology(Base):
+    """Association offre <-> technologie (filtres et comptes par jointure indexée, voir job_terms.py)"""
+    __tablename__ = 'job_technologies'
+
+    job_id = Column(Integer, ForeignKey('jobs.id', ondelete='CASCADE'), primary_key=True, autoincrement=False)
+    technology_id = Column(Integer, ForeignKey('technologies.id'), primary_key=True, autoincrement=False)
+
+    # La clé primaire sert les lectures par offre, cet index les filtres par technologie
+    __table_args__ = (Index('ix_job_technologies_technology_job', 'technology_id', 'job_id'),)
+
+class JobSkill(Base):
+    """Association offre <-> compétence"""
+    __tablename__ = 'job_skills'
+
+    job_id = Column(Integer, ForeignKey('jobs.id', ondelete='CASCADE'), primary_key=True, autoincrement=False)
+    skill_id = Column(Integer, ForeignKey('skills.id'), primary_key=True, autoincrement=False)
+
+    __table_args__ = (Index('ix_job_skills_skill_job', 'skill_id', 'job_id'),)
+
+class JobSearchTerm(Base):
+    """Index inversé de la recherche plein texte en mode embarqué (SQLite) ; MySQL utilise un index FULLTEXT"""
+    __tablename__ = 'job_search_terms'
+
+    term = Column(String(64), primary_key=True)
+    job_id = Column(Integer, ForeignKey('jobs.id', ondelete='CASCADE'), primary_key=True, autoincrement=False)
+    weight = Column(SmallInteger, nullable=False)  # occurrences pondérées (titre > entreprise > description)
+
+    # SQLite : table rangée par (term, job_id), les listes de postings se lisent séquentiellement avec le poids
+    __table_args__ = {'sqlite_with_rowid': False}
+
+class TechMonthlyCount(Base):
+    """Rollup mensuel des technologies (offres uniques), maintenu à l'ingestion (voir rollups.py)"""
+    __tablename__ = 'tech_monthly_counts'
+
+    month = Column(String(7), primary_key=True)  # 'YYYY-MM'
+    technology = Column(String(100), primary_key=True)
+    count = Column(Integer, default=0, nullable=False)
+
+class TechDailyCount(Base):
+    """Cube journalier des technologies (offres uniques) par source et ville, maintenu à l'ingestion (voir rollups.py)"""
+    __tablename__ = 'tech_daily_counts'
+
+    # Ordre de la clé : une plage (technologie, source, ville) contiguë sur les jours
+    technology = Column(String(100), primary_key=True)
+    source_site = Column(String(100), primary_key=True)  # '*' : toutes sources
+    city_id = Column(Integer, primary_key=True, autoincrement=False)  # 0 : toutes villes
+    day = Column(Date, primary_key=True)
+    # Périodes du jour (lundi de la semaine ISO, 1er du mois) : GROUP BY sur une colonne, portable.
+    # Dérivées de day, elles sont dans la clé pour que les upserts groupés (bulk.upsert_counts) les écrivent.
+    week = Column(Date, primary_key=True)
+    month = Column(Date, primary_key=True)
+    count = Column(Integer, default=0, nullable=False)
+
+    # SQLite : table rangée par la clé (les lectures d'une plage n'ont pas de second accès)
+    __table_args__ = {'sqlite_with_rowid': False}
+
+class JobDimensionCount(Base):
+    """Nombre d'offres par ville / entreprise / source, maintenu à l'ingestion (voir rollups.py)"""
+    __tablename__ = 'job_dimension_counts'
+
+    dimension = Column(String(20), primary_key=True)  # 'location' | 'company' | 'source_site' | 'city_id'
+    value = Column(String(255), primary_key=True)  # '' pour une valeur absente
+    count = Column(Integer, default=0, nullable=False)
+    unique_count = Column(Integer, default=0, nullable=False)  # représentants de cluster seulement
+
+class StatsSummary(Base):
+    """Indicateurs globaux (/stats/global), maintenus à l'ingestion (voir rollups.py)"""
+    __tablename__ = 'stats_summary'
+
+    name = Column(String(50), primary_key=True)
+    total_jobs = Column(Integer, default=0, nullable=False)
+    unique_jobs = Column(Integer, default=0, nullable=False)  # représentants de cluster
+    total_companies = Column(Integer, default=0, nullable=False)
+    last_update = Column(DateTime)  # date_scraped la plus récente
+
+class JobIngestBucket(Base):
+    """Offres ajoutées par heure de scraping (fenêtre glissante des dernières 24h)"""
+    __tablename__ = 'job_ingest_buckets'
+
+    hour = Column(DateTime, primary_key=True)  # tronquée à l'heure
+    count = Column(Integer, default=0, nullable=False)
+    unique_count = Column(Integer, default=0, nullable=False)
+
+class DataVersion(Base):
+    """Version des données, incrémentée à chaque ajout d'offres (invalidation des caches, voir data_version.py)"""
+    __tablename__ = 'data_versions'
+
+    name = Column(String(50), primary_key=True)
+    version = Column(BigInteger, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class JobSignature(Base):
+    """Signature MinHash des représentants de cluster (voir scraper/near_dup.py)"""
+    __tablename__ = 'job_signatures'
+
+    job_id = Column(Integer, ForeignKey('jobs.id', ondelete='CASCADE'), primary_key=True, autoincrement=False)
+    signature = Column(LargeBinary(256), nullable=False)
+
+class JobLshBucket(Base):
+    """Buckets LSH : (clé de bande, représentant), la clé primaire sert d'index de recherche"""
+    __tablename__ = 'job_lsh_buckets'
+
+    bucket_key = Column(BigInteger, primary_key=True, autoincrement=False)
+    job_id = Column(Integer, ForeignKey('jobs.id', ondelete='CASCADE'), primary_key=True, autoincrement=False)
+
+class NotificationOutbox(Base):
+    """Outbox des notifications de nouvelles offres, écrite dans la même transaction que les offres"""
+    __tablename__ = 'notification_outbox'
+
+    id = Column(Integer, primary_key=True)
+    job_id = Column(Integer, index=True)
+    payload = Column(JSON, nullable=False)
+    status = Column(String(20), default='pending', nullable=False)  # pending, sending (lot réservé), sent, failed
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime)
+
+    __table_args__ = (Index('ix_notification_outbox_due', 'status', 'next_attempt_at'),)
+
+class LiveEvent(Base):
+    """Nouvelles offres et deltas de stats d'un lot commité, diffusés en SSE par le serveur (voir live_events.py)"""
+    __tablename__ = 'live_events'
+
+    id = Column(Integer, primary_key=True)
+    payload = Column(JSON, nullable=False)  # {'jobs': [...], 'stats': {...}}
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class SchedulerLease(Base):
+    """Bail du process qui exécute le scheduler (élection SCHEDULER_LOCK=db, voir leader.py)"""
+    __tablename__ = 'scheduler_leases'
+
+    name = Column(String(50), primary_key=True)
+    owner = Column(String(100))  # hôte:pid:jeton du détenteur, NULL si libre
+    expires_at = Column(DateTime)
@@ -0,0 +1,225 @@
+"""
+Notifications des nouvelles offres par webhook.
+
+Le pipeline n'envoie rien lui-même : il écrit les événements dans la table
+``notification_outbox`` dans la même transaction que les offres (rien n'est
+perdu si un process redémarre). Un NotificationDispatcher, dans un thread en
+arrière-plan, regroupe les événements dus et les POST par lots au webhook,
+avec retries et backoff exponentiel.
+
+Un lot est réservé dans une transaction courte (status 'sending' jusqu'à la fin
+d'un bail), envoyé hors transaction, puis marqué envoyé ou en échec dans une
+seconde transaction courte : ni verrou ni connexion ne sont tenus pendant
+l'aller-retour HTTP. Un lot resté 'sending' au-delà du bail (process mort en
+cours d'envoi) redevient dû : la livraison est « au moins une fois ».
+
+Échecs : un lot refusé par le webhook (4xx) est coupé en deux jusqu'à isoler
+les événements en cause, seuls ceux-ci sont comptés en échec. Une erreur
+réseau ou serveur (5xx, timeout) vaut pour tout le lot : chaque événement
+compte une tentative, avec son propre backoff et son propre plafond.
+"""
+import time
+import random
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update, bindparam
+
+from config import Config
+from models import NotificationOutbox
+
+
+def job_payload(job_id, row):
+    """Résumé d'une offre envoyé au webhook"""
+    date_posted = row.get('date_posted')
+    return {
+        'id': job_id,
+        'title': row.get('title'),
+        'company': row.get('company'),
+        'location': row.get('location'),
+        'source_site': row.get('source_site'),
+        'url_offre': row.get('url_offre'),
+        'technologies': row.get('technologies') or [],
+        'date_posted': date_posted.isoformat() if date_posted else None,
+    }
+
+
+def enqueue(session, jobs):
+    """Ajoute les événements [(job_id, row), ...] à l'outbox (sans effet si aucun webhook n'est configuré)"""
+    if not Config.NOTIFY_WEBHOOK_URL or not jobs:
+        return 0
+    now = datetime.utcnow()
+    session.execute(NotificationOutbox.__table__.insert(), [
+        {'job_id': job_id, 'payload': job_payload(job_id, row), 'status': 'pending',
+         'attempts': 0, 'next_attempt_at': now, 'created_at': now}
+        for job_id, row in jobs
+    ])
+    return len(jobs)
+
+
+class NotificationDispatcher:
+    def __init__(self, session_factory, webhook_url=None, batch_size=None, max_attempts=None,
+                 poll_interval=None, base_delay=2.0, max_delay=600.0, timeout=10.0, lease=120.0):
+        self.session_factory = session_factory
+        self.webhook_url = webhook_url or Config.NOTIFY_WEBHOOK_URL
+        self.batch_size = batch_size or Config.NOTIFY_BATCH_SIZE
+        self.max_attempts = max_attempts or Config.NOTIFY_MAX_ATTEMPTS
+        self.poll_interval = poll_interval if poll_interval is not None else Config.NOTIFY_POLL_INTERVAL
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        # Durée de réservation d'un lot en cours d'envoi (largement au-delà du timeout HTTP)
+        self.lease = lease
+        # import tardif : requests n'est chargé que si un webhook est configuré (démarrage du scraping)
+        import requests
+        self._requests = requests
+        self.http = requests.Session()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.sent = 0
+        self.failed_batches = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='notification-dispatcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def wake(self):
+        """Signale de nouveaux événements (sinon ils sont pris au prochain poll)"""
+        self._wake.set()
+
+    def stop(self, timeout=30, drain=True):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if drain:
+            # Dernier envoi de ce qui est dû ; les échecs restent dans l'outbox pour plus tard
+            self.drain(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                # On enchaîne les lots tant qu'il reste des événements dus
+                while self.dispatch_once() and not self._stop.is_set():
+                    pass
+            except Exception as e:
+                print(f"⚠️ Dispatcher notifications: {e}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def _backoff(self, attempts):
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    def dispatch_once(self):
+        """Envoie un lot d'événements dus. Retourne le nombre d'événements envoyés."""
+        events = self._claim()
+        if not events:
+            return 0
+        sent, failed = self._send(events)
+        self._record(sent, failed)
+        return len(sent)
+
+    def _claim(self):
+        """Réserve un lot dû (transaction courte) : status 'sending' jusqu'à la fin du bail"""
+        now = datetime.utcnow()
+        table = NotificationOutbox.__table__
+        session = self.session_factory()
+        try:
+            events = session.execute(
+                select(NotificationOutbox.id, NotificationOutbox.payload, NotificationOutbox.attempts)
+                .where(NotificationOutbox.status.in_(('pending', 'sending')), NotificationOutbox.next_attempt_at <= now)
+                .order_by(NotificationOutbox.id)
+                .limit(self.batch_size)
+                # Plusieurs dispatchers (plusieurs process) ne prennent jamais le même lot
+                .with_for_update(skip_locked=True)
+            ).all()
+            if events:
+                session.execute(update(table).where(table.c.id.in_([e.id for e in events])).values(
+                    status='sending', next_attempt_at=now + timedelta(seconds=self.lease)
+                ))
+            session.commit()
+            return events
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def _post(self, events):
+        """(erreur ou None, True si le webhook a refusé le contenu du lot)"""
+        try:
+            response = self.http.post(
+                self.webhook_url,
+                json={'event': 'new_jobs', 'count': len(events), 'jobs': [e.payload for e in events]},
+                timeout=self.timeout,
+            )
+        except self._requests.RequestException as e:
+            return str(e), False
+        if response.status_code < 300:
+            return None, False
+        return f"HTTP {response.status_code}", 400 <= response.status_code < 500 and response.status_code not in (408, 429)
+
+    def _send(self, events):
+        """POST hors transaction. Retourne (événements envoyés, [(événement, erreur)])"""
+        error, rejected = self._post(events)
+        if error is None:
+            return list(events), []
+        if rejected and len(events) > 1:
+            # Lot refusé : dichotomie pour n'imputer l'échec qu'aux événements en cause
+            middle = len(events) // 2
+            sent_a, failed_a = self._send(events[:middle])
+            sent_b, failed_b = self._send(events[middle:])
+            return sent_a + sent_b, failed_a + failed_b
+        self.failed_batches += 1
+        return [], [(e, error) for e in events]
+
+    def _record(self, sent, failed):
+        """Résultat de l'envoi (transaction courte) : envoyés, ou replanifiés / abandonnés un par un"""
+        now = datetime.utcnow()
+        table = NotificationOutbox.__table__
+        session = self.session_factory()
+        try:
+            if sent:
+                session.execute(update(table).where(table.c.id.in_([e.id for e in sent])).values(
+                    status='sent', sent_at=now, attempts=table.c.attempts + 1, last_error=None
+                ))
+            if failed:
+                # Un tirage de backoff par nombre de tentatives : un lot en échec redevient dû d'un bloc
+                retry_at = {n: now + timedelta(seconds=self._backoff(n)) for n in {e.attempts + 1 for e, _ in failed}}
+                # Abandon définitif d'un événement après max_attempts tentatives
+                session.execute(
+                    update(table).where(table.c.id == bindparam('event_id')).values(
+                        status=bindparam('new_status'), attempts=bindparam('new_attempts'),
+                        last_error=bindparam('error'), next_attempt_at=bindparam('retry_at'),
+                    ),
+                    [{
+                        'event_id': e.id,
+                        'new_status': 'failed' if e.attempts + 1 >= self.max_attempts else 'pending',
+                        'new_attempts': e.attempts + 1,
+                        'error': error,
+                        'retry_at': retry_at[e.attempts + 1],
+                    } for e, error in failed],
+                )
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        self.sent += len(sent)
+
+    def drain(self, timeout=60):
+        """Envoie tout ce qui est dû maintenant (fin de run, tests). Retourne le nombre envoyé."""
+        deadline = time.monotonic() + timeout
+        total = 0
+        while time.monotonic() < deadline:
+            n = self.dispatch_once()
+            if not n:
+                break
+            total += n
+        return total
@@ -0,0 +1,373 @@
+"""
+Tables d'agrégats pré-calculés lues par les endpoints /stats/*.
+
+tech_monthly_counts(month, technology, count) compte les offres uniques
+(représentants de cluster) par mois de publication et par technologie. Il est
+incrémenté à l'ingestion (pipeline, import AI) dans la même transaction que
+les offres : les endpoints lisent quelques centaines de lignes au lieu de
+charger toute la table jobs.
+
+tech_daily_counts(technology, source_site, city_id, day, week, month, count)
+est le même comptage par jour, décliné par source et par ville (lignes "toutes
+sources" / "toutes villes" comprises), avec la semaine et le mois du jour
+pré-calculés : /stats/history/evolution lit, pour n'importe quels filtres et
+dates, une plage de la clé primaire regroupée sur la colonne de la granularité
+demandée (aucune fonction de date propre au dialecte).
+
+job_dimension_counts(dimension, value, count, unique_count) compte les offres
+par libellé de ville, ville canonique (city_id, voir cities.py), entreprise et
+source (toutes / représentants de cluster) : les classements du dashboard sont
+des lectures de quelques lignes.
+
+stats_summary porte les indicateurs globaux (offres, offres uniques,
+entreprises, dernier scraping) et job_ingest_buckets les offres ajoutées par
+heure : /stats/global est une lecture par clé primaire (la ligne du résumé et
+les 24 dernières tranches horaires), quelle que soit la taille de jobs.
+
+Reconstruction complète (après un backfill des clusters par exemple): python rollups.py
+"""
+import sys
+import os
+from collections import Counter
+from datetime import datetime, date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import select, delete, update, func, case, or_, and_
+
+from bulk import insert_ignore, upsert_counts
+from models import Job, TechMonthlyCount, TechDailyCount, JobDimensionCount, StatsSummary, JobIngestBucket
+
+DIMENSIONS = ('location', 'company', 'source_site', 'city_id')
+SUMMARY = 'jobs'
+# Lignes "toutes sources" / "toutes villes" du cube journalier
+ALL_SOURCES = '*'
+ALL_CITIES = 0
+GRANULARITIES = ('day', 'week', 'month')
+# Tranches horaires conservées (seules les 24 dernières heures sont lues)
+BUCKET_RETENTION = timedelta(hours=48)
+
+
+def month_key(date):
+    return date.strftime('%Y-%m') if date else None
+
+
+def tech_month_counts(rows):
+    """Counter {(mois, technologie): n} pour des lignes {'date_posted', 'technologies'}"""
+    counts = Counter()
+    for row in rows:
+        month = month_key(row.get('date_posted'))
+        if month:
+            counts.update((month, tech.strip()) for tech in set(row.get('technologies') or ()))
+    return counts
+
+
+def update_tech_monthly(session, counts):
+    """Incrémente le rollup (un upsert agrégé pour tout le lot)"""
+    stmt = upsert_counts(TechMonthlyCount, ('month', 'technology'), counts, session.get_bind().dialect.name)
+    if stmt is not None:
+        session.execute(stmt)
+
+
+def replace_tech_monthly(session, counts):
+    """Remplace tout le contenu du rollup par `counts`"""
+    table = TechMonthlyCount.__table__
+    session.execute(delete(table))
+    if counts:
+        session.execute(table.insert(), [
+            {'month': month, 'technology': tech, 'count': n} for (month, tech), n in sorted(counts.items())
+        ])
+
+
+def rebuild_tech_monthly(session, yield_per=2000):
+    """Recalcule le rollup depuis jobs (seules les colonnes date_posted / technologies sont lues)"""
+    result = session.execute(
+        select(Job.date_posted, Job.technologies)
+        .where(Job.date_posted.isnot(None), func.coalesce(Job.cluster_id, Job.id) == Job.id)
+        .execution_options(yield_per=yield_per)
+    )
+    counts = tech_month_counts({'date_posted': d, 'technologies': t} for d, t in result)
+    replace_tech_monthly(session, counts)
+    return len(counts)
+
+
+def _day(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+def tech_daily_counts(rows):
+    """
+    Counter {(technologie, source, city_id, jour, semaine, mois): n} pour des lignes
+    {'date_posted', 'technologies', 'source_site', 'city_id'} : chaque technologie
+    compte dans les lignes toutes sources / toutes villes, par source, par ville et par (source, ville).
+    """
+    counts = Counter()
+    for row in rows:
+        day = _day(row.get('date_posted'))
+        if not day:
+            continue
+        week, month = period_start(day, 'week'), period_start(day, 'month')
+        source, city_id = row.get('source_site'), row.get('city_id')
+        keys = [(ALL_SOURCES, ALL_CITIES)]
+        if source:
+            keys.append((source, ALL_CITIES))
+        if city_id:
+            keys.append((ALL_SOURCES, city_id))
+            if source:
+                keys.append((source, city_id))
+        for tech in {t.strip() for t in row.get('technologies') or ()}:
+            counts.update((tech, s, c, day, week, month) for s, c in keys)
+    return counts
+
+
+def update_tech_daily(session, counts):
+    stmt = upsert_counts(
+        TechDailyCount, ('technology', 'source_site', 'city_id', 'day', 'week', 'month'), counts,
+        session.get_bind().dialect.name,
+    )
+    if stmt is not None:
+        session.execute(stmt)
+
+
+def replace_tech_daily(session, counts, chunk_size=5000):
+    """Remplace tout le contenu du cube journalier par `counts`"""
+    table = TechDailyCount.__table__
+    session.execute(delete(table))
+    rows = [
+        {'technology': tech, 'source_site': source, 'city_id': city_id, 'day': day, 'week': week, 'month': month, 'count': n}
+        for (tech, source, city_id, day, week, month), n in sorted(counts.items())
+    ]
+    for start in range(0, len(rows), chunk_size):
+        session.execute(table.insert(), rows[start:start + chunk_size])
+
+
+def rebuild_tech_daily(session, yield_per=2000):
+    """Recalcule le cube journalier depuis jobs (offres uniques datées)"""
+    result = session.execute(
+        select(Job.date_posted, Job.technologies, Job.source_site, Job.city_id)
+        .where(Job.date_posted.isnot(None), func.coalesce(Job.cluster_id, Job.id) == Job.id)
+        .execution_options(yield_per=yield_per)
+    )
+    counts = tech_daily_counts(
+        {'date_posted': d, 'technologies': t, 'source_site': s, 'city_id': c} for d, t, s, c in result
+    )
+    replace_tech_daily(session, counts)
+    return len(counts)
+
+
+def period_start(day, granularity):
+    """Premier jour de la période (semaine ISO : lundi) contenant `day`"""
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_period(start, granularity):
+    if granularity == 'week':
+        return start + timedelta(days=7)
+    if granularity == 'month':
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def period_label(start, granularity):
+    """'YYYY-MM' par mois (comme /stats/history/*), date ISO du premier jour sinon"""
+    return start.strftime('%Y-%m') if granularity == 'month' else start.isoformat()
+
+
+def periods(start, end, granularity):
+    """Débuts des périodes couvrant [start, end]"""
+    current = period_start(start, granularity)
+    while current <= end:
+        yield current
+        current = next_period(current, granularity)
+
+
+def read_tech_evolution(session, techs, start, end, granularity='month', source=None, city_id=None):
+    """
+    [(période, {technologie: n})] de `start` à `end` inclus, toutes les périodes (comptes nuls compris).
+    Une plage de clé primaire par technologie, regroupée sur la colonne day, week ou month.
+    Les périodes partielles (début de `start`, fin de `end`) ne comptent que les jours de la plage.
+    """
+    buckets = {period: dict.fromkeys(techs, 0) for period in periods(start, end, granularity)}
+    if techs:
+        period = getattr(TechDailyCount, granularity)
+        total = func.sum(TechDailyCount.count)
+        rows = session.execute(
+            select(period, TechDailyCount.technology, total).where(
+                TechDailyCount.technology.in_(techs),
+                TechDailyCount.source_site == (source or ALL_SOURCES),
+                TechDailyCount.city_id == (city_id or ALL_CITIES),
+                TechDailyCount.day >= start,
+                TechDailyCount.day <= end,
+            ).group_by(period, TechDailyCount.technology)
+        )
+        for first_day, tech, count in rows:
+            bucket = buckets[first_day]
+            bucket[tech] = bucket.get(tech, 0) + int(count)
+    return [(period_label(period, granularity), counts) for period, counts in buckets.items()]
+
+
+def dimension_value(value):
+    """Valeur du rollup : texte, '' pour une valeur absente (city_id est stocké en texte)"""
+    return '' if value is None else str(value)
+
+
+def dimension_counts(rows):
+    """Counter {(dimension, valeur): n} pour des lignes {'location', 'company', 'source_site', 'city_id'}"""
+    return Counter((dim, dimension_value(row.get(dim))) for row in rows for dim in DIMENSIONS)
+
+
+def update_dimension_counts(session, rows, unique_rows):
+    """
+    Incrémente job_dimension_counts : `rows` toutes les offres insérées, `unique_rows` les représentants.
+    Retourne le nombre d'entreprises jusque-là absentes du rollup (pour stats_summary).
+    """
+    dialect = session.get_bind().dialect.name
+    counts = dimension_counts(rows)
+    companies = sorted(value for dim, value in counts if dim == 'company' and value)
+    new_companies = 0
+    if companies:
+        # Lignes des entreprises créées à zéro par INSERT IGNORE : seules celles réellement
+        # insérées comptent, la clé primaire tranche entre writers concurrents
+        result = session.execute(insert_ignore(JobDimensionCount, dialect).values([
+            {'dimension': 'company', 'value': company, 'count': 0, 'unique_count': 0} for company in companies
+        ]))
+        new_companies = max(result.rowcount or 0, 0)
+    for column, items in (('count', counts), ('unique_count', dimension_counts(unique_rows))):
+        stmt = upsert_counts(JobDimensionCount, ('dimension', 'value'), items, dialect, column=column)
+        if stmt is not None:
+            session.execute(stmt)
+    return new_companies
+
+
+def rebuild_dimension_counts(session):
+    """Recalcule job_dimension_counts depuis jobs (un GROUP BY par dimension)"""
+    representative = func.coalesce(Job.cluster_id, Job.id) == Job.id
+    rows = []
+    for dim in DIMENSIONS:
+        column = getattr(Job, dim)
+        counts = {}
+        for value, count, unique_count in session.execute(
+            select(column, func.count(Job.id), func.sum(case((representative, 1), else_=0))).group_by(column)
+        ):
+            # NULL et '' se confondent dans le rollup
+            value = dimension_value(value)
+            total, unique = counts.get(value, (0, 0))
+            counts[value] = (total + count, unique + (unique_count or 0))
+        rows.extend(
+            {'dimension': dim, 'value': value, 'count': total, 'unique_count': unique}
+            for value, (total, unique) in counts.items()
+        )
+    table = JobDimensionCount.__table__
+    session.execute(delete(table))
+    if rows:
+        session.execute(table.insert(), rows)
+    return len(rows)
+
+
+def hour_key(date):
+    return date.replace(minute=0, second=0, microsecond=0)
+
+
+def update_job_summary(session, rows, unique_rows, new_companies=0):
+    """
+    Incrémente stats_summary et les tranches horaires pour des offres insérées
+    ({'date_scraped', ...} ; sans date_scraped : maintenant, comme le défaut de la colonne).
+    """
+    if not rows:
+        return
+    now = datetime.utcnow()
+    dialect = session.get_bind().dialect.name
+    for column, items in (('count', rows), ('unique_count', unique_rows)):
+        stmt = upsert_counts(
+            JobIngestBucket, 'hour', Counter(hour_key(r.get('date_scraped') or now) for r in items), dialect, column=column
+        )
+        if stmt is not None:
+            session.execute(stmt)
+    session.execute(delete(JobIngestBucket.__table__).where(JobIngestBucket.hour < hour_key(now) - BUCKET_RETENTION))
+
+    table = StatsSummary.__table__
+    latest = max(r.get('date_scraped') or now for r in rows)
+    session.execute(insert_ignore(StatsSummary, dialect).values(name=SUMMARY, total_jobs=0, unique_jobs=0, total_companies=0))
+    # Incréments relatifs : pas de mise à jour perdue entre writers concurrents
+    session.execute(update(table).where(table.c.name == SUMMARY).values(
+        total_jobs=table.c.total_jobs + len(rows),
+        unique_jobs=table.c.unique_jobs + len(unique_rows),
+        total_companies=table.c.total_companies + new_companies,
+        last_update=case(
+            (or_(table.c.last_update.is_(None), table.c.last_update < latest), latest), else_=table.c.last_update
+        ),
+    ))
+
+
+def read_job_summary(session, unique=False):
+    """Indicateurs de /stats/global : une requête (ligne du résumé + 24 dernières tranches horaires)"""
+    bucket = JobIngestBucket.unique_count if unique else JobIngestBucket.count
+    since = hour_key(datetime.utcnow()) - timedelta(hours=23)
+    recent = select(func.coalesce(func.sum(bucket), 0)).where(JobIngestBucket.hour >= since).scalar_subquery()
+    row = session.execute(
+        select(StatsSummary.total_jobs, StatsSummary.unique_jobs, StatsSummary.total_companies,
+               StatsSummary.last_update, recent)
+        .where(StatsSummary.name == SUMMARY)
+    ).first()
+    if row is None:
+        return {'total_jobs': 0, 'total_companies': 0, 'last_update': None, 'new_jobs_24h': 0}
+    total, unique_total, companies, last_update, new_jobs = row
+    return {
+        'total_jobs': unique_total if unique else total,
+        'total_companies': companies,
+        'last_update': last_update,
+        'new_jobs_24h': new_jobs,
+    }
+
+
+def rebuild_job_summary(session):
+    """Recalcule stats_summary et les tranches horaires récentes depuis jobs"""
+    representative = func.coalesce(Job.cluster_id, Job.id) == Job.id
+    total, unique_total, latest = session.execute(
+        select(func.count(Job.id), func.sum(case((representative, 1), else_=0)), func.max(Job.date_scraped))
+    ).one()
+    companies = session.execute(
+        select(func.count(func.distinct(Job.company))).where(and_(Job.company.isnot(None), Job.company != ''))
+    ).scalar()
+    since = hour_key(datetime.utcnow()) - BUCKET_RETENTION
+    buckets = {}
+    for scraped, is_representative in session.execute(
+        select(Job.date_scraped, representative).where(Job.date_scraped >= since)
+    ):
+        count, unique_count = buckets.get(hour_key(scraped), (0, 0))
+        buckets[hour_key(scraped)] = (count + 1, unique_count + bool(is_representative))
+
+    session.execute(delete(JobIngestBucket.__table__))
+    if buckets:
+        session.execute(JobIngestBucket.__table__.insert(), [
+            {'hour': hour, 'count': count, 'unique_count': unique_count}
+            for hour, (count, unique_count) in sorted(buckets.items())
+        ])
+    session.execute(delete(StatsSummary.__table__).where(StatsSummary.name == SUMMARY))
+    session.execute(StatsSummary.__table__.insert().values(
+        name=SUMMARY, total_jobs=total, unique_jobs=unique_total or 0, total_companies=companies, last_update=latest
+    ))
+    return total
+
+
+if __name__ == '__main__':
+    from database import session_scope, init_db
+    from data_version import bump_data_version
+
+    init_db()
+    with session_scope() as session:
+        print("📅 Reconstruction de tech_monthly_counts...")
+        n = rebuild_tech_monthly(session)
+        print("📆 Reconstruction de tech_daily_counts...")
+        j = rebuild_tech_daily(session)
+        print("🏙️ Reconstruction de job_dimension_counts...")
+        d = rebuild_dimension_counts(session)
+        print("📊 Reconstruction de stats_summary...")
+        t = rebuild_job_summary(session)
+        bump_data_version(session)
+    print(f"✅ {n} lignes (mois, technologie), {j} lignes (technologie, source, ville, jour), "
+          f"{d} lignes (dimension, valeur), {t} offres au résumé")
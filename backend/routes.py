@@ -1,30 +1,129 @@
-from flask import Blueprint, jsonify, request
-from sqlalchemy import func, desc
-from models import db, Job, TechnologyStat, CompetenceStat, ScrapingLog
+from flask import Blueprint, current_app, jsonify, request
+from sqlalchemy import func, desc, cast, String
+from extensions import db
+from models import Job, City, TechnologyStat, CompetenceStat, ScrapingLog, ScrapeRun, TechMonthlyCount, JobDimensionCount
+from job_terms import term_filter, term_counts
+from search import search_query
+from cities import city_filter, resolve_city
+from rollups import read_job_summary, read_tech_evolution, next_period, GRANULARITIES
+from stats_cache import cached_response
+import http_cache
 import datetime
+import threading
+import time
 
 api = Blueprint('api', __name__)
 
-@api.route('/jobs', methods=['GET'])
-def get_jobs():
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 20, type=int)
-    
-    # Filters
+# Réponses sans ETag de version : flux (export, SSE) et état du scraping (suit les logs, pas les offres)
+UNVERSIONED_ENDPOINTS = {'api.export_jobs', 'api.get_sync_status', 'api.stream_events'}
+
+@api.before_request
+def check_not_modified():
+    # If-None-Match sur la version courante des données : 304 sans exécuter la vue
+    if request.method in ('GET', 'HEAD') and request.endpoint not in UNVERSIONED_ENDPOINTS:
+        return http_cache.not_modified()
+
+@api.after_request
+def finalize_response(response):
+    return http_cache.finalize(response)
+
+def unique_requested():
+    """?unique=1 : compter les offres uniques (un cluster de quasi-doublons = une offre)"""
+    return request.args.get('unique', '').lower() in ('1', 'true', 'yes')
+
+def job_count(unique=False):
+    if unique:
+        return func.count(func.distinct(func.coalesce(Job.cluster_id, Job.id)))
+    return func.count(Job.id)
+
+def requested_terms(name):
+    """?tech=Python,Django (ou ?tech=Python&tech=Django) -> ['Python', 'Django']"""
+    return [t.strip() for value in request.args.getlist(name) for t in value.split(',') if t.strip()]
+
+def apply_job_filters(query):
+    """Filtres communs de la liste des offres (ville, entreprise, technologies, compétences)"""
     city = request.args.get('city')
     company = request.args.get('company')
-    tech = request.args.get('tech')
-    
-    query = Job.query
     
     if city:
-        query = query.filter(Job.location.ilike(f'%{city}%'))
+        # Ville canonique : égalité sur l'index (city_id, date_posted, id)
+        query = query.filter(city_filter(city))
     if company:
         query = query.filter(Job.company.ilike(f'%{company}%'))
-    if tech:
-        # Recherche dans le tableau JSON des technologies
-        # Utilise JSON_CONTAINS pour MySQL qui cherche une valeur exacte dans un tableau JSON
-        query = query.filter(Job.technologies.cast(db.String).ilike(f'%"{tech}"%'))
+    # Technologies / compétences : jointures indexées sur job_technologies / job_skills
+    # ?tech_mode=or : au moins une des technologies (par défaut : toutes)
+    for param, kind in (('tech', 'technologies'), ('skill', 'skills')):
+        names = requested_terms(param)
+        if names:
+            mode = 'or' if request.args.get(f'{param}_mode', 'and').lower() == 'or' else 'and'
+            query = query.filter(term_filter(kind, names, mode))
+    return query
+
+# Totaux de /jobs en mode curseur : un COUNT par jeu de filtres, gardé quelques instants
+TOTAL_CACHE_TTL = 60
+_total_cache = {}
+_total_cache_lock = threading.Lock()
+
+def cached_total(query):
+    key = request.query_string.decode()
+    key = '&'.join(sorted(p for p in key.split('&') if not p.startswith(('cursor=', 'per_page=', 'include_total='))))
+    now = time.monotonic()
+    with _total_cache_lock:
+        hit = _total_cache.get(key)
+        if hit and hit[0] > now:
+            return hit[1]
+    total = query.order_by(None).count()
+    with _total_cache_lock:
+        if len(_total_cache) >= 256:
+            _total_cache.clear()
+        _total_cache[key] = (now + TOTAL_CACHE_TTL, total)
+    return total
+
+def encode_cursor(job):
+    date = job.date_posted.isoformat() if job.date_posted else 'null'
+    return f'{date},{job.id}'
+
+def keyset_filter(cursor):
+    """Offres situées après `cursor` ('<date_posted ISO>,<id>') dans l'ordre date_posted DESC, id DESC"""
+    date_str, id_str = cursor.rsplit(',', 1)
+    last_id = int(id_str)
+    if date_str == 'null':
+        # Les offres sans date viennent en dernier
+        return db.and_(Job.date_posted.is_(None), Job.id < last_id)
+    date = datetime.datetime.fromisoformat(date_str)
+    return db.or_(
+        Job.date_posted < date,
+        db.and_(Job.date_posted == date, Job.id < last_id),
+        Job.date_posted.is_(None),
+    )
+
+@api.route('/jobs', methods=['GET'])
+def get_jobs():
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 20, type=int)
+    
+    query = apply_job_filters(Job.query)
+
+    # Mode curseur (?cursor= pour la première page, puis next_cursor) : index (date_posted, id),
+    # coût constant quelle que soit la profondeur, total optionnel (?include_total=1) et mis en cache
+    if 'cursor' in request.args:
+        cursor = request.args.get('cursor')
+        page_query = query
+        if cursor:
+            try:
+                page_query = page_query.filter(keyset_filter(cursor))
+            except ValueError:
+                return jsonify({'error': 'Curseur invalide'}), 400
+        jobs = page_query.order_by(Job.date_posted.desc(), Job.id.desc()).limit(per_page + 1).all()
+        has_more = len(jobs) > per_page
+        jobs = jobs[:per_page]
+        result = {
+            'jobs': [job.to_dict() for job in jobs],
+            'next_cursor': encode_cursor(jobs[-1]) if has_more else None,
+        }
+        if request.args.get('include_total', '').lower() in ('1', 'true', 'yes'):
+            result['total'] = cached_total(query)
+        return jsonify(result)
 
     pagination = query.order_by(Job.date_posted.desc()).paginate(page=page, per_page=per_page, error_out=False)
     
@@ -35,80 +134,170 @@ def get_jobs():
         'current_page': page
     })
 
+@api.route('/jobs/search', methods=['GET'])
+def search_jobs():
+    # Recherche plein texte (FULLTEXT sur MySQL, index inversé en local), combinable avec les filtres de /jobs
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({'error': "Paramètre 'q' requis"}), 400
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 20, type=int)
+    
+    query = search_query(db.session, apply_job_filters(Job.query), q)
+    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    
+    return jsonify({
+        'query': q,
+        'jobs': [dict(job.to_dict(), score=round(float(score), 3)) for job, score in pagination.items],
+        'total': pagination.total,
+        'pages': pagination.pages,
+        'current_page': page
+    })
+
+@api.route('/jobs/facets', methods=['GET'])
+def get_job_facets():
+    # Nombre d'offres par technologie / compétence pour les filtres courants
+    job_ids = None
+    if any(request.args.get(p) for p in ('city', 'company', 'tech', 'skill')):
+        job_ids = apply_job_filters(db.session.query(Job.id)).subquery().select()
+    return jsonify({
+        kind: [{'name': name, 'count': count} for name, count in db.session.execute(term_counts(kind, job_ids))]
+        for kind in ('technologies', 'skills')
+    })
+
 @api.route('/jobs/<int:id>', methods=['GET'])
 def get_job_detail(id):
     job = Job.query.get_or_404(id)
     return jsonify(job.to_dict())
 
 @api.route('/stats/technologies', methods=['GET'])
+@cached_response
 def get_tech_stats():
+    return jsonify(top_technologies())
+
+def top_technologies():
     # Top 50 technologies
     stats = TechnologyStat.query.order_by(TechnologyStat.count.desc()).limit(50).all()
-    return jsonify([{'name': s.technology, 'count': s.count} for s in stats])
+    return [{'name': s.technology, 'count': s.count} for s in stats]
 
 @api.route('/stats/competences', methods=['GET'])
+@cached_response
 def get_comp_stats():
+    return jsonify(top_competences())
+
+def top_competences():
     stats = CompetenceStat.query.order_by(CompetenceStat.count.desc()).limit(50).all()
-    return jsonify([{'name': s.competence, 'count': s.count} for s in stats])
+    return [{'name': s.competence, 'count': s.count} for s in stats]
+
+def dimension_ranking(dimension, exclude=(), limit=None):
+    """Classement [{'name', 'count'}] lu dans le rollup job_dimension_counts (quelques lignes)"""
+    count = JobDimensionCount.unique_count if unique_requested() else JobDimensionCount.count
+    query = db.session.query(JobDimensionCount.value, count)\
+        .filter(JobDimensionCount.dimension == dimension, count > 0)
+    if exclude:
+        query = query.filter(JobDimensionCount.value.notin_(exclude))
+    results = query.order_by(count.desc()).limit(limit).all()
+    # '' : offres sans valeur (NULL en base)
+    return [{'name': r[0] or None, 'count': r[1]} for r in results]
+
+def city_counts():
+    """Requête (ville, compte) : lignes city_id du rollup jointes à cities (quelques dizaines de lignes)"""
+    count = JobDimensionCount.unique_count if unique_requested() else JobDimensionCount.count
+    return db.session.query(City, count).join(JobDimensionCount, db.and_(
+        JobDimensionCount.dimension == 'city_id',
+        JobDimensionCount.value == cast(City.id, String),
+    )).filter(count > 0), count
+
+def city_ranking(limit=None):
+    """Classement des villes canoniques [{'name', 'count', 'region', 'latitude', 'longitude'}]"""
+    query, count = city_counts()
+    return [
+        {'name': city.name, 'count': n, 'region': city.region, 'latitude': city.latitude, 'longitude': city.longitude}
+        for city, n in query.order_by(count.desc()).limit(limit).all()
+    ]
+
+def region_ranking():
+    """Offres par région administrative (somme des villes)"""
+    query, count = city_counts()
+    total = func.sum(count)
+    rows = query.with_entities(City.region, total).group_by(City.region).order_by(total.desc()).all()
+    return [{'name': region, 'count': int(n)} for region, n in rows]
 
 @api.route('/stats/regions', methods=['GET'])
+@cached_response
 def get_region_stats():
-    # Aggregation on the fly or pre-calculated
-    # Exclure "Maroc" qui est trop générique
-    results = db.session.query(Job.location, func.count(Job.id))\
-        .filter(Job.location != 'Maroc')\
-        .group_by(Job.location)\
-        .order_by(func.count(Job.id).desc())\
-        .limit(20)\
-        .all()
-    return jsonify([{'name': r[0], 'count': r[1]} for r in results])
+    # Villes canoniques (les offres sans ville reconnue, "Maroc" par exemple, sont exclues)
+    # ?by=region : regroupement par région administrative
+    if request.args.get('by') == 'region':
+        return jsonify(region_ranking())
+    return jsonify(city_ranking(limit=20))
 
 @api.route('/stats/global', methods=['GET'])
+@cached_response
 def get_global_stats():
-    total_jobs = Job.query.count()
-    try:
-        total_companies = db.session.query(func.count(func.distinct(Job.company))).scalar()
-    except Exception:
-        total_companies = 0
-        
-    latest_update = db.session.query(func.max(Job.date_scraped)).scalar()
-    
-    # Calculer les nouveaux jobs dans les dernières 24h
-    twenty_four_hours_ago = datetime.datetime.utcnow() - datetime.timedelta(hours=24)
-    new_jobs_24h = Job.query.filter(Job.date_scraped >= twenty_four_hours_ago).count()
-    
-    return jsonify({
-        'total_jobs': total_jobs,
-        'total_companies': total_companies,
-        'last_update': latest_update.isoformat() if latest_update else None,
-        'new_jobs_24h': new_jobs_24h
-    })
+    return jsonify(global_stats())
+
+def global_stats():
+    # Résumé maintenu à l'ingestion (rollups.py) : une lecture par clé primaire
+    summary = read_job_summary(db.session, unique=unique_requested())
+    last_update = summary['last_update']
+    return dict(summary, last_update=last_update.isoformat() if last_update else None)
 
 @api.route('/stats/companies', methods=['GET'])
+@cached_response
 def get_company_stats():
     # Top 20 Companies
     # Exclude "Non spécifié" and "Anonyme" if possible, or handle on frontend
-    results = db.session.query(Job.company, func.count(Job.id)).filter(Job.company != 'Non spécifié').group_by(Job.company).order_by(func.count(Job.id).desc()).limit(20).all()
-    return jsonify([{'name': r[0], 'count': r[1]} for r in results])
+    return jsonify(dimension_ranking('company', exclude=('Non spécifié', ''), limit=20))
 
 @api.route('/stats/sources', methods=['GET'])
+@cached_response
 def get_source_stats():
     # Job distribution by source site
-    results = db.session.query(Job.source_site, func.count(Job.id)).group_by(Job.source_site).order_by(func.count(Job.id).desc()).all()
-    return jsonify([{'name': r[0], 'count': r[1]} for r in results])
+    return jsonify(dimension_ranking('source_site'))
+
+@api.route('/stats/bundle', methods=['GET'])
+@cached_response
+def get_stats_bundle():
+    # Tout le dashboard en une requête HTTP, lu dans les rollups et tables de stats :
+    # aucune agrégation sur jobs
+    return jsonify({
+        'global': global_stats(),
+        'technologies': top_technologies(),
+        'competences': top_competences(),
+        'regions': city_ranking(limit=20),
+        'companies': dimension_ranking('company', exclude=('Non spécifié', ''), limit=20),
+        'sources': dimension_ranking('source_site'),
+    })
+
+def snapshot_engine():
+    """Moteur du snapshot colonnaire à jour (analytics_snapshot.py), None s'il est absent ou en retard"""
+    store = current_app.extensions.get('analytics_snapshot')
+    if store is None:
+        return None
+    try:
+        return store.get(http_cache.current_data_version())
+    except Exception as e:
+        print(f"⚠️ Snapshot analytique illisible: {e}")
+        return None
 
 @api.route('/stats/history/jobs', methods=['GET'])
+@cached_response
 def get_jobs_history():
     # Jobs per month (Jan 2024+)
-    # MySQL: DATE_FORMAT(date_posted, '%Y-%m')
-    start_date = datetime.datetime(2024, 1, 1)
+    start_month = '2024-01'
+    unique = unique_requested()
     
-    # SQLite fallback syntax just in case (strftime), but user seems to use MySQL based on models.py
-    # Assuming MySQL based on `from sqlalchemy.dialects.mysql import JSON` in models.py
+    engine = snapshot_engine()
+    if engine is not None:
+        return jsonify([{'month': month, 'count': count} for month, count in engine.jobs_per_month(start_month, unique)])
     
+    # Repli SQL (snapshot pas encore construit pour cette version des données)
+    # MySQL: DATE_FORMAT(date_posted, '%Y-%m')
+    start_date = datetime.datetime(2024, 1, 1)
     results = db.session.query(
         func.date_format(Job.date_posted, '%Y-%m').label('month'),
-        func.count(Job.id)
+        job_count(unique)
     ).filter(Job.date_posted >= start_date)\
      .group_by('month')\
      .order_by('month')\
@@ -117,41 +306,39 @@ def get_jobs_history():
     return jsonify([{'month': r[0], 'count': r[1]} for r in results])
 
 @api.route('/stats/history/technologies', methods=['GET'])
+@cached_response
 def get_tech_history():
-    # Top technologies per month
-    # This is heavy. Let's simplify: Return global top 10 techs, broken down by month.
+    # Top technologies per month, lues dans le snapshot colonnaire s'il est à jour, sinon dans le
+    # rollup tech_monthly_counts (maintenu à l'ingestion) : mêmes comptes (offres uniques)
+    start_month = '2024-01'
     
-    start_date = datetime.datetime(2024, 1, 1)
-    
-    # 1. Get Top 10 Techs global
+    # 1. Top 50 technologies globales
     top_techs = db.session.query(TechnologyStat.technology)\
         .order_by(TechnologyStat.count.desc())\
         .limit(50)\
         .all()
     tech_names = [t[0] for t in top_techs]
+    if not tech_names:
+        return jsonify([])
     
-    # 2. For each month, count these techs
-    # Since technologies is a JSON array, we need to be careful.
-    # We'll fetch all jobs > Jan 2024 and process in Python (safer than complex JSON SQL queries for now)
-    
-    jobs = Job.query.filter(Job.date_posted >= start_date).all()
+    # 2. Comptes mensuels de ces technologies
+    engine = snapshot_engine()
+    if engine is not None:
+        rows = [
+            (month, tech, count)
+            for month, counts in engine.tech_month_counts(tech_names, start_month).items()
+            for tech, count in counts.items()
+        ]
+    else:
+        rows = db.session.query(TechMonthlyCount.month, TechMonthlyCount.technology, TechMonthlyCount.count)\
+            .filter(TechMonthlyCount.month >= start_month, TechMonthlyCount.technology.in_(tech_names))\
+            .all()
     
     history = {} # {'2024-01': {'Java': 10, 'Python': 5}}
-    
-    for job in jobs:
-        if not job.date_posted: continue
-        month = job.date_posted.strftime('%Y-%m')
+    for month, tech, count in rows:
         if month not in history:
             history[month] = {t: 0 for t in tech_names}
-            
-        if job.technologies:
-            for tech in job.technologies:
-                # Normalisation simple
-                tech_clean = tech.strip()
-                # Check if this tech is in our top 10 (fuzzy match could be better but kept simple)
-                # We do exact match against our top 10 list for now
-                if tech_clean in tech_names:
-                    history[month][tech_clean] += 1
+        history[month][tech] = count
                     
     # Format for recharts: [{'month': '2024-01', 'Java': 10, 'Python': 5}, ...]
     formatted_data = []
@@ -162,109 +349,144 @@ def get_tech_history():
         
     return jsonify(formatted_data)
 
+# Technologies par défaut (les plus demandées) et nombre maximal de périodes d'une réponse
+EVOLUTION_DEFAULT_TECHS = 10
+EVOLUTION_MAX_PERIODS = 1000
+PERIOD_DAYS = {'day': 1, 'week': 7, 'month': 28}
+
+def parse_day(value, default, end=False):
+    """'YYYY-MM-DD', ou 'YYYY-MM' : premier jour du mois (dernier si `end`)"""
+    if not value:
+        return default
+    if len(value) == 7:
+        first = datetime.date.fromisoformat(value + '-01')
+        return next_period(first, 'month') - datetime.timedelta(days=1) if end else first
+    return datetime.date.fromisoformat(value)
+
 @api.route('/stats/history/evolution', methods=['GET'])
+@cached_response
 def get_tech_evolution():
-    # Evolution of specific technologies over time (Line Chart)
-    # Similar logic to above but maybe for all techs or user selected?
-    # Actually, the frontend Recharts can just take the data from get_tech_history and display lines.
-    # We can reuse the same endpoint or make this one return longer history or more techs.
+    # Évolution des technologies (offres uniques) lue dans le cube journalier tech_daily_counts :
+    # ?from=2024-01-01&to=2024-06 &granularity=day|week|month &techs=Python,React &source=rekrute &city=Rabat
+    granularity = request.args.get('granularity', 'month')
+    if granularity not in GRANULARITIES:
+        return jsonify({'error': "Paramètre 'granularity' : day, week ou month"}), 400
+    try:
+        start = parse_day(request.args.get('from'), datetime.date(2024, 1, 1))
+        end = parse_day(request.args.get('to'), datetime.datetime.utcnow().date(), end=True)
+    except ValueError:
+        return jsonify({'error': 'Dates attendues au format YYYY-MM-DD ou YYYY-MM'}), 400
+    if start > end:
+        return jsonify({'error': "'from' postérieur à 'to'"}), 400
+    if (end - start).days // PERIOD_DAYS[granularity] >= EVOLUTION_MAX_PERIODS:
+        return jsonify({'error': f'Plus de {EVOLUTION_MAX_PERIODS} périodes : réduire la plage ou la granularité'}), 400
+    
+    city_id = None
+    city = request.args.get('city')
+    if city:
+        name = resolve_city(city)
+        city_id = db.session.query(City.id).filter(City.name == name).scalar() if name else None
+        if city_id is None:
+            return jsonify({'error': f"Ville inconnue : '{city}'"}), 400
+    
+    techs = requested_terms('techs')
+    if techs:
+        # Noms tels qu'en base : la casse de la requête peut différer
+        known = dict(db.session.query(func.lower(TechnologyStat.technology), TechnologyStat.technology)
+                     .filter(func.lower(TechnologyStat.technology).in_([t.lower() for t in techs])).all())
+        techs = list(dict.fromkeys(known.get(t.lower(), t) for t in techs))
+    else:
+        techs = [t['name'] for t in top_technologies()[:EVOLUTION_DEFAULT_TECHS]]
     
-    # Let's return the same data structure but maybe for top 20 to allow more selection
-    return get_tech_history() # Reuse for now
+    series = read_tech_evolution(
+        db.session, techs, start, end, granularity, source=request.args.get('source'), city_id=city_id
+    )
+    # Format for recharts: [{'period': '2024-01', 'Java': 10, 'Python': 5}, ...]
+    return jsonify([{'period': period, **counts} for period, counts in series])
 
 
-import csv
-import io
 from flask import Response, stream_with_context
+from job_export import EXPORT_COLUMNS, FETCH_SIZE, FORMATS, format_available, export_stream, export_filename
 
 @api.route('/jobs/export', methods=['GET'])
 def export_jobs():
-    def generate():
-        data = io.StringIO()
-        w = csv.writer(data)
-        
-        # Header
-        w.writerow(('Titre', 'Entreprise', 'Ville', 'Source', 'Date Publication', 'URL', 'Technologies', 'Compétences'))
-        yield data.getvalue()
-        data.seek(0)
-        data.truncate(0)
-
-        # Query all jobs (or filtered via query params if needed later)
-        # For performance on large DB, use yield_per
-        jobs_query = Job.query.order_by(Job.date_posted.desc()).yield_per(100)
-        
-        for job in jobs_query:
-            techs = ", ".join(job.technologies) if job.technologies else ""
-            skills = ", ".join(job.skills) if job.skills else ""
-            
-            w.writerow((
-                job.title,
-                job.company,
-                job.location,
-                job.source_site,
-                job.date_posted.isoformat() if job.date_posted else "",
-                job.url_offre,
-                techs,
-                skills
-            ))
-            yield data.getvalue()
-            data.seek(0)
-            data.truncate(0)
-
-    response = Response(stream_with_context(generate()), mimetype='text/csv')
-    response.headers.set('Content-Disposition', 'attachment', filename='jobs_export.csv')
+    # Mêmes filtres que /jobs ; ?format=csv|ndjson|parquet, ?gzip=1 (csv / ndjson)
+    fmt = request.args.get('format', 'csv').lower()
+    if not format_available(fmt):
+        return jsonify({'error': f"Format '{fmt}' indisponible (csv, ndjson, parquet avec pyarrow)"}), 400
+    compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+    
+    # Colonnes seulement, curseur côté serveur (yield_per active stream_results)
+    stmt = apply_job_filters(db.select(*EXPORT_COLUMNS)).order_by(Job.date_posted.desc(), Job.id.desc())
+    rows = db.session.execute(stmt.execution_options(yield_per=FETCH_SIZE))
+    
+    filename = export_filename(fmt, compress)
+    mimetype = 'application/gzip' if filename.endswith('.gz') else FORMATS[fmt][0]
+    response = Response(stream_with_context(export_stream(rows, fmt, compress)), mimetype=mimetype)
+    response.headers.set('Content-Disposition', 'attachment', filename=filename)
     return response
 
-# Existing scraping routes...
-import threading
-import subprocess
-import os
+@api.route('/stream/events', methods=['GET'])
+def stream_events():
+    """
+    Server-Sent Events : `jobs` (nouvelles offres uniques d'un lot), `stats` (deltas du lot
+    + totaux courants) et `resync` (événements perdus par un client trop lent).
+    """
+    broker = current_app.extensions.get('live_events')
+    if broker is None:
+        return jsonify({'error': 'Flux temps réel désactivé (LIVE_EVENTS=0)'}), 404
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    subscriber = broker.subscribe(int(last_event_id) if last_event_id and last_event_id.isdigit() else None)
+    if subscriber is None:
+        return jsonify({'error': 'Trop de clients connectés au flux'}), 503
+    response = Response(broker.stream(subscriber), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Pas de mise en tampon par un reverse proxy (nginx)
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
-def run_scraper_subprocess():
-    """Fonction helper pour lancer le process scraper"""
-    try:
-        # Chemin vers run_scrapers.py
-        scraper_path = os.path.join(os.path.dirname(__file__), 'scraper', 'run_scrapers.py')
-        print(f"🚀 Lancement manuel du scraping via: {scraper_path}")
-        subprocess.run(['python', scraper_path])
-        print("✅ Scraping manuel terminé")
-    except Exception as e:
-        print(f"❌ Erreur scraping manuel: {e}")
+# Scraping : un run actif par type de scraper (scrape_runs.py)
+from scrape_runs import run_to_dict, active_runs, last_runs
 
-def run_enhanced_scraper_subprocess():
-    """Fonction helper pour lancer le scrapeur historique"""
-    try:
-        scraper_path = os.path.join(os.path.dirname(__file__), 'scraper', 'enhanced_scraper.py')
-        print(f"🚀 Lancement du scraping HISTORIQUE via: {scraper_path}")
-        subprocess.run(['python', scraper_path])
-        print("✅ Scraping historique terminé")
-    except Exception as e:
-        print(f"❌ Erreur scraping historique: {e}")
+def start_scrape_run(kind, label):
+    """Lance un run ou rejoint celui en cours : l'appelant suit son run_id via /sync/status?run_id="""
+    run_id, started = current_app.extensions['scrape_runs'].start(kind, trigger='api')
+    if started:
+        return jsonify({'status': 'started', 'run_id': run_id, 'message': f'{label} lancé en arrière-plan'}), 202
+    return jsonify({'status': 'already_running', 'run_id': run_id, 'message': f'{label} déjà en cours'}), 202
 
 
 @api.route('/sync/run', methods=['POST'])
 def run_sync():
-    # Lancer le scraping dans un thread séparé pour ne pas bloquer la réponse HTTP
-    thread = threading.Thread(target=run_scraper_subprocess)
-    thread.start()
-    
-    return jsonify({'status': 'started', 'message': 'Scraping lancé en arrière-plan'})
+    return start_scrape_run('standard', 'Scraping')
 
 @api.route('/sync/enhanced', methods=['POST'])
 def run_sync_enhanced():
-    thread = threading.Thread(target=run_enhanced_scraper_subprocess)
-    thread.start()
-    return jsonify({'status': 'started', 'message': 'Scraping Historique lancé en arrière-plan'})
+    return start_scrape_run('enhanced', 'Scraping Historique')
 
 
 @api.route('/sync/status', methods=['GET'])
 def get_sync_status():
+    run_id = request.args.get('run_id')
+    if run_id:
+        run = db.session.get(ScrapeRun, run_id)
+        if run is None:
+            return jsonify({'error': f"Run inconnu : '{run_id}'"}), 404
+        return jsonify(run_to_dict(run))
+
+    active = active_runs(db.session)
     latest_log = ScrapingLog.query.order_by(ScrapingLog.start_time.desc()).first()
-    if not latest_log:
-        return jsonify({'status': 'never_run'})
-    
-    return jsonify({
-        'status': latest_log.status,
-        'last_run': latest_log.start_time.isoformat(),
-        'jobs_added': latest_log.jobs_added
-    })
+    if latest_log:
+        status = {
+            'status': latest_log.status,
+            'last_run': latest_log.start_time.isoformat(),
+            'jobs_added': latest_log.jobs_added,
+        }
+    else:
+        status = {'status': 'never_run'}
+    if active:
+        status['status'] = 'running'
+    # Progression par site des runs en cours, bilan du dernier run de chaque type
+    status['active'] = [run_to_dict(run) for run in active]
+    status['last_runs'] = {kind: run_to_dict(run) for kind, run in last_runs(db.session).items()}
+    return jsonify(status)
@@ -0,0 +1,201 @@
+"""
+Runs de scraping : au plus un run actif par type de scraper.
+
+POST /api/sync/run, /api/sync/enhanced, le job horaire et le scraping de
+démarrage passent par RunManager. Une demande qui arrive pendant un run du même
+type ne lance rien : elle reçoit le run_id en cours (coalescence).
+
+Le verrou est la ligne du type dans scrape_run_slots, prise par un UPDATE
+conditionnel (atomique sur MySQL comme sur SQLite). Il vaut donc entre les
+workers du serveur, le scheduler et les lancements en ligne de commande. Le
+process du scraper le rafraîchit par un heartbeat (scraper/progress.py) ; s'il
+disparaît sans le libérer, la demande suivante le reprend après
+SCRAPE_RUN_STALE_AFTER secondes.
+
+Le scraper publie aussi sa progression par site dans scrape_runs.progress,
+relue par GET /api/sync/status.
+"""
+import os
+import sys
+import uuid
+import threading
+import subprocess
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update, or_
+
+from bulk import insert_ignore
+from models import ScrapeRun, ScrapeRunSlot
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# type de run -> script du scraper
+KINDS = {
+    'standard': os.path.join(BACKEND_DIR, 'scraper', 'run_scrapers.py'),
+    'enhanced': os.path.join(BACKEND_DIR, 'scraper', 'enhanced_scraper.py'),
+}
+ACTIVE = ('queued', 'running')
+# Variables d'environnement passées au sous-process : il reprend le run réservé au lieu d'en créer un
+RUN_ID_ENV = 'SCRAPE_RUN_ID'
+RUN_KIND_ENV = 'SCRAPE_RUN_KIND'
+
+
+def new_run_id():
+    return uuid.uuid4().hex
+
+
+def acquire_slot(session, kind, run_id, stale_after):
+    """
+    Réserve le type `kind` pour `run_id`. Retourne le run_id actif : `run_id`
+    si la réservation a réussi, sinon celui du run déjà en cours.
+    """
+    now = datetime.utcnow()
+    session.execute(insert_ignore(ScrapeRunSlot, session.get_bind().dialect.name).values(kind=kind))
+    result = session.execute(
+        update(ScrapeRunSlot)
+        .where(
+            ScrapeRunSlot.kind == kind,
+            or_(ScrapeRunSlot.run_id.is_(None), ScrapeRunSlot.heartbeat_at < now - timedelta(seconds=stale_after)),
+        )
+        .values(run_id=run_id, heartbeat_at=now)
+    )
+    if not result.rowcount:
+        return session.execute(select(ScrapeRunSlot.run_id).where(ScrapeRunSlot.kind == kind)).scalar()
+    # Run précédent resté actif sans heartbeat : son process a disparu
+    session.execute(
+        update(ScrapeRun)
+        .where(ScrapeRun.kind == kind, ScrapeRun.status.in_(ACTIVE), ScrapeRun.id != run_id)
+        .values(status='failed', finished_at=now, error='Run interrompu (plus de heartbeat)')
+    )
+    return run_id
+
+
+def heartbeat(session, kind, run_id, **values):
+    """Prolonge la réservation et met à jour le run (progression, jobs_added...)"""
+    now = datetime.utcnow()
+    session.execute(
+        update(ScrapeRunSlot).where(ScrapeRunSlot.kind == kind, ScrapeRunSlot.run_id == run_id).values(heartbeat_at=now)
+    )
+    session.execute(update(ScrapeRun).where(ScrapeRun.id == run_id).values(heartbeat_at=now, **values))
+
+
+def finish_run(session, kind, run_id, status, error=None, **values):
+    """Termine le run (s'il est encore actif) et libère le type pour la demande suivante"""
+    now = datetime.utcnow()
+    session.execute(
+        update(ScrapeRun)
+        .where(ScrapeRun.id == run_id, ScrapeRun.status.in_(ACTIVE))
+        .values(status=status, finished_at=now, heartbeat_at=now, error=error, **values)
+    )
+    session.execute(
+        update(ScrapeRunSlot).where(ScrapeRunSlot.kind == kind, ScrapeRunSlot.run_id == run_id).values(run_id=None)
+    )
+
+
+def run_to_dict(run):
+    if run is None:
+        return None
+    end = run.finished_at or datetime.utcnow()
+    progress = run.progress or {}
+    return {
+        'run_id': run.id,
+        'kind': run.kind,
+        'trigger': run.trigger,
+        'status': run.status,
+        'requested_at': run.requested_at.isoformat() if run.requested_at else None,
+        'started_at': run.started_at.isoformat() if run.started_at else None,
+        'finished_at': run.finished_at.isoformat() if run.finished_at else None,
+        'elapsed': round((end - run.started_at).total_seconds(), 1) if run.started_at else None,
+        'jobs_added': run.jobs_added or 0,
+        'sites': [dict(site=name, **values) for name, values in progress.items()],
+        'error': run.error,
+    }
+
+
+def active_runs(session):
+    return session.execute(
+        select(ScrapeRun).join(ScrapeRunSlot, ScrapeRunSlot.run_id == ScrapeRun.id).order_by(ScrapeRun.requested_at)
+    ).scalars().all()
+
+
+def last_runs(session):
+    """Dernier run terminé de chaque type"""
+    runs = {}
+    for kind in KINDS:
+        runs[kind] = session.execute(
+            select(ScrapeRun)
+            .where(ScrapeRun.kind == kind, ScrapeRun.status.notin_(ACTIVE))
+            .order_by(ScrapeRun.requested_at.desc())
+            .limit(1)
+        ).scalar()
+    return runs
+
+
+class RunManager:
+    """
+    Lance les scrapers en sous-process (un run actif par type) et suit leur fin.
+    `on_finished(kind, run_id, returncode)` est appelé dans le thread qui attend le process.
+    """
+
+    def __init__(self, session_factory, stale_after=120, on_finished=None):
+        self.session_factory = session_factory
+        self.stale_after = stale_after
+        self.on_finished = on_finished
+
+    def _transaction(self, fn, *args, **kwargs):
+        session = self.session_factory()
+        try:
+            result = fn(session, *args, **kwargs)
+            session.commit()
+            return result
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def _reserve(self, session, kind, trigger):
+        run_id = new_run_id()
+        active = acquire_slot(session, kind, run_id, self.stale_after)
+        if active == run_id:
+            now = datetime.utcnow()
+            session.add(ScrapeRun(id=run_id, kind=kind, trigger=trigger, status='queued', requested_at=now, heartbeat_at=now))
+        return run_id, active
+
+    def start(self, kind, trigger='api'):
+        """
+        Lance un run de `kind` sauf si un run de ce type est déjà actif.
+        Retourne (run_id, started) : started=False quand la demande est coalescée au run en cours.
+        """
+        if kind not in KINDS:
+            raise ValueError(f"Type de scraper inconnu: {kind}")
+        run_id, active = self._transaction(self._reserve, kind, trigger)
+        if active is None:
+            # Le run actif s'est terminé entre l'UPDATE et la relecture : le type est libre
+            run_id, active = self._transaction(self._reserve, kind, trigger)
+        if active != run_id:
+            return active, False
+
+        env = dict(os.environ, **{RUN_ID_ENV: run_id, RUN_KIND_ENV: kind})
+        try:
+            # Sous-process : l'event loop async de Playwright reste hors du serveur.
+            # Sortie non capturée pour qu'elle s'affiche dans le terminal du backend
+            process = subprocess.Popen([sys.executable, '-u', KINDS[kind]], env=env, cwd=BACKEND_DIR)
+        except Exception as e:
+            self._transaction(finish_run, kind, run_id, 'failed', error=str(e))
+            raise
+        threading.Thread(target=self._wait, args=(kind, run_id, process), name=f'scrape-{kind}', daemon=True).start()
+        return run_id, True
+
+    def _wait(self, kind, run_id, process):
+        returncode = process.wait()
+        try:
+            # Sans effet si le scraper a terminé son run lui-même ; sinon il est mort avant
+            self._transaction(
+                finish_run, kind, run_id, 'success' if returncode == 0 else 'failed',
+                error=None if returncode == 0 else f'Le scraper s\'est arrêté (code {returncode})',
+            )
+        except Exception as e:
+            print(f"⚠️ Fin du run {run_id} non enregistrée: {e}")
+        if self.on_finished is not None:
+            self.on_finished(kind, run_id, returncode)
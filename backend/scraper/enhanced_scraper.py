@@ -16,6 +16,9 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 from scraper.browser import BrowserManager
 from scraper.pipeline import DataPipeline
+from scraper.writer import LoopLagMonitor
+from scraper.progress import RunProgress
+from scraper.extraction_cache import get_cache
 from playwright.async_api import async_playwright
 
 # Configuration Locale pour les dates (fr_FR)
@@ -34,9 +37,21 @@ def parse_relative_date(date_str, fallback_date=None):
     """
     if not date_str:
         return fallback_date
-    
+    parsed = _parse_date_label(date_str)
+    if parsed is None:
+        return fallback_date
+    if isinstance(parsed, dict):
+        # Date relative : le décalage est appliqué à l'heure courante, à chaque appel
+        return datetime.utcnow() - timedelta(days=parsed['days_ago'])
+    return parsed
+
+
+def _parse_date_label(date_str):
+    """
+    Analyse d'un libellé de date, indépendante de l'heure courante (résultat mémorisable) :
+    datetime pour une date absolue, {'days_ago': n} pour une date relative, None si non reconnue.
+    """
     date_str = date_str.lower().strip()
-    now = datetime.utcnow()
     
     try:
         # Nettoyage préalable spécifique
@@ -70,29 +85,29 @@ def parse_relative_date(date_str, fallback_date=None):
         
         # Cas relatifs - Priorité à "Hier/Avant-hier" pour ne pas matcher avec "heures" si mal placé
         if any(x in date_str for x in ['avant-hier', 'before yesterday']):
-             return now - timedelta(days=2)
+             return {'days_ago': 2}
 
         if any(x in date_str for x in ['hier', 'yesterday']):
-            return now - timedelta(days=1)
+            return {'days_ago': 1}
 
         # "Aujourd'hui", "Maintenant", ou temps très court (minutes, heures)
         # Attention: 'h' seul peut matcher 'hier', donc on utilise regex pour les heures/minutes
         if any(x in date_str for x in ['aujourd', 'today', 'maintenant', 'now']):
-            return now
+            return {'days_ago': 0}
             
         # Regex pour "Il y a X heures" ou "5h" ou "12:30" (implique aujourd'hui)
         if re.search(r'\d+\s*(h|heure|hour|minute|min|sec)', date_str) or re.search(r'\d{1,2}:\d{2}', date_str):
-             return now
+             return {'days_ago': 0}
 
             
         # "Il y a X jours" / "X days ago"
         match_days = re.search(r'il y a (\d+) jour', date_str) or re.search(r'(\d+) jour', date_str) or re.search(r'(\d+) day', date_str)
         if match_days:
-            return now - timedelta(days=int(match_days.group(1)))
+            return {'days_ago': int(match_days.group(1))}
             
         match_months = re.search(r'il y a (\d+) mois', date_str) or re.search(r'(\d+) mois', date_str)
         if match_months:
-            return now - timedelta(days=int(match_months.group(1)) * 30)
+            return {'days_ago': int(match_months.group(1)) * 30}
 
         # Essai de remplacement des mois APRES les tests relatifs
         lower_str = date_str
@@ -141,17 +156,10 @@ def parse_relative_date(date_str, fallback_date=None):
             except:
                 pass
 
-        # Si toujours rien, log mais ne pas fail hard si fallback existe pas
-        if fallback_date:
-            # print(f"⚠️ [DATE_FAIL] Date fallback: '{date_str}' -> {fallback_date.strftime('%d/%m/%Y')}")
-            return fallback_date
-        else:
-            # print(f"⚠️ [DATE_FAIL] Date non reconnue: '{date_str}'")
-            return None
+        # Si toujours rien : date de repli de l'appelant (parse_relative_date)
+        return None
         
     except Exception as e:
-        if fallback_date:
-            return fallback_date
         return None
 
 
@@ -253,6 +261,20 @@ def clean_location(loc_str):
     return "Maroc"
 
 
+# Mémorisation disque (crawls historiques : mêmes libellés de dates et de villes à chaque page).
+# Incrémenter la version quand les règles de parse_relative_date / clean_location changent
+# (la liste des villes fait déjà partie de la version de clean_location).
+_extraction_cache = get_cache()
+# Seule l'analyse du libellé est mémorisée : une date relative ("hier", "il y a 2 jours")
+# est gardée sous forme de décalage et résolue à l'heure courante par parse_relative_date
+_parse_date_label = _extraction_cache.memoize(
+    'date', 2, normalize=lambda s: s.lower().strip(),
+)(_parse_date_label)
+clean_location = _extraction_cache.memoize(
+    'location', (1, sorted(MOROCCAN_CITIES)), normalize=lambda s: s.lower().strip(),
+)(clean_location)
+
+
 
 def estimate_date_from_page(page_number, days_per_page=1.5):
     """
@@ -368,7 +390,7 @@ async def scrape_emploi_ma_history(pipeline, browser_manager, page, start_date):
                         'date_posted': job_date
                     }
                     
-                    pipeline.save_job(job_data)
+                    await pipeline.submit(job_data)
                     
                 except Exception as e:
                     continue
@@ -504,7 +526,7 @@ async def scrape_rekrute_history(pipeline, browser_manager, page, start_date):
                         'date_posted': job_date
                     }
                     
-                    pipeline.save_job(job_data)
+                    await pipeline.submit(job_data)
                     
                 except Exception as e:
                     continue
@@ -627,7 +649,7 @@ async def scrape_marocannonces_history(pipeline, browser_manager, page, start_da
                         'date_posted': job_date
                     }
                     
-                    pipeline.save_job(job_data)
+                    await pipeline.submit(job_data)
                 
                 except Exception as e:
                     continue
@@ -758,7 +780,7 @@ async def scrape_bayt_history(pipeline, browser_manager, page, start_date):
                         'date_posted': job_date
                     }
                     
-                    pipeline.save_job(job_data)
+                    await pipeline.submit(job_data)
                 
                 except Exception as e:
                     continue
@@ -859,7 +881,7 @@ async def scrape_tanqeeb_history(pipeline, browser_manager, page, start_date):
                         'source': 'tanqeeb.com',
                         'date_posted': job_date
                     }
-                    pipeline.save_job(job_data)
+                    await pipeline.submit(job_data)
                     
                 except Exception as e:
                     continue
@@ -950,7 +972,7 @@ async def scrape_indeed_history(pipeline, browser_manager, page, start_date):
                     }
                     
                     if full_url: # Only save if valid
-                        pipeline.save_job(job_data)
+                        await pipeline.submit(job_data)
                         
                 except Exception as e:
                      continue
@@ -963,8 +985,36 @@ async def scrape_indeed_history(pipeline, browser_manager, page, start_date):
             
         current_start += 10 # Page suivante
 
+# (source_site, libellé, scraper) dans l'ordre de passage ; Indeed en dernier (risque de blocage)
+SITES = (
+    ('emploi.ma', 'Emploi.ma', scrape_emploi_ma_history),
+    ('rekrute.com', 'Rekrute', scrape_rekrute_history),
+    ('marocannonces.com', 'Marocannonces', scrape_marocannonces_history),
+    ('bayt.com', 'Bayt', scrape_bayt_history),
+    ('tanqeeb.com', 'Tanqeeb', scrape_tanqeeb_history),
+    ('indeed.com', 'Indeed', scrape_indeed_history),
+)
+# Timeout de 20 minutes par site
+SITE_TIMEOUT = 1200
+
+
 async def main():
-    pipeline = DataPipeline()
+    # Un seul run 'enhanced' à la fois (serveur ou lancement manuel)
+    progress = RunProgress('enhanced', [site for site, _, _ in SITES])
+    if not progress.start():
+        return
+    status, error = 'failed', None
+    try:
+        status, error = await scrape_history(progress)
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        progress.finish(status, error)
+
+
+async def scrape_history(progress):
+    pipeline = DataPipeline(buffered=True)
     manager = BrowserManager(headless=True)
     
     # Date cible: 1er Janvier 2024
@@ -977,105 +1027,36 @@ async def main():
     print("📄 Pages max par site: 300-500")
     print("=" * 60)
     
+    monitor = LoopLagMonitor().start()
+    status, error = 'success', None
+    
     async with async_playwright() as p:
         browser, context, page = await manager.get_context_and_page(p)
+        progress.attach(pipeline, page)
         
         try:
             import time
             
-            # Timeout de 20 minutes (1200 secondes) par site
-            SITE_TIMEOUT = 1200
-            
-            # Emploi.ma
-            print(f"\n🔵 [1/6] Démarrage Emploi.ma...")
-            start_time = time.time()
-            try:
-                await asyncio.wait_for(
-                    scrape_emploi_ma_history(pipeline, manager, page, target_date),
-                    timeout=SITE_TIMEOUT
-                )
-                elapsed = time.time() - start_time
-                print(f"✅ Emploi.ma terminé en {elapsed/60:.1f} minutes")
-            except asyncio.TimeoutError:
-                print(f"⏱️  Emploi.ma: Timeout après 20 minutes (normal pour scraping profond)")
-            except Exception as e:
-                print(f"⚠️  Emploi.ma: Erreur - {e}")
-            
-            # Rekrute
-            print(f"\n🔵 [2/6] Démarrage Rekrute...")
-            start_time = time.time()
-            try:
-                await asyncio.wait_for(
-                    scrape_rekrute_history(pipeline, manager, page, target_date),
-                    timeout=SITE_TIMEOUT
-                )
-                elapsed = time.time() - start_time
-                print(f"✅ Rekrute terminé en {elapsed/60:.1f} minutes")
-            except asyncio.TimeoutError:
-                print(f"⏱️  Rekrute: Timeout après 20 minutes (normal pour scraping profond)")
-            except Exception as e:
-                print(f"⚠️  Rekrute: Erreur - {e}")
-            
-            # Marocannonces
-            print(f"\n🔵 [3/6] Démarrage Marocannonces...")
-            start_time = time.time()
-            try:
-                await asyncio.wait_for(
-                    scrape_marocannonces_history(pipeline, manager, page, target_date),
-                    timeout=SITE_TIMEOUT
-                )
-                elapsed = time.time() - start_time
-                print(f"✅ Marocannonces terminé en {elapsed/60:.1f} minutes")
-            except asyncio.TimeoutError:
-                print(f"⏱️  Marocannonces: Timeout après 20 minutes (normal pour scraping profond)")
-            except Exception as e:
-                print(f"⚠️  Marocannonces: Erreur - {e}")
-            
-            # Bayt
-            print(f"\n🔵 [4/6] Démarrage Bayt...")
-            start_time = time.time()
-            try:
-                await asyncio.wait_for(
-                    scrape_bayt_history(pipeline, manager, page, target_date),
-                    timeout=SITE_TIMEOUT
-                )
-                elapsed = time.time() - start_time
-                print(f"✅ Bayt terminé en {elapsed/60:.1f} minutes")
-            except asyncio.TimeoutError:
-                print(f"⏱️  Bayt: Timeout après 20 minutes (normal pour scraping profond)")
-            except Exception as e:
-                print(f"⚠️  Bayt: Erreur - {e}")
-            
-            # Tanqeeb
-            print(f"\n🔵 [5/6] Démarrage Tanqeeb...")
-            start_time = time.time()
-            try:
-                await asyncio.wait_for(
-                    scrape_tanqeeb_history(pipeline, manager, page, target_date),
-                    timeout=SITE_TIMEOUT
-                )
-                elapsed = time.time() - start_time
-                print(f"✅ Tanqeeb terminé en {elapsed/60:.1f} minutes")
-            except asyncio.TimeoutError:
-                print(f"⏱️  Tanqeeb: Timeout après 20 minutes (normal pour scraping profond)")
-            except Exception as e:
-                print(f"⚠️  Tanqeeb: Erreur - {e}")
-            
-            # Indeed (risque de blocage)
-            print(f"\n🔵 [6/6] Démarrage Indeed (risque de blocage)...")
-            start_time = time.time()
-            try:
-                await asyncio.wait_for(
-                    scrape_indeed_history(pipeline, manager, page, target_date),
-                    timeout=SITE_TIMEOUT
-                )
-                elapsed = time.time() - start_time
-                print(f"✅ Indeed terminé en {elapsed/60:.1f} minutes")
-            except asyncio.TimeoutError:
-                print(f"⏱️  Indeed: Timeout après 20 minutes (normal pour scraping profond)")
-            except Exception as e:
-                print(f"⚠️  Indeed: Erreur - {e}")
+            for number, (site, label, scrape) in enumerate(SITES, 1):
+                print(f"\n🔵 [{number}/{len(SITES)}] Démarrage {label}...")
+                progress.begin_site(site)
+                start_time = time.time()
+                try:
+                    await asyncio.wait_for(
+                        scrape(pipeline, manager, page, target_date),
+                        timeout=SITE_TIMEOUT
+                    )
+                    elapsed = time.time() - start_time
+                    print(f"✅ {label} terminé en {elapsed/60:.1f} minutes")
+                    progress.end_site(site)
+                except asyncio.TimeoutError:
+                    print(f"⏱️  {label}: Timeout après 20 minutes (normal pour scraping profond)")
+                    progress.end_site(site, 'timeout')
+                except Exception as e:
+                    print(f"⚠️  {label}: Erreur - {e}")
+                    progress.end_site(site, 'failed')
             
+            await pipeline.drain()
             pipeline.log_run('success_history')
             print("=" * 60)
             print(f"✅ SCRAPING HISTORIQUE TERMINÉ")
@@ -1083,10 +1064,19 @@ async def main():
             print("=" * 60)
             
         except Exception as e:
+            status, error = 'failed', e
+            try:
+                # Offres encore en file : écrites avant le log (sans masquer l'erreur du run)
+                await pipeline.drain()
+            except Exception as drain_error:
+                print(f"   ⚠️ {drain_error}")
             pipeline.log_run('failed_history', str(e))
             print(f"❌ Échec du scraping historique: {e}")
         finally:
             await browser.close()
+            await monitor.stop()
+            print(monitor.report())
+    return status, error
 
 if __name__ == "__main__":
     asyncio.run(main())
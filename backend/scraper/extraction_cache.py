@@ -0,0 +1,203 @@
+"""
+Cache disque des résultats d'extraction (technologies/compétences, villes, dates).
+
+Les crawls historiques et les ré-imports repassent souvent exactement les mêmes
+textes dans extract_details, clean_location et parse_relative_date. Les
+résultats sont mémorisés dans un fichier SQLite, indexés par un hash du texte
+normalisé et de la version de la taxonomie / de la fonction : un changement de
+règles invalide naturellement les anciennes entrées.
+
+Éviction LRU avec plafond de taille ; les mises à jour de last_used et les
+nouvelles entrées sont écrites par lots pour ne pas faire un commit par appel.
+Compteurs hits/misses par fonction : cache.stats() / cache.report().
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import functools
+from datetime import datetime
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS extraction_cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_extraction_cache_last_used ON extraction_cache (last_used);
+"""
+
+
+def _default(obj):
+    if isinstance(obj, datetime):
+        return {'__datetime__': obj.isoformat()}
+    raise TypeError(f"Type non sérialisable: {type(obj).__name__}")
+
+
+def _hook(obj):
+    if '__datetime__' in obj:
+        return datetime.fromisoformat(obj['__datetime__'])
+    return obj
+
+
+class ExtractionCache:
+    def __init__(self, path, max_entries=200000, write_batch=256):
+        self.path = path
+        self.max_entries = max_entries
+        self.write_batch = write_batch
+        self.hits = {}
+        self.misses = {}
+        self._pending = {}
+        self._touched = {}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Partagé entre les threads d'écriture du pipeline (accès sérialisé par _lock)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+        self._size = self._conn.execute('SELECT COUNT(*) FROM extraction_cache').fetchone()[0]
+
+    @staticmethod
+    def make_key(namespace, version, text):
+        digest = hashlib.blake2b(text.encode('utf-8'), digest_size=16, person=namespace.encode()[:16])
+        digest.update(b'\0' + str(version).encode())
+        return f"{namespace}:{digest.hexdigest()}"
+
+    def get(self, key):
+        """Retourne (trouvé, valeur)"""
+        with self._lock:
+            if key in self._pending:
+                value = self._pending[key]
+            else:
+                row = self._conn.execute('SELECT value FROM extraction_cache WHERE key = ?', (key,)).fetchone()
+                if row is None:
+                    return False, None
+                value = row[0]
+            self._touched[key] = time.time()
+        return True, json.loads(value, object_hook=_hook)
+
+    def put(self, key, value):
+        with self._lock:
+            self._pending[key] = json.dumps(value, default=_default, ensure_ascii=False)
+            if len(self._pending) + len(self._touched) >= self.write_batch:
+                self._write()
+
+    def flush(self):
+        with self._lock:
+            self._write()
+
+    def _write(self):
+        if not self._pending and not self._touched:
+            return
+        now = time.time()
+        with self._conn:
+            if self._pending:
+                cur = self._conn.executemany(
+                    'INSERT OR REPLACE INTO extraction_cache (key, value, last_used) VALUES (?, ?, ?)',
+                    [(k, v, now) for k, v in self._pending.items()],
+                )
+                self._size += cur.rowcount
+            touched = [(t, k) for k, t in self._touched.items() if k not in self._pending]
+            if touched:
+                self._conn.executemany('UPDATE extraction_cache SET last_used = ? WHERE key = ?', touched)
+            if self._size > self.max_entries:
+                self._evict()
+        self._pending.clear()
+        self._touched.clear()
+
+    def _evict(self):
+        # On descend à 90 % du plafond pour ne pas évincer à chaque lot
+        self._size = self._conn.execute('SELECT COUNT(*) FROM extraction_cache').fetchone()[0]
+        excess = self._size - int(self.max_entries * 0.9)
+        if excess > 0:
+            self._conn.execute(
+                'DELETE FROM extraction_cache WHERE key IN '
+                '(SELECT key FROM extraction_cache ORDER BY last_used LIMIT ?)', (excess,)
+            )
+            self._size -= excess
+
+    def memoize(self, namespace, version, normalize=None, extra_key=None):
+        """
+        Décorateur : mémorise f(text, ...) par hash du texte normalisé.
+        `extra_key(*args, **kwargs)` ajoute au hash ce dont le résultat dépend en plus du texte.
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(text, *args, **kwargs):
+                if not text or not isinstance(text, str):
+                    return func(text, *args, **kwargs)
+                normalized = normalize(text) if normalize else text
+                key_text = normalized if extra_key is None else f"{normalized}\0{extra_key(*args, **kwargs)}"
+                key = self.make_key(namespace, version, key_text)
+                found, value = self.get(key)
+                if found:
+                    self.hits[namespace] = self.hits.get(namespace, 0) + 1
+                    return value
+                self.misses[namespace] = self.misses.get(namespace, 0) + 1
+                value = func(text, *args, **kwargs)
+                self.put(key, value)
+                return value
+            wrapper.uncached = func
+            return wrapper
+        return decorator
+
+    def stats(self):
+        return {
+            ns: {'hits': self.hits.get(ns, 0), 'misses': self.misses.get(ns, 0)}
+            for ns in sorted(set(self.hits) | set(self.misses))
+        }
+
+    def report(self):
+        lines = []
+        for ns, s in self.stats().items():
+            total = s['hits'] + s['misses']
+            lines.append(f"{ns}: {s['hits']}/{total} hits ({s['hits'] / total:.0%})")
+        return "🧠 Cache d'extraction — " + (', '.join(lines) if lines else 'aucun appel')
+
+    def reset_stats(self):
+        self.hits.clear()
+        self.misses.clear()
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+
+class _NullCache(ExtractionCache):
+    """Cache désactivé (EXTRACTION_CACHE=0) : mêmes appels, aucun stockage"""
+
+    def __init__(self):
+        self.hits, self.misses = {}, {}
+
+    def memoize(self, namespace, version, normalize=None, extra_key=None):
+        return lambda func: func
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Cache partagé du processus (créé au premier appel, écrit à la sortie)"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                import atexit
+                from config import Config
+
+                if Config.EXTRACTION_CACHE_ENABLED:
+                    _cache = ExtractionCache(Config.EXTRACTION_CACHE_PATH, Config.EXTRACTION_CACHE_MAX_ENTRIES)
+                else:
+                    _cache = _NullCache()
+                atexit.register(_cache.close)
+    return _cache
@@ -8,8 +8,19 @@ import json
 from datetime import datetime
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app import app, db
-from models import Job
+from config import Config
+from database import session_scope, init_db
+from models import Job, EXTRACTED_BY_AI
+from rollups import (
+    tech_month_counts, update_tech_monthly, tech_daily_counts, update_tech_daily,
+    update_dimension_counts, update_job_summary,
+)
+from job_terms import TermLinker
+from search import SearchIndexer
+from cities import CityIndex
+from data_version import bump_data_version
+from scraper.url_index import UrlIndex
+from scraper.near_dup import NearDuplicateIndex, minhash, shingles
 
 def import_ai_scraped_data(json_file: str):
     """Importe les données du fichier JSON dans la BD"""
@@ -26,15 +37,58 @@ def import_ai_scraped_data(json_file: str):
         print(f"❌ Erreur lecture fichier: {e}")
         return
     
-    with app.app_context():
+    init_db()
+    with session_scope() as session:
         added = 0
         skipped = 0
         errors = 0
         
+        # Index des URLs existantes chargé une fois (au lieu d'un SELECT par offre)
+        url_index = UrlIndex(
+            bloom_threshold=Config.URL_INDEX_BLOOM_THRESHOLD,
+            fp_rate=Config.URL_INDEX_BLOOM_FP_RATE,
+        ).load(session)
+        
+        cities = CityIndex().load(session)
+        near_dups = NearDuplicateIndex()
+        term_links = TermLinker()
+        search_index = SearchIndexer()
+        pending = []
+        
+        def commit_batch():
+            # Rattacher les nouvelles offres aux clusters de quasi-doublons avant le commit
+            session.flush()
+            term_links.link(session, [(j.id, j.technologies, j.skills) for j in pending])
+            search_index.index(session, [(j.id, j.title, j.company, j.description_text) for j in pending])
+            clusters = near_dups.assign(session, [
+                (j.id, minhash(shingles(j.title, j.company, j.location, j.description_text))) for j in pending
+            ])
+            # Rollups : mensuel / journalier des technologies sur les offres uniques, villes / entreprises / sources sur toutes
+            representatives = [j for j in pending if clusters[j.id] == j.id]
+            tech_rows = [
+                {'date_posted': j.date_posted, 'technologies': j.technologies, 'source_site': j.source_site, 'city_id': j.city_id}
+                for j in representatives
+            ]
+            update_tech_monthly(session, tech_month_counts(tech_rows))
+            update_tech_daily(session, tech_daily_counts(tech_rows))
+            # ... et résumé global (offres, entreprises, tranches horaires)
+            dimensions = {
+                j.id: {
+                    'location': j.location, 'city_id': j.city_id, 'company': j.company,
+                    'source_site': j.source_site, 'date_scraped': j.date_scraped,
+                }
+                for j in pending
+            }
+            rows, unique_rows = list(dimensions.values()), [dimensions[j.id] for j in representatives]
+            update_job_summary(session, rows, unique_rows, update_dimension_counts(session, rows, unique_rows))
+            pending.clear()
+            session.commit()
+        
         for idx, job_data in enumerate(jobs_data, 1):
             try:
                 # Vérifier si l'offre existe déjà
-                existing = Job.query.filter_by(url_offre=job_data.get('url')).first()
+                url = job_data.get('url')
+                existing = bool(url) and url_index.might_contain(url) and (url_index.exact or url_index.contains(url, session))
                 
                 if existing:
                     skipped += 1
@@ -55,6 +109,7 @@ def import_ai_scraped_data(json_file: str):
                     title=job_data.get('title', 'N/A'),
                     company=job_data.get('company'),
                     location=job_data.get('location'),
+                    city_id=cities.city_id(job_data.get('location')),
                     skills=job_data.get('skills'),
                     technologies=job_data.get('technologies'),
                     description_text=job_data.get('description_summary'),
@@ -63,32 +118,39 @@ def import_ai_scraped_data(json_file: str):
                     source_site=job_data.get('source', 'unknown'),
                     url_offre=job_data.get('url'),
                     date_scraped=datetime.now(),
-                    is_new=True
+                    is_new=True,
+                    extracted_by=EXTRACTED_BY_AI,
                 )
                 
-                db.session.add(job)
+                session.add(job)
+                pending.append(job)
+                if url:
+                    url_index.add(url)
                 added += 1
                 
                 # Commit par batch
                 if added % 50 == 0:
-                    db.session.commit()
+                    commit_batch()
                     print(f"  [{idx}/{len(jobs_data)}] ✅ {added} offres ajoutées, {skipped} doublons")
                 
             except Exception as e:
                 errors += 1
                 print(f"  ❌ Erreur offre {idx}: {e}")
-                db.session.rollback()
+                session.rollback()
+                pending.clear()
                 continue
         
         # Commit final
         try:
-            db.session.commit()
+            if added:
+                bump_data_version(session)
+            commit_batch()
             print(f"\n✅ IMPORT TERMINÉ")
             print(f"   Ajoutées: {added}")
             print(f"   Doublons: {skipped}")
             print(f"   Erreurs: {errors}")
         except Exception as e:
-            db.session.rollback()
+            session.rollback()
             print(f"\n❌ Erreur commit final: {e}")
     
     print("=" * 80)
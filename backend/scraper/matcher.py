@@ -0,0 +1,147 @@
+"""
+Moteur de détection des technologies et compétences.
+
+Les listes de termes sont compilées une seule fois par processus en une
+expression régulière unique (trie de préfixes), puis chaque texte est parcouru
+en une seule passe. La sémantique est identique à l'ancienne boucle
+``re.search(r'\\b' + re.escape(t) + r'\\b', text, re.IGNORECASE)`` par terme.
+"""
+
+import re
+import hashlib
+
+# Liste étendue de technologies
+TECHNOLOGIES = [
+    # Langages
+    'Python', 'Java', 'JavaScript', 'TypeScript', 'PHP', 'C#', 'C++', 'Ruby', 'Go', 'Rust', 'Swift', 'Kotlin', 'Scala', 'R', 'Dart', 'Lua', 'Perl', 'Bash', 'PowerShell',
+    # Frontend
+    'React', 'Angular', 'Vue.js', 'Next.js', 'Nuxt.js', 'Svelte', 'jQuery', 'Bootstrap', 'Tailwind', 'Material UI', 'HTML5', 'CSS3', 'Sass', 'Webpack', 'Vite',
+    # Backend
+    'Node.js', 'Django', 'Flask', 'FastAPI', 'Spring Boot', 'Laravel', 'Symfony', 'Express.js', 'NestJS', 'ASP.NET Core', 'Ruby on Rails', 'GraphQL', 'REST API', 'gRPC',
+    # Mobile
+    'React Native', 'Flutter', 'Android', 'iOS', 'Xamarin', 'Ionic', 'Expo', 'SwiftUI',
+    # Data & AI
+    'Machine Learning', 'Deep Learning', 'Data Science', 'Big Data', 'AI', 'NLP', 'TensorFlow', 'PyTorch', 'Keras', 'Scikit-learn', 'Pandas', 'NumPy', 'Hadoop', 'Spark', 'Kafka', 'Airflow', 'Snowflake', 'Databricks', 'Power BI', 'Tableau',
+    # DevOps & Cloud
+    'AWS', 'Azure', 'Google Cloud', 'Docker', 'Kubernetes', 'Jenkins', 'GitLab CI', 'GitHub Actions', 'CircleCI', 'Terraform', 'Ansible', 'Prometheus', 'Grafana', 'ELK Stack', 'Linux', 'Nginx', 'Apache',
+    # Database
+    'MySQL', 'PostgreSQL', 'MongoDB', 'Oracle', 'SQL Server', 'Redis', 'Elasticsearch', 'Cassandra', 'DynamoDB', 'MariaDB', 'SQLite', 'Firebase', 'Supabase',
+    # Security & Others
+    'Cybersecurity', 'Blockchain', 'IoT', 'Salesforce', 'SAP', 'Odoo', 'WordPress', 'Shopify', 'Jira', 'Confluence', 'Agile', 'Scrum'
+]
+
+# Liste étendue de compétences
+SKILLS = [
+    # Soft skills
+    'Communication', 'Leadership', 'Travail équipe', 'Autonomie', 'Rigueur', 'Dynamisme',
+    'Créativité', 'Organisation', 'Gestion temps', 'Adaptabilité', 'Problem solving',
+    # Langues
+    'Anglais', 'Français', 'Arabe', 'Espagnol', 'Allemand',
+    # Méthodologies
+    'Agile', 'Scrum', 'Kanban', 'Management', 'Gestion projet', 'Analyse',
+    # Techniques
+    'Comptabilité', 'Marketing', 'Commercial', 'Vente', 'Négociation', 'Service client',
+    'RH', 'Finance', 'Logistique', 'Maintenance', 'Qualité', 'HSE', 'BTP'
+]
+
+# Version de la taxonomie : change dès qu'un terme est ajouté ou retiré
+TAXONOMY_VERSION = hashlib.sha1(
+    ('\n'.join(TECHNOLOGIES) + '\n--\n' + '\n'.join(SKILLS)).encode('utf-8')
+).hexdigest()[:12]
+
+
+def _trie_pattern(terms):
+    """Construit une alternance regex factorisée par préfixes (plus long match en premier)"""
+    trie = {}
+    for term in terms:
+        node = trie
+        for ch in term.lower():
+            node = node.setdefault(ch, {})
+        node[''] = True
+
+    def build(node):
+        optional = '' in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if optional:
+            # Quantificateur gourmand : on tente d'abord la suite la plus longue
+            return '(?:' + body + ')?'
+        return body
+
+    return build(trie)
+
+
+class TermMatcher:
+    """Détecte en une passe tous les termes d'une taxonomie présents dans un texte"""
+
+    def __init__(self, terms):
+        self.terms = list(dict.fromkeys(terms))
+        self._canonical = {t.lower(): t for t in self.terms}
+        # Un terme peut être préfixe d'un autre ('React' / 'React Native', 'R' / 'RH') :
+        # pour chaque terme, on garde la liste des termes qui le préfixent.
+        self._prefixes = {
+            key: [
+                (re.compile(re.escape(other) + r'\b', re.IGNORECASE), other)
+                for other in self.terms
+                if key.startswith(other.lower())
+            ]
+            for key in self._canonical
+        }
+        # Le lookahead rend le match de largeur nulle : deux termes qui se
+        # chevauchent ('Machine Learning' / 'Learning') sont tous deux vus.
+        self._regex = re.compile(r'\b(?=(' + _trie_pattern(self.terms) + r'))', re.IGNORECASE)
+
+    def find(self, text):
+        """Retourne l'ensemble des termes (forme canonique) trouvés dans le texte"""
+        found = set()
+        if not text:
+            return found
+        for m in self._regex.finditer(text):
+            candidates = self._prefixes.get(m.group(1).lower())
+            if not candidates:
+                continue
+            pos = m.start()
+            for term_re, term in candidates:
+                if term not in found and term_re.match(text, pos):
+                    found.add(term)
+        return found
+
+
+class TaxonomyMatcher:
+    """Matcher combiné technologies + compétences (une seule passe sur le texte)"""
+
+    def __init__(self, technologies=TECHNOLOGIES, skills=SKILLS):
+        self.technologies = list(technologies)
+        self.skills = list(skills)
+        self._tech_set = set(self.technologies)
+        self._skill_set = set(self.skills)
+        self._matcher = TermMatcher(self.technologies + self.skills)
+
+    def extract(self, text):
+        """Retourne (technologies, compétences) dans l'ordre de la taxonomie"""
+        found = self._matcher.find(text)
+        techs = [t for t in self.technologies if t in found]
+        skills = [s for s in self.skills if s in found]
+        return techs, skills
+
+
+_default_matcher = None
+
+
+def get_matcher():
+    """Matcher partagé, compilé au premier appel puis réutilisé par le processus"""
+    global _default_matcher
+    if _default_matcher is None:
+        _default_matcher = TaxonomyMatcher()
+    return _default_matcher
+
+
+def extract_terms(text):
+    return get_matcher().extract(text)
+
+
+def extraction_text(title, description=None, company=None):
+    """Texte analysé pour une offre : titre + description + entreprise"""
+    return f"{title} {description or ''} {company or ''}"
@@ -0,0 +1,220 @@
+"""
+Détection des quasi-doublons entre sources (MinHash + LSH).
+
+La même offre publiée sur rekrute.com, emploi.ma et bayt.com a des URLs
+différentes : on calcule une signature MinHash sur les shingles de
+titre + entreprise + ville (+ description), découpée en bandes LSH. Chaque
+bande donne une clé de bucket stockée dans ``job_lsh_buckets`` (indexée) :
+la recherche des candidats est une requête indexée, indépendante de la taille
+de la table. Les candidats sont confirmés par similarité de Jaccard estimée,
+et l'offre rejoint le cluster du meilleur candidat (sinon elle ouvre le sien).
+Seuls les représentants de cluster sont indexés : les buckets ne grossissent
+pas avec les copies d'une même offre.
+
+Backfill des offres existantes: python scraper/near_dup.py
+"""
+import sys
+import os
+import hashlib
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import select, update, bindparam
+
+from models import Job, JobSignature, JobLshBucket
+from text_utils import normalize_words
+
+NUM_PERM = 64
+# Courbe en S du LSH : deux offres de similarité s partagent une bande avec une probabilité
+# 1 - (1 - s^ROWS)^BANDS, qui bascule vers (1/BANDS)^(1/ROWS) ≈ 0.5 avec 16 × 4.
+# Elle doit rester sous SIMILARITY_THRESHOLD : à 0.7, 99 % des paires sont candidates
+# (38 % seulement avec 8 × 8, dont le point de bascule ≈ 0.77 dépassait le seuil).
+# Changer BANDS / ROWS impose de recalculer job_lsh_buckets (migrate.py : lsh_bands).
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SIMILARITY_THRESHOLD = 0.7
+MAX_CANDIDATES = 64
+
+_rng = np.random.RandomState(20240101)
+# Famille multiply-shift : h(x) = ((a * x + b) mod 2^64) >> 32, a impair
+_A = _rng.randint(1, 2 ** 63 - 1, size=NUM_PERM, dtype=np.int64).astype(np.uint64) | np.uint64(1)
+_B = _rng.randint(0, 2 ** 63 - 1, size=NUM_PERM, dtype=np.int64).astype(np.uint64)
+_EMPTY = np.full(NUM_PERM, np.iinfo(np.uint32).max, dtype=np.uint32)
+
+
+def shingles(title, company=None, location=None, description=None, k=5, desc_words=120):
+    """Shingles caractères (k=5) de titre+entreprise+ville, et trigrammes de mots de la description"""
+    head = ' '.join(normalize_words(' '.join(filter(None, [title, company, location]))))
+    result = {head[i:i + k] for i in range(max(1, len(head) - k + 1))} if head else set()
+    words = normalize_words(description)[:desc_words]
+    result.update(' '.join(words[i:i + 3]) for i in range(len(words) - 2))
+    return result
+
+
+def minhash(tokens):
+    """Signature MinHash (NUM_PERM valeurs uint32)"""
+    if not tokens:
+        return _EMPTY.copy()
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(t.encode('utf-8'), digest_size=8).digest(), 'little') for t in tokens),
+        dtype=np.uint64, count=len(tokens),
+    )
+    with np.errstate(over='ignore'):
+        mixed = (_A[:, None] * hashes[None, :] + _B[:, None]) >> np.uint64(32)
+    return mixed.min(axis=1).astype(np.uint32)
+
+
+def signature_for(row):
+    return minhash(shingles(row.get('title'), row.get('company'), row.get('location'), row.get('description_text')))
+
+
+def band_keys(signature):
+    """Une clé de bucket 63 bits par bande (le numéro de bande est inclus dans le hash)"""
+    keys = []
+    for band in range(BANDS):
+        chunk = signature[band * ROWS:(band + 1) * ROWS].tobytes()
+        digest = hashlib.blake2b(chunk, digest_size=8, salt=band.to_bytes(2, 'little')).digest()
+        keys.append(int.from_bytes(digest, 'little') >> 1)
+    return keys
+
+
+def similarity(sig_a, sig_b):
+    """Jaccard estimée entre deux signatures"""
+    return float(np.count_nonzero(sig_a == sig_b)) / NUM_PERM
+
+
+class NearDuplicateIndex:
+    signature = staticmethod(signature_for)
+
+    def __init__(self, threshold=SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+
+    def assign(self, session, items):
+        """
+        Affecte un cluster_id à chaque offre de `items` [(job_id, signature), ...] déjà insérée.
+        Deux requêtes indexées pour tout le lot, plus les écritures.
+        Retourne {job_id: cluster_id}.
+        """
+        if not items:
+            return {}
+        keys_by_job = {job_id: band_keys(sig) for job_id, sig in items}
+        all_keys = {k for keys in keys_by_job.values() for k in keys}
+        new_ids = set(keys_by_job)
+
+        # Candidats en base : lookup indexé sur bucket_key
+        bucket_rows = session.execute(
+            select(JobLshBucket.bucket_key, JobLshBucket.job_id).where(JobLshBucket.bucket_key.in_(all_keys))
+        ).all()
+        buckets = {}
+        for key, job_id in bucket_rows:
+            if job_id not in new_ids:
+                buckets.setdefault(key, []).append(job_id)
+
+        candidate_ids = {j for ids in buckets.values() for j in ids}
+        known = {}
+        if candidate_ids:
+            for job_id, raw in session.execute(
+                select(JobSignature.job_id, JobSignature.signature).where(JobSignature.job_id.in_(candidate_ids))
+            ):
+                known[job_id] = np.frombuffer(raw, dtype=np.uint32)
+
+        clusters, representatives = {}, []
+        for job_id, sig in items:
+            seen, best, best_score = set(), None, self.threshold
+            for key in keys_by_job[job_id]:
+                for cand in buckets.get(key, ())[:MAX_CANDIDATES]:
+                    if cand in seen or cand not in known:
+                        continue
+                    seen.add(cand)
+                    score = similarity(sig, known[cand])
+                    if score >= best_score:
+                        best, best_score = cand, score
+            if best is not None:
+                clusters[job_id] = best
+                continue
+            # Nouveau cluster : l'offre devient candidate pour la suite du lot
+            # (même offre scrapée sur deux sites dans le même run)
+            clusters[job_id] = job_id
+            representatives.append((job_id, sig))
+            known[job_id] = sig
+            for key in keys_by_job[job_id]:
+                buckets.setdefault(key, []).append(job_id)
+
+        if representatives:
+            session.execute(
+                JobSignature.__table__.insert(),
+                [{'job_id': j, 'signature': sig.tobytes()} for j, sig in representatives],
+            )
+            session.execute(
+                JobLshBucket.__table__.insert(),
+                [{'bucket_key': k, 'job_id': j} for j, _ in representatives for k in set(keys_by_job[j])],
+            )
+        session.execute(
+            update(Job.__table__).where(Job.__table__.c.id == bindparam('job_id')).values(cluster_id=bindparam('cid')),
+            [{'job_id': j, 'cid': c} for j, c in clusters.items()],
+        )
+        return clusters
+
+
+def buckets_stale(session):
+    """True si les clés de job_lsh_buckets ont été calculées avec un autre découpage en bandes"""
+    row = session.execute(select(JobSignature.job_id, JobSignature.signature).limit(1)).first()
+    if row is None:
+        return False
+    stored = set(session.execute(select(JobLshBucket.bucket_key).where(JobLshBucket.job_id == row.job_id)).scalars())
+    return stored != set(band_keys(np.frombuffer(row.signature, dtype=np.uint32)))
+
+
+def rebuild_buckets(session, chunk_size=5000):
+    """Recalcule job_lsh_buckets depuis les signatures des représentants (signatures inchangées)"""
+    session.execute(JobLshBucket.__table__.delete())
+    last_id, total = 0, 0
+    while True:
+        rows = session.execute(
+            select(JobSignature.job_id, JobSignature.signature)
+            .where(JobSignature.job_id > last_id)
+            .order_by(JobSignature.job_id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            return total
+        session.execute(JobLshBucket.__table__.insert(), [
+            {'bucket_key': k, 'job_id': job_id}
+            for job_id, raw in rows for k in set(band_keys(np.frombuffer(raw, dtype=np.uint32)))
+        ])
+        last_id = rows[-1].job_id
+        total += len(rows)
+
+
+def backfill(session, chunk_size=1000):
+    """Calcule les clusters des offres qui n'en ont pas encore (par ordre d'id)"""
+    index = NearDuplicateIndex()
+    last_id, total = 0, 0
+    while True:
+        rows = session.execute(
+            select(Job.id, Job.title, Job.company, Job.location, Job.description_text)
+            .where(Job.cluster_id.is_(None), Job.id > last_id)
+            .order_by(Job.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            return total
+        index.assign(session, [
+            (r.id, minhash(shingles(r.title, r.company, r.location, r.description_text))) for r in rows
+        ])
+        session.commit()
+        last_id = rows[-1].id
+        total += len(rows)
+        print(f"  {total} offres traitées")
+
+
+if __name__ == '__main__':
+    from database import session_scope, init_db
+
+    init_db()
+    with session_scope() as session:
+        print("🔗 Calcul des clusters de quasi-doublons...")
+        count = backfill(session)
+    print(f"✅ {count} offres clusterisées")
@@ -1,6 +1,7 @@
-import re
-import json
-import requests
+import time
+import atexit
+import threading
+from collections import Counter
 from datetime import datetime
 import sys
 import os
@@ -8,107 +9,155 @@ import os
 # Ajouter le chemin parent pour les imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from models import db, Job, ScrapingLog, TechnologyStat, CompetenceStat
-from app import create_app
+from config import Config
+from models import Job, ScrapingLog, TechnologyStat, CompetenceStat
+from database import get_session, session_scope, init_db
+from notifications import NotificationDispatcher, enqueue as enqueue_notifications
+import live_events
+from bulk import insert_ignore, upsert_counts
+from rollups import (
+    tech_month_counts, update_tech_monthly, tech_daily_counts, update_tech_daily,
+    update_dimension_counts, update_job_summary,
+)
+from job_terms import TermLinker
+from search import SearchIndexer
+from cities import CityIndex
+from data_version import bump_data_version
+from scraper.matcher import extract_terms, extraction_text, TAXONOMY_VERSION
+from scraper.extraction_cache import get_cache
+from scraper.url_index import UrlIndex
+from scraper.writer import AsyncJobWriter
+from sqlalchemy import select
 
 class DataPipeline:
-    def __init__(self):
-        self.app = create_app(with_scheduler=False)
+    def __init__(self, buffered=False, batch_size=200, flush_interval=10.0):
+        # Session SQLAlchemy simple : pas d'app Flask ni de scheduler dans les process scrapers
+        self.config = Config
+        init_db()
         self.new_jobs_count = 0
+        # Offres soumises / ajoutées par source (progression du run, voir scraper/progress.py)
+        self.found_by_source = Counter()
+        self.added_by_source = Counter()
+
+        # Mode bufferisé : les offres sont accumulées en mémoire puis écrites par lots
+        # (déclenchement sur taille du lot, ou sur délai depuis le dernier flush par un
+        # thread dédié : le buffer est écrit même quand plus aucune offre n'arrive)
+        self.buffered = buffered
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._buffer_urls = set()
+        self._buffer_lock = threading.Lock()
+        # Sérialise les écritures (flush du buffer et lots des workers du writer async) : index
+        # d'URLs, caches des termes / de la recherche et clusters de quasi-doublons sont partagés,
+        # et deux lots concurrents ne verraient pas leurs représentants respectifs avant commit.
+        # Réentrant : flush() le tient déjà quand il appelle _write_rows()
+        self._flush_lock = threading.RLock()
+        self._count_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._flush_thread = None
+        self._flush_stop = threading.Event()
+        self.flush_error = None  # première erreur du flush périodique, relevée par drain()
+        self._writer = None
+        self._near_dups = None
+        self.term_links = TermLinker()
+        self.search_index = SearchIndexer()
+        # Extraction mémorisée par hash du texte + version de la taxonomie (ré-imports, crawls historiques)
+        self.extraction_cache = get_cache()
+        self._extract = self.extraction_cache.memoize('extract', TAXONOMY_VERSION)(extract_terms)
+        # Notifications : événements écrits dans l'outbox avec les offres, envoyés hors du chemin d'ingestion
+        self.dispatcher = NotificationDispatcher(get_session).start() if Config.NOTIFY_WEBHOOK_URL else None
+        # Index des URLs connues, chargé une fois : les contrôles de doublons
+        # deviennent des lookups en mémoire au lieu d'une requête SQL par offre
+        self.url_index = UrlIndex(
+            bloom_threshold=Config.URL_INDEX_BLOOM_THRESHOLD,
+            fp_rate=Config.URL_INDEX_BLOOM_FP_RATE,
+        )
+        # Villes du gazetteer (city_id résolu à la préparation de chaque offre, sans requête)
+        self.cities = CityIndex()
+        with session_scope() as session:
+            self.url_index.load(session)
+            self.cities.load(session)
+
+        if buffered:
+            # Ne rien perdre si le process se termine sans log_run
+            atexit.register(self.flush)
+
+    @property
+    def near_dups(self):
+        # import tardif : numpy n'est chargé qu'à la première écriture, pas au démarrage du scraping
+        if self._near_dups is None:
+            from scraper.near_dup import NearDuplicateIndex
+            self._near_dups = NearDuplicateIndex()
+        return self._near_dups
 
     def is_duplicate(self, url):
-        with self.app.app_context():
-            exists = Job.query.filter_by(url_offre=url).first()
-            return exists is not None
+        if not self.url_index.might_contain(url):
+            return False
+        if self.url_index.exact:
+            return True
+        with session_scope() as session:
+            return self.url_index.contains(url, session)
 
     def extract_details(self, text):
-        """Extraction améliorée des technologies et compétences"""
-        # Liste étendue de technologies
-        technologies = [
-            # Langages
-            'Python', 'Java', 'JavaScript', 'TypeScript', 'PHP', 'C#', 'C++', 'Ruby', 'Go', 'Rust', 'Swift', 'Kotlin', 'Scala', 'R', 'Dart', 'Lua', 'Perl', 'Bash', 'PowerShell',
-            # Frontend
-            'React', 'Angular', 'Vue.js', 'Next.js', 'Nuxt.js', 'Svelte', 'jQuery', 'Bootstrap', 'Tailwind', 'Material UI', 'HTML5', 'CSS3', 'Sass', 'Webpack', 'Vite',
-            # Backend
-            'Node.js', 'Django', 'Flask', 'FastAPI', 'Spring Boot', 'Laravel', 'Symfony', 'Express.js', 'NestJS', 'ASP.NET Core', 'Ruby on Rails', 'GraphQL', 'REST API', 'gRPC',
-            # Mobile
-            'React Native', 'Flutter', 'Android', 'iOS', 'Xamarin', 'Ionic', 'Expo', 'SwiftUI',
-            # Data & AI
-            'Machine Learning', 'Deep Learning', 'Data Science', 'Big Data', 'AI', 'NLP', 'TensorFlow', 'PyTorch', 'Keras', 'Scikit-learn', 'Pandas', 'NumPy', 'Hadoop', 'Spark', 'Kafka', 'Airflow', 'Snowflake', 'Databricks', 'Power BI', 'Tableau',
-            # DevOps & Cloud
-            'AWS', 'Azure', 'Google Cloud', 'Docker', 'Kubernetes', 'Jenkins', 'GitLab CI', 'GitHub Actions', 'CircleCI', 'Terraform', 'Ansible', 'Prometheus', 'Grafana', 'ELK Stack', 'Linux', 'Nginx', 'Apache',
-            # Database
-            'MySQL', 'PostgreSQL', 'MongoDB', 'Oracle', 'SQL Server', 'Redis', 'Elasticsearch', 'Cassandra', 'DynamoDB', 'MariaDB', 'SQLite', 'Firebase', 'Supabase',
-            # Security & Others
-            'Cybersecurity', 'Blockchain', 'IoT', 'Salesforce', 'SAP', 'Odoo', 'WordPress', 'Shopify', 'Jira', 'Confluence', 'Agile', 'Scrum'
-        ]
-        
-        # Liste étendue de compétences
-        skills = [
-            # Soft skills
-            'Communication', 'Leadership', 'Travail équipe', 'Autonomie', 'Rigueur', 'Dynamisme',
-            'Créativité', 'Organisation', 'Gestion temps', 'Adaptabilité', 'Problem solving',
-            # Langues
-            'Anglais', 'Français', 'Arabe', 'Espagnol', 'Allemand',
-            # Méthodologies
-            'Agile', 'Scrum', 'Kanban', 'Management', 'Gestion projet', 'Analyse',
-            # Techniques
-            'Comptabilité', 'Marketing', 'Commercial', 'Vente', 'Négociation', 'Service client',
-            'RH', 'Finance', 'Logistique', 'Maintenance', 'Qualité', 'HSE', 'BTP'
-        ]
-        
-        # Recherche insensible à la casse
-        found_tech = list(set([t for t in technologies if re.search(r'\b' + re.escape(t) + r'\b', text, re.IGNORECASE)]))
-        found_skills = list(set([s for s in skills if re.search(r'\b' + re.escape(s) + r'\b', text, re.IGNORECASE)]))
-        
-        return found_tech, found_skills
+        """Extraction améliorée des technologies et compétences (matcher compilé une fois par processus)"""
+        return self._extract(text)
+
+    def build_row(self, job_data):
+        """Prépare les colonnes d'un Job (extraction incluse) à partir des données scrapées"""
+        # Combiner titre + description + company pour meilleure extraction
+        techs, skills = self.extract_details(
+            extraction_text(job_data['title'], job_data.get('description'), job_data.get('company'))
+        )
+        location = job_data.get('location', 'Maroc')
+        return {
+            'title': job_data['title'],
+            'company': job_data.get('company', 'Non spécifié'),
+            'location': location,
+            'city_id': self.cities.city_id(location),
+            'description_text': job_data.get('description', ''),
+            'url_offre': job_data['url'],
+            'source_site': job_data['source'],
+            'date_posted': job_data.get('date_posted', datetime.utcnow()),
+            'date_scraped': datetime.utcnow(),
+            'technologies': techs,
+            'skills': skills,
+        }
 
     def save_job(self, job_data):
+        if self.buffered:
+            self._enqueue(job_data)
+            return
+
         if self.is_duplicate(job_data['url']):
             return  # Silent skip for known duplicates
 
-        with self.app.app_context():
+        session = get_session()
+        try:
             try:
-                # Combiner titre + description + company pour meilleure extraction
-                full_text = f"{job_data['title']} {job_data.get('description', '')} {job_data.get('company', '')}"
-                techs, skills = self.extract_details(full_text)
-                
-                new_job = Job(
-                    title=job_data['title'],
-                    company=job_data.get('company', 'Non spécifié'),
-                    location=job_data.get('location', 'Maroc'),
-                    description_text=job_data.get('description', ''),
-                    url_offre=job_data['url'],
-                    source_site=job_data['source'],
-                    date_posted=job_data.get('date_posted', datetime.utcnow()),
-                    technologies=techs,
-                    skills=skills
-                )
+                row = self.build_row(job_data)
+                new_job = Job(**row)
                 
-                db.session.add(new_job)
+                session.add(new_job)
+                session.flush()
+                self.term_links.link(session, [(new_job.id, row['technologies'], row['skills'])])
+                self.search_index.index(session, [(new_job.id, row['title'], row['company'], row['description_text'])])
+                clusters = self.near_dups.assign(session, [(new_job.id, self.near_dups.signature(row))])
                 
-                # Update Stats
-                for t in techs:
-                    stat = TechnologyStat.query.filter_by(technology=t).first()
-                    if not stat:
-                        stat = TechnologyStat(technology=t, count=0)
-                        db.session.add(stat)
-                    stat.count += 1
-                    stat.last_updated = datetime.utcnow()
-
-                for s in skills:
-                    stat = CompetenceStat.query.filter_by(competence=s).first()
-                    if not stat:
-                        stat = CompetenceStat(competence=s, count=0)
-                        db.session.add(stat)
-                    stat.count += 1
-                    stat.last_updated = datetime.utcnow()
-
-                db.session.commit()
+                # Update Stats (une seule fois par offre unique : les quasi-doublons ne comptent pas)
+                unique_rows = [row] if clusters[new_job.id] == new_job.id else []
+                self._update_stats(session, [row], unique_rows)
+                new_jobs = [(new_job.id, row) for row in unique_rows]
+                enqueue_notifications(session, new_jobs)
+                live_events.record(session, new_jobs, [row], unique_rows)
+
+                session.commit()
+                self.url_index.add(new_job.url_offre)
                 self.new_jobs_count += 1
-                self.notify_if_needed(new_job)
+                self.added_by_source[row['source_site']] += 1
+                self._notify()
             except Exception as e:
-                db.session.rollback()
+                session.rollback()
                 # Check if it's a duplicate entry error (IntegrityError)
                 if 'Duplicate entry' in str(e) or 'IntegrityError' in str(type(e).__name__):
                     # Silently skip duplicates caught at DB level
@@ -117,19 +166,189 @@ class DataPipeline:
                     # Re-raise other errors
                     print(f"   ⚠️ Erreur sauvegarde: {e}")
                     raise
+        finally:
+            session.close()
+
+    def _enqueue(self, job_data):
+        # Doublon certain : on évite même l'extraction (les "peut-être" du Bloom sont confirmés au flush)
+        if self.url_index.exact and self.url_index.might_contain(job_data['url']):
+            return
+        row = self.build_row(job_data)
+        with self._buffer_lock:
+            if row['url_offre'] in self._buffer_urls:
+                return  # Doublon dans le lot en cours
+            self._buffer_urls.add(row['url_offre'])
+            self._buffer.append(row)
+            should_flush = (
+                len(self._buffer) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+            if self._flush_thread is None:
+                self._flush_thread = threading.Thread(target=self._flush_periodically, name='pipeline-flush', daemon=True)
+                self._flush_thread.start()
+        if should_flush:
+            self.flush()
+
+    def _flush_periodically(self):
+        while not self._flush_stop.wait(min(self.flush_interval, 1.0)):
+            with self._buffer_lock:
+                due = bool(self._buffer) and time.monotonic() - self._last_flush >= self.flush_interval
+            if not due:
+                continue
+            try:
+                self.flush()
+            except Exception as e:
+                # Déjà affichée par _write_rows ; le run sera enregistré en échec par drain()
+                if self.flush_error is None:
+                    self.flush_error = e
+
+    def flush(self):
+        """Écrit le buffer en base : un INSERT multi-lignes + stats agrégées, un seul commit"""
+        with self._flush_lock:
+            with self._buffer_lock:
+                rows, self._buffer = self._buffer, []
+                self._buffer_urls = set()
+                self._last_flush = time.monotonic()
+            return self._write_rows(rows)
+
+    def write_batch(self, jobs):
+        """Prépare et écrit directement un lot d'offres scrapées (appelé par les workers du writer asynchrone)"""
+        rows, seen = [], set()
+        for job_data in jobs:
+            url = job_data['url']
+            if url in seen or (self.url_index.exact and self.url_index.might_contain(url)):
+                continue
+            seen.add(url)
+            rows.append(self.build_row(job_data))
+        return self._write_rows(rows)
+
+    def _write_rows(self, rows):
+        if not rows:
+            return 0
+        with self._flush_lock:
+            return self._write_rows_locked(rows)
+
+    def _write_rows_locked(self, rows):
+        try:
+            with session_scope() as session:
+                # Offres déjà en base : lookup en mémoire (+ une requête de confirmation en mode Bloom)
+                existing = self.url_index.find_existing([r['url_offre'] for r in rows], session)
+                rows = [r for r in rows if r['url_offre'] not in existing]
+                if not rows:
+                    return 0
+
+                # INSERT IGNORE : un doublon inséré entre-temps par un autre process est ignoré
+                stmt = insert_ignore(Job, session.get_bind().dialect.name).values(rows)
+                result = session.execute(stmt)
+                inserted = result.rowcount if result.rowcount is not None and result.rowcount >= 0 else len(rows)
+
+                # Ids des offres insérées, puis rattachement aux clusters de quasi-doublons
+                ids = dict(session.execute(
+                    select(Job.url_offre, Job.id).where(
+                        Job.url_offre.in_([r['url_offre'] for r in rows]), Job.cluster_id.is_(None)
+                    )
+                ).all())
+                self.term_links.link(session, [
+                    (ids[r['url_offre']], r['technologies'], r['skills']) for r in rows if r['url_offre'] in ids
+                ])
+                self.search_index.index(session, [
+                    (ids[r['url_offre']], r['title'], r['company'], r['description_text']) for r in rows if r['url_offre'] in ids
+                ])
+                clusters = self.near_dups.assign(
+                    session, [(ids[r['url_offre']], self.near_dups.signature(r)) for r in rows if r['url_offre'] in ids]
+                )
+                inserted_rows = [r for r in rows if r['url_offre'] in ids]
+                unique_rows = [r for r in inserted_rows if clusters[ids[r['url_offre']]] == ids[r['url_offre']]]
+
+                self._update_stats(session, inserted_rows, unique_rows)
+                new_jobs = [(ids[r['url_offre']], r) for r in unique_rows]
+                enqueue_notifications(session, new_jobs)
+                # Flux SSE du serveur : même transaction que les offres
+                live_events.record(session, new_jobs, inserted_rows, unique_rows)
+        except Exception as e:
+            print(f"   ⚠️ Erreur écriture lot ({len(rows)} offres): {e}")
+            raise
+
+        with self._count_lock:
+            self.new_jobs_count += inserted
+            self.added_by_source.update(r['source_site'] for r in inserted_rows)
+        for row in rows:
+            self.url_index.add(row['url_offre'])
+        self._notify()
+        return inserted
+
+    async def submit(self, job_data):
+        """Point d'entrée des scrapers async : met l'offre en file sans bloquer la boucle d'événements"""
+        config = self.config
+        self.found_by_source[job_data['source']] += 1
+        if not config.SCRAPER_ASYNC_WRITES:
+            # Ancien comportement : écriture synchrone dans la boucle
+            self.save_job(job_data)
+            return
+        if self._writer is None:
+            self._writer = AsyncJobWriter(
+                self.write_batch,
+                maxsize=config.SCRAPER_WRITE_QUEUE_SIZE,
+                workers=config.SCRAPER_WRITE_WORKERS,
+                batch_size=config.SCRAPER_WRITE_BATCH_SIZE,
+            )
+        await self._writer.submit(job_data)
+
+    async def drain(self):
+        """
+        Attend l'écriture de toutes les offres soumises (à appeler en fin de main()).
+        Lève l'erreur du writer (ou du flush périodique) si des lots n'ont pas pu être écrits :
+        le run est en échec.
+        """
+        if self._writer is not None:
+            writer, self._writer = self._writer, None
+            await writer.drain()
+        if self.buffered:
+            self.flush()
+            error, self.flush_error = self.flush_error, None
+            if error is not None:
+                raise RuntimeError(f"Flush périodique des offres en échec: {error}") from error
+
+    def _update_stats(self, session, rows, unique_rows):
+        """
+        Incréments agrégés des tables de stats et des rollups : un upsert atomique par table.
+        `rows` : offres insérées, `unique_rows` : celles qui sont représentantes de leur cluster.
+        """
+        dialect = session.get_bind().dialect.name
+        now = datetime.utcnow()
+        for model, key, counts in (
+            (TechnologyStat, 'technology', Counter(t for r in unique_rows for t in r['technologies'])),
+            (CompetenceStat, 'competence', Counter(s for r in unique_rows for s in r['skills'])),
+        ):
+            stmt = upsert_counts(model, key, counts, dialect, last_updated=now)
+            if stmt is not None:
+                session.execute(stmt)
+        update_tech_monthly(session, tech_month_counts(unique_rows))
+        update_tech_daily(session, tech_daily_counts(unique_rows))
+        new_companies = update_dimension_counts(session, rows, unique_rows)
+        update_job_summary(session, rows, unique_rows, new_companies)
 
-    def notify_if_needed(self, job):
-        # Placeholder for notification logic
-        # requests.post('webhook_url', json=job.to_dict())
-        print(f"New Job Notification: {job.title} at {job.company}")
+    def _notify(self):
+        if self.dispatcher is not None:
+            self.dispatcher.wake()
 
     def log_run(self, status, error=None):
-        with self.app.app_context():
+        self._flush_stop.set()
+        if self.buffered:
+            self.flush()
+        with session_scope() as session:
             log = ScrapingLog(
                 status=status,
                 jobs_added=self.new_jobs_count,
                 error_message=str(error) if error else None,
                 end_time=datetime.utcnow()
             )
-            db.session.add(log)
-            db.session.commit()
+            session.add(log)
+            if self.new_jobs_count:
+                # Invalide les caches de l'API (stats) : le serveur les réchauffe à la prochaine vérification
+                bump_data_version(session)
+        self.extraction_cache.flush()
+        print(self.extraction_cache.report())
+        if self.dispatcher is not None:
+            # Les événements encore en échec seront repris par le dispatcher du serveur Flask
+            self.dispatcher.stop()
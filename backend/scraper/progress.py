@@ -0,0 +1,133 @@
+"""
+Progression d'un run de scraping, publiée dans scrape_runs pour /api/sync/status.
+
+Par site : pages chargées (événement domcontentloaded de la page Playwright),
+offres trouvées / ajoutées (compteurs par source du DataPipeline), durée et
+statut. Un thread écrit l'état en base toutes les SCRAPE_RUN_PROGRESS_INTERVAL
+secondes s'il a changé, au moins toutes les SCRAPE_RUN_HEARTBEAT_INTERVAL
+secondes sinon : c'est aussi le heartbeat qui garde le verrou du type de run
+(scrape_runs.py).
+
+Lancé par le serveur, le scraper reprend le run réservé (SCRAPE_RUN_ID). Lancé
+à la main, il réserve lui-même le type et s'arrête si un run est déjà en cours.
+"""
+import os
+import time
+import threading
+from datetime import datetime
+
+from config import Config
+from database import session_scope
+from models import ScrapeRun
+from scrape_runs import RUN_ID_ENV, new_run_id, acquire_slot, heartbeat, finish_run
+
+
+class RunProgress:
+    def __init__(self, kind, sites):
+        self.kind = kind
+        self.run_id = None
+        self.pipeline = None
+        self.current = None
+        self._sites = {site: {'status': 'pending', 'pages': 0, 'started': None, 'finished': None} for site in sites}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._written = None
+        self._written_at = 0.0
+
+    def start(self, trigger='cli'):
+        """Prend le run en charge ; False si un autre run du même type est actif (lancement manuel)"""
+        now = datetime.utcnow()
+        run_id = os.environ.get(RUN_ID_ENV)
+        with session_scope() as session:
+            if run_id:
+                heartbeat(session, self.kind, run_id, status='running', started_at=now)
+            else:
+                run_id = new_run_id()
+                active = acquire_slot(session, self.kind, run_id, Config.SCRAPE_RUN_STALE_AFTER)
+                if active != run_id:
+                    print(f"⏭️  Un run '{self.kind}' est déjà en cours ({active}) : rien à faire")
+                    return False
+                session.add(ScrapeRun(
+                    id=run_id, kind=self.kind, trigger=trigger, status='running',
+                    requested_at=now, started_at=now, heartbeat_at=now,
+                ))
+        self.run_id = run_id
+        self._thread = threading.Thread(target=self._publish_loop, name='scrape-progress', daemon=True)
+        self._thread.start()
+        return True
+
+    def attach(self, pipeline, page):
+        """Suit les offres du pipeline et les pages chargées par `page`"""
+        self.pipeline = pipeline
+        page.on('domcontentloaded', self._page_loaded)
+
+    def _page_loaded(self, _page):
+        with self._lock:
+            if self.current is not None:
+                self._sites[self.current]['pages'] += 1
+
+    def begin_site(self, site):
+        with self._lock:
+            self.current = site
+            self._sites[site].update(status='running', started=time.monotonic())
+
+    def end_site(self, site, status='done'):
+        """status : done, timeout ou failed"""
+        with self._lock:
+            self._sites[site].update(status=status, finished=time.monotonic())
+            if self.current == site:
+                self.current = None
+
+    def snapshot(self):
+        """{site: {status, pages, found, added, elapsed}} (compteurs lus sur le pipeline)"""
+        found = dict(self.pipeline.found_by_source) if self.pipeline else {}
+        added = dict(self.pipeline.added_by_source) if self.pipeline else {}
+        now = time.monotonic()
+        with self._lock:
+            return {
+                site: {
+                    'status': state['status'],
+                    'pages': state['pages'],
+                    'found': found.get(site, 0),
+                    'added': added.get(site, 0),
+                    'elapsed': round((state['finished'] or now) - state['started'], 1) if state['started'] else None,
+                }
+                for site, state in self._sites.items()
+            }
+
+    def _counters(self, progress):
+        # Ce qui compte pour décider d'une écriture : la durée change à chaque lecture
+        return [(site, s['status'], s['pages'], s['found'], s['added']) for site, s in progress.items()]
+
+    def _publish(self):
+        progress = self.snapshot()
+        counters = self._counters(progress)
+        if counters == self._written and time.monotonic() - self._written_at < Config.SCRAPE_RUN_HEARTBEAT_INTERVAL:
+            return
+        jobs_added = self.pipeline.new_jobs_count if self.pipeline else 0
+        with session_scope() as session:
+            heartbeat(session, self.kind, self.run_id, progress=progress, jobs_added=jobs_added)
+        self._written, self._written_at = counters, time.monotonic()
+
+    def _publish_loop(self):
+        while not self._stop.wait(Config.SCRAPE_RUN_PROGRESS_INTERVAL):
+            try:
+                self._publish()
+            except Exception as e:
+                # Base momentanément indisponible : le scraping continue, prochain essai à l'intervalle suivant
+                print(f"   ⚠️ Progression du run non publiée: {e}")
+
+    def finish(self, status, error=None):
+        """Dernière progression, statut final et libération du type de run"""
+        if self.run_id is None:
+            return
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        with session_scope() as session:
+            finish_run(
+                session, self.kind, self.run_id, status, error=str(error) if error else None,
+                progress=self.snapshot(), jobs_added=self.pipeline.new_jobs_count if self.pipeline else 0,
+            )
+        self.run_id = None
@@ -0,0 +1,190 @@
+"""
+Ré-extraction en masse des technologies / compétences déjà stockées.
+
+Après une correction du matcher ou l'ajout de termes à la taxonomie, les
+colonnes JSON ``technologies`` / ``skills`` des offres existantes sont
+obsolètes. Ce script parcourt ``jobs`` par plages de clé primaire (yield_per),
+ré-extrait chaque plage dans un ProcessPoolExecutor (tous les cœurs), et
+réécrit par UPDATE groupés uniquement les lignes dont le résultat a changé.
+Les tables technologies_stats / competences_stats et les rollups
+tech_monthly_counts / tech_daily_counts sont ensuite reconstruits à partir des
+représentants de cluster (mêmes règles que le pipeline).
+
+Les offres importées par import_ai_data.py (extracted_by = 'ai') gardent
+l'extraction de l'AI, comptée telle quelle dans les stats ; --include-ai les
+ré-extrait avec le matcher et les remet à extracted_by = NULL.
+
+Les offres insérées par un scraper pendant l'exécution ne sont pas comptées
+dans la reconstruction : lancer le script hors des heures de scraping.
+
+Usage: python scraper/reextract.py [--workers N] [--chunk-size N] [--dry-run] [--include-ai]
+"""
+import sys
+import os
+import time
+import argparse
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import select, func, update, delete, bindparam
+
+from models import Job, TechnologyStat, CompetenceStat, EXTRACTED_BY_AI
+from rollups import tech_month_counts, replace_tech_monthly, tech_daily_counts, replace_tech_daily
+from job_terms import TermLinker
+from data_version import bump_data_version
+from scraper.matcher import get_matcher, extraction_text
+
+
+def _extract_chunk(rows, include_ai=False):
+    """
+    Worker : ré-extrait une plage d'offres (sauf celles de l'import AI, sans `include_ai`).
+    Retourne (lignes modifiées [(id, techs, skills)], compteurs techs, compétences, (mois, tech),
+    (tech, source, ville, jour)).
+    """
+    matcher = get_matcher()
+    changed, tech_counts, skill_counts, monthly, daily = [], Counter(), Counter(), Counter(), Counter()
+    for job_id, title, description, company, old_techs, old_skills, date_posted, source, city_id, extracted_by, representative in rows:
+        old_techs, old_skills = old_techs or [], old_skills or []
+        if extracted_by == EXTRACTED_BY_AI and not include_ai:
+            techs, skills = old_techs, old_skills
+        else:
+            techs, skills = matcher.extract(extraction_text(title, description, company))
+        # L'ordre des listes n'a pas de sens : seul un changement d'ensemble justifie une écriture
+        if set(techs) != set(old_techs) or set(skills) != set(old_skills):
+            changed.append((job_id, techs, skills))
+        if representative:
+            tech_counts.update(techs)
+            skill_counts.update(skills)
+            row = {'date_posted': date_posted, 'technologies': techs, 'source_site': source, 'city_id': city_id}
+            monthly.update(tech_month_counts([row]))
+            daily.update(tech_daily_counts([row]))
+    return changed, tech_counts, skill_counts, monthly, daily
+
+
+def iter_chunks(session, chunk_size, yield_per=1000):
+    """Offres par plages d'id [lo, lo + chunk_size) : une requête par plage, lue par paquets"""
+    low, high = session.execute(select(func.min(Job.id), func.max(Job.id))).one()
+    if low is None:
+        return
+    table = Job.__table__
+    for lo in range(low, high + 1, chunk_size):
+        result = session.execute(
+            select(
+                table.c.id, table.c.title, table.c.description_text, table.c.company,
+                table.c.technologies, table.c.skills, table.c.date_posted, table.c.source_site, table.c.city_id,
+                table.c.extracted_by,
+                # Représentant de cluster (ou offre pas encore clusterisée) : compté dans les stats
+                func.coalesce(table.c.cluster_id, table.c.id) == table.c.id,
+            )
+            .where(table.c.id >= lo, table.c.id < lo + chunk_size)
+            .order_by(table.c.id)
+            .execution_options(yield_per=yield_per)
+        )
+        rows = [tuple(r) for r in result]
+        if rows:
+            yield rows
+
+
+def write_changes(session, changed, linker):
+    """UPDATE groupé (executemany) des lignes modifiées, et de leurs associations job_technologies / job_skills"""
+    table = Job.__table__
+    session.execute(
+        update(table).where(table.c.id == bindparam('job_id'))
+        .values(technologies=bindparam('techs'), skills=bindparam('new_skills'), extracted_by=None),
+        [{'job_id': j, 'techs': t, 'new_skills': s} for j, t, s in changed],
+    )
+    linker.relink(session, changed)
+
+
+def rebuild_stats(session, tech_counts, skill_counts):
+    """Remplace le contenu des tables de stats par les compteurs fournis"""
+    now = datetime.utcnow()
+    for model, key, counts in (
+        (TechnologyStat, 'technology', tech_counts),
+        (CompetenceStat, 'competence', skill_counts),
+    ):
+        session.execute(delete(model.__table__))
+        if counts:
+            session.execute(model.__table__.insert(), [
+                {key: name, 'count': count, 'last_updated': now} for name, count in sorted(counts.items())
+            ])
+
+
+def reextract(session_factory, workers=None, chunk_size=5000, dry_run=False, include_ai=False):
+    workers = workers or os.cpu_count() or 1
+    tech_counts, skill_counts, monthly, daily = Counter(), Counter(), Counter(), Counter()
+    scanned = updated = 0
+    linker = TermLinker()
+    start = time.perf_counter()
+
+    def collect(future):
+        nonlocal updated
+        changed, techs, skills, months, days = future.result()
+        tech_counts.update(techs)
+        skill_counts.update(skills)
+        monthly.update(months)
+        daily.update(days)
+        if changed and not dry_run:
+            with writer.begin():
+                write_changes(writer, changed, linker)
+        updated += len(changed)
+
+    reader, writer = session_factory(), session_factory()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=get_matcher) as pool:
+            pending = deque()
+            for rows in iter_chunks(reader, chunk_size):
+                scanned += len(rows)
+                pending.append(pool.submit(_extract_chunk, rows, include_ai))
+                # Au plus 2 plages en vol par worker : la mémoire reste bornée
+                while len(pending) >= workers * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        pending.remove(future)
+                        collect(future)
+                elapsed = time.perf_counter() - start
+                print(f"  {scanned:,} offres lues, {updated:,} modifiées ({scanned / elapsed:,.0f} lignes/s)")
+            for future in pending:
+                collect(future)
+        reader.rollback()
+
+        if not dry_run:
+            with writer.begin():
+                rebuild_stats(writer, tech_counts, skill_counts)
+                replace_tech_monthly(writer, monthly)
+                replace_tech_daily(writer, daily)
+                bump_data_version(writer)
+    finally:
+        reader.close()
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        'scanned': scanned,
+        'updated': updated,
+        'seconds': elapsed,
+        'rows_per_second': scanned / elapsed if elapsed else 0.0,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Ré-extrait technologies et compétences des offres existantes")
+    parser.add_argument('--workers', type=int, default=None, help="processus d'extraction (défaut: tous les cœurs)")
+    parser.add_argument('--chunk-size', type=int, default=5000, help="taille des plages d'id")
+    parser.add_argument('--dry-run', action='store_true', help="compte les changements sans rien écrire")
+    parser.add_argument('--include-ai', action='store_true',
+                        help="ré-extrait aussi les offres de l'import AI (remplace leur extraction)")
+    args = parser.parse_args()
+
+    from database import get_session, init_db
+
+    init_db()
+    print("🔁 Ré-extraction des technologies et compétences...")
+    report = reextract(get_session, workers=args.workers, chunk_size=args.chunk_size, dry_run=args.dry_run,
+                         include_ai=args.include_ai)
+    print(f"✅ {report['scanned']:,} offres analysées, {report['updated']:,} mises à jour "
+          f"en {report['seconds']:.1f}s ({report['rows_per_second']:,.0f} lignes/s)"
+          + (" — dry run, rien n'a été écrit" if args.dry_run else ""))
@@ -1,3 +1,6 @@
+import time
+_START = time.perf_counter()
+
 import asyncio
 import sys
 import os
@@ -15,6 +18,8 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 from scraper.browser import BrowserManager
 from scraper.pipeline import DataPipeline
+from scraper.writer import LoopLagMonitor
+from scraper.progress import RunProgress
 from playwright.async_api import async_playwright
 
 
@@ -92,7 +97,7 @@ async def scrape_emploi_ma(pipeline, browser_manager, page):
                     'source': 'emploi.ma',
                     'date_posted': datetime.utcnow()
                 }
-                pipeline.save_job(job_data)
+                await pipeline.submit(job_data)
                 print(f"   ✅ Ajouté: {title_text.strip()}")
             except Exception as e:
                 print(f"   ⚠️ Erreur extraction Emploi.ma: {e}")
@@ -146,7 +151,7 @@ async def scrape_rekrute(pipeline, browser_manager, page):
                         'source': 'rekrute.com',
                         'date_posted': datetime.utcnow()
                     }
-                    pipeline.save_job(job_data)
+                    await pipeline.submit(job_data)
                     print(f"   ✅ Ajouté: {title_text.strip()}")
             except Exception as e:
                 print(f"   ⚠️ Erreur extraction Rekrute: {e}")
@@ -233,7 +238,7 @@ async def scrape_marocannonces(pipeline, browser_manager, page):
                     'source': 'marocannonces.com',
                     'date_posted': datetime.utcnow()
                 }
-                pipeline.save_job(job_data)
+                await pipeline.submit(job_data)
                 print(f"   ✅ Ajouté: {title_text.strip()} ({full_url})")
             except Exception as e:
                 print(f"   ⚠️ Erreur extraction Marocannonces: {e}")
@@ -310,7 +315,7 @@ async def scrape_indeed_morocco(pipeline, browser_manager, page):
                     'source': 'indeed.com',
                     'date_posted': datetime.utcnow()
                 }
-                pipeline.save_job(job_data)
+                await pipeline.submit(job_data)
                 print(f"   ✅ Ajouté: {title_text.strip()}")
             except Exception as e:
                 print(f"   ⚠️ Erreur extraction Indeed: {e}")
@@ -351,7 +356,7 @@ async def scrape_bayt(pipeline, browser_manager, page):
                         'source': 'bayt.com',
                         'date_posted': datetime.utcnow()
                     }
-                    pipeline.save_job(job_data)
+                    await pipeline.submit(job_data)
                     print(f"   ✅ Ajouté: {title_text.strip()}")
             except Exception as e:
                 print(f"   ⚠️ Erreur extraction Bayt: {e}")
@@ -418,7 +423,7 @@ async def scrape_tanqeeb(pipeline, browser_manager, page):
                         'source': 'tanqeeb.com',
                         'date_posted': datetime.utcnow()
                     }
-                    pipeline.save_job(job_data)
+                    await pipeline.submit(job_data)
                     print(f"   ✅ Ajouté: {title_text.strip()}")
             except Exception as e:
                 print(f"   ⚠️ Erreur extraction Tanqeeb: {e}")
@@ -427,36 +432,84 @@ async def scrape_tanqeeb(pipeline, browser_manager, page):
         print(f"❌ Erreur Tanqeeb.com: {e}")
 
 
+# Ordre de passage : les sites les plus fiables en premier (clé = source_site des offres)
+SITES = (
+    ('emploi.ma', scrape_emploi_ma),
+    ('rekrute.com', scrape_rekrute),
+    ('marocannonces.com', scrape_marocannonces),
+    ('indeed.com', scrape_indeed_morocco),
+    ('bayt.com', scrape_bayt),
+    ('tanqeeb.com', scrape_tanqeeb),
+)
+
+
 async def main():
-    pipeline = DataPipeline()
+    # Un seul run 'standard' à la fois (serveur, scheduler ou lancement manuel)
+    progress = RunProgress('standard', [site for site, _ in SITES])
+    if not progress.start():
+        return
+    status, error = 'failed', None
+    try:
+        status, error = await scrape_all(progress)
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        progress.finish(status, error)
+
+
+async def scrape_all(progress):
+    pipeline = DataPipeline(buffered=True)
     manager = BrowserManager(headless=True)
+    print(f"⚡ Pipeline prêt en {(time.perf_counter() - _START) * 1000:.0f} ms (imports + connexion + index URLs)")
     
     print("=" * 60)
     print("🚀 DÉMARRAGE DU SCRAPING MULTI-SITES (Version Optimisée)")
     print("=" * 60)
     
+    monitor = LoopLagMonitor().start()
+    status, error = 'success', None
+    
     async with async_playwright() as p:
         browser, context, page = await manager.get_context_and_page(p)
+        progress.attach(pipeline, page)
         
         try:
-            # Scraper les sites les plus fiables en premier
-            await scrape_emploi_ma(pipeline, manager, page)
-            await scrape_rekrute(pipeline, manager, page)
-            await scrape_marocannonces(pipeline, manager, page)
-            await scrape_indeed_morocco(pipeline, manager, page)
-            await scrape_bayt(pipeline, manager, page)
-            await scrape_tanqeeb(pipeline, manager, page)
+            for site, scrape in SITES:
+                progress.begin_site(site)
+                try:
+                    await scrape(pipeline, manager, page)
+                except Exception:
+                    progress.end_site(site, 'failed')
+                    raise
+                progress.end_site(site)
             
+            await pipeline.drain()
             pipeline.log_run('success')
             print("=" * 60)
             print(f"✅ SCRAPING TERMINÉ - {pipeline.new_jobs_count} nouveaux jobs ajoutés")
             print("=" * 60)
             
         except Exception as e:
+            status, error = 'failed', e
+            try:
+                # Offres encore en file : écrites avant le log (sans masquer l'erreur du run)
+                await pipeline.drain()
+            except Exception as drain_error:
+                print(f"   ⚠️ {drain_error}")
             pipeline.log_run('failed', str(e))
             print(f"❌ Échec du scraping: {e}")
         finally:
             await browser.close()
+            await monitor.stop()
+            print(monitor.report())
+    
+    if pipeline.new_jobs_count:
+        # Nouvelle version des données : snapshot colonnaire pour les stats
+        # (import tardif : numpy / pyarrow ne ralentissent pas le démarrage du scraping)
+        from analytics_snapshot import refresh_snapshot
+        refresh_snapshot()
+    return status, error
 
 
 if __name__ == "__main__":
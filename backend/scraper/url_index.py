@@ -0,0 +1,95 @@
+"""
+Index en mémoire des URLs déjà en base pour la détection de doublons.
+
+Chargé une seule fois au démarrage du pipeline par une requête en streaming
+sur ``jobs.url_offre``, puis mis à jour à chaque écriture. Tant que la table
+reste sous ``bloom_threshold`` lignes, on garde un set d'empreintes 64 bits
+(réponse exacte). Au-delà, on passe sur un filtre de Bloom : un "non" est
+certain, un "peut-être" est confirmé en base.
+"""
+import math
+import hashlib
+
+from models import Job
+
+
+def _digest(url):
+    return hashlib.blake2b(url.encode('utf-8'), digest_size=16).digest()
+
+
+class BloomFilter:
+    """Filtre de Bloom simple (double hachage sur un digest blake2b)"""
+
+    def __init__(self, capacity, fp_rate=0.001):
+        capacity = max(int(capacity), 1)
+        self.size = max(8, int(-capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray(self.size // 8 + 1)
+
+    def _positions(self, digest):
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, digest):
+        for pos in self._positions(digest):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, digest):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(digest))
+
+
+class UrlIndex:
+    def __init__(self, bloom_threshold=2_000_000, fp_rate=0.001, growth=2.0):
+        self.bloom_threshold = bloom_threshold
+        self.fp_rate = fp_rate
+        self.growth = growth
+        self._hashes = set()
+        self._bloom = None
+        self.size = 0
+        self.db_confirmations = 0
+
+    @property
+    def exact(self):
+        return self._bloom is None
+
+    def load(self, session, chunk_size=50000):
+        """Charge toutes les URLs existantes (une requête, résultats streamés par paquets)"""
+        total = session.query(Job.id).count()
+        self._hashes = set()
+        self._bloom = None
+        self.size = 0
+        if total >= self.bloom_threshold:
+            # Marge de croissance pour garder le taux de faux positifs pendant le run
+            self._bloom = BloomFilter(total * self.growth, self.fp_rate)
+
+        query = session.query(Job.url_offre).execution_options(yield_per=chunk_size)
+        for (url,) in query:
+            self.add(url)
+        return self
+
+    def add(self, url):
+        digest = _digest(url)
+        if self._bloom is not None:
+            self._bloom.add(digest)
+        else:
+            self._hashes.add(int.from_bytes(digest[:8], 'little'))
+        self.size += 1
+
+    def might_contain(self, url):
+        """False = absent de la base (certain), True = présent (exact) ou à confirmer (Bloom)"""
+        digest = _digest(url)
+        if self._bloom is not None:
+            return digest in self._bloom
+        return int.from_bytes(digest[:8], 'little') in self._hashes
+
+    def find_existing(self, urls, session):
+        """Retourne l'ensemble des URLs déjà en base parmi `urls` (une requête au plus en mode Bloom)"""
+        maybe = [u for u in urls if self.might_contain(u)]
+        if not maybe or self.exact:
+            return set(maybe)
+        self.db_confirmations += 1
+        return {u for (u,) in session.query(Job.url_offre).filter(Job.url_offre.in_(maybe))}
+
+    def contains(self, url, session):
+        return url in self.find_existing([url], session)
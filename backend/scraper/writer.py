@@ -0,0 +1,124 @@
+"""
+Étage d'écriture asynchrone entre les scrapers Playwright et MySQL.
+
+Les scrapers font ``await pipeline.submit(job)`` : l'offre est posée dans une
+asyncio.Queue bornée (backpressure quand la base ne suit plus) et des workers
+la vident par lots sur un pool de threads, sans bloquer la boucle d'événements.
+Un lot en échec n'arrête pas les workers ; la première erreur est relevée par
+drain(), pour que le run soit enregistré en échec.
+"""
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AsyncJobWriter:
+    def __init__(self, write_batch, maxsize=500, workers=1, batch_size=100, linger=0.5):
+        self.write_batch = write_batch
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.workers = workers
+        self.batch_size = batch_size
+        self.linger = linger
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job-writer')
+        self._tasks = []
+        self.batches_written = 0
+        self.errors = 0
+        self.error = None  # première erreur d'écriture, relevée par drain()
+        self.backpressure_waits = 0
+
+    def _ensure_started(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def submit(self, job_data):
+        self._ensure_started()
+        if self.queue.full():
+            self.backpressure_waits += 1
+        # Bloque le scraper (et lui seul) tant que la file est pleine
+        await self.queue.put(job_data)
+
+    async def _next_batch(self):
+        batch = [await self.queue.get()]
+        deadline = time.monotonic() + self.linger
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            try:
+                await loop.run_in_executor(self.executor, self.write_batch, batch)
+                self.batches_written += 1
+            except Exception as e:
+                self.errors += 1
+                if self.error is None:
+                    self.error = e
+                print(f"   ⚠️ Erreur écriture lot ({len(batch)} offres): {e}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def drain(self):
+        """
+        Attend que toutes les offres soumises soient traitées puis arrête les workers.
+        Lève la première erreur d'écriture si un lot n'a pas pu être écrit.
+        """
+        if self._tasks:
+            await self.queue.join()
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._tasks = []
+        self.executor.shutdown(wait=True)
+        if self.error is not None:
+            raise RuntimeError(f"{self.errors} lot(s) d'offres non écrit(s): {self.error}") from self.error
+
+
+class LoopLagMonitor:
+    """Mesure le temps pendant lequel la boucle d'événements a été bloquée"""
+
+    def __init__(self, interval=0.05, threshold=0.01):
+        self.interval = interval
+        self.threshold = threshold
+        self.blocked_total = 0.0
+        self.max_lag = 0.0
+        self.stalls = 0
+        self.samples = 0
+        self._task = None
+        self._started = None
+
+    def start(self):
+        self._started = time.monotonic()
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def _run(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = time.monotonic() - expected
+            self.samples += 1
+            if lag > self.threshold:
+                self.blocked_total += lag
+                self.stalls += 1
+            self.max_lag = max(self.max_lag, lag)
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def report(self):
+        elapsed = time.monotonic() - self._started if self._started else 0.0
+        ratio = self.blocked_total / elapsed * 100 if elapsed else 0.0
+        return (f"⏱️  Boucle bloquée: {self.blocked_total:.2f}s sur {elapsed:.1f}s ({ratio:.1f}%), "
+                f"{self.stalls} blocages > {self.threshold * 1000:.0f} ms, max {self.max_lag * 1000:.0f} ms")
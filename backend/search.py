@@ -0,0 +1,167 @@
+"""
+Recherche plein texte des offres (GET /api/jobs/search?q=).
+
+- MySQL : index FULLTEXT ``ft_jobs_search`` sur (title, company, description_text),
+  requête MATCH ... AGAINST en mode booléen (tous les mots requis), classée par
+  pertinence. Les collations utf8mb4 *_ci ignorent accents et diacritiques.
+- Mode embarqué (SQLite en local) : index inversé ``job_search_terms(term, job_id, weight)``
+  rempli à l'ingestion ; score = somme des poids x idf des mots de la requête.
+
+Documents et requêtes passent par text_utils.normalize_words (minuscules, accents
+français et diacritiques arabes retirés) : 'Développeur Fès' trouve 'developpeur fes'.
+
+Backfill de l'index inversé: python search.py
+"""
+import sys
+import os
+import math
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import select, func, false, literal, and_
+from sqlalchemy.orm import aliased
+
+from bulk import insert_ignore
+from models import Job, JobSearchTerm
+from text_utils import normalize_words
+
+FULLTEXT_INDEX = 'ft_jobs_search'
+TITLE_WEIGHT, COMPANY_WEIGHT, DESCRIPTION_WEIGHT = 3, 2, 1
+# Seul le début de la description est indexé : l'index inversé reste proportionnel au nombre d'offres
+DESCRIPTION_WORDS = 200
+# innodb_ft_min_token_size : MySQL n'indexe pas les mots plus courts
+MYSQL_MIN_TOKEN = 3
+
+STOPWORDS = {
+    # Français (forme pliée)
+    'a', 'au', 'aux', 'avec', 'ce', 'ces', 'dans', 'de', 'des', 'du', 'en', 'et', 'est', 'il', 'la', 'le',
+    'les', 'leur', 'nous', 'ou', 'par', 'pas', 'pour', 'qui', 'que', 'sa', 'se', 'ses', 'son', 'sur',
+    'un', 'une', 'vos', 'votre', 'vous', 'h', 'f',
+    # Anglais
+    'an', 'and', 'for', 'in', 'of', 'on', 'the', 'to', 'with',
+    # Arabe
+    'في', 'من', 'على', 'الى', 'عن', 'مع',
+}
+
+
+def query_terms(q):
+    """Mots distincts de la requête, pliés, sans mots vides"""
+    terms = []
+    for word in normalize_words(q):
+        if word not in STOPWORDS and word not in terms:
+            terms.append(word[:64])
+    return terms
+
+
+def document_terms(title, company=None, description=None):
+    """Counter {mot: poids} d'une offre (le titre compte plus que l'entreprise, puis la description)"""
+    weights = Counter()
+    for text, weight, limit in (
+        (title, TITLE_WEIGHT, None),
+        (company, COMPANY_WEIGHT, None),
+        (description, DESCRIPTION_WEIGHT, DESCRIPTION_WORDS),
+    ):
+        for word in normalize_words(text)[:limit]:
+            if word not in STOPWORDS:
+                weights[word[:64]] += weight
+    return weights
+
+
+def uses_fulltext(dialect_name):
+    return dialect_name == 'mysql'
+
+
+class SearchIndexer:
+    """Alimente l'index inversé à l'ingestion (sans effet sur MySQL : l'index FULLTEXT suit la table)"""
+
+    def index(self, session, jobs):
+        """Indexe [(job_id, title, company, description), ...]"""
+        dialect = session.get_bind().dialect.name
+        if uses_fulltext(dialect) or not jobs:
+            return 0
+        rows = [
+            {'term': term, 'job_id': job_id, 'weight': min(weight, 32767)}
+            for job_id, title, company, description in jobs
+            for term, weight in document_terms(title, company, description).items()
+        ]
+        if rows:
+            session.execute(insert_ignore(JobSearchTerm, dialect), rows)
+        return len(rows)
+
+
+def _no_results(query):
+    return query.add_columns(literal(0).label('score')).filter(false())
+
+
+def search_query(session, query, q):
+    """
+    Restreint `query` (sur Job) aux offres contenant tous les mots de `q`, triées par pertinence.
+    Les éléments de la requête retournée sont des tuples (Job, score).
+    """
+    terms = query_terms(q)
+    if uses_fulltext(session.get_bind().dialect.name):
+        from sqlalchemy.dialects.mysql import match
+
+        terms = [t for t in terms if len(t) >= MYSQL_MIN_TOKEN]
+        if not terms:
+            return _no_results(query)
+        relevance = match(
+            Job.title, Job.company, Job.description_text,
+            against=' '.join(f'+{t}' for t in terms),
+        ).in_boolean_mode()
+        return query.filter(relevance).add_columns(relevance.label('score'))\
+            .order_by(relevance.desc(), Job.date_posted.desc())
+
+    if not terms:
+        return _no_results(query)
+    # idf par mot : fréquence documentaire lue sur l'index (N approximé par le plus grand id)
+    total = session.execute(select(func.max(Job.id))).scalar() or 1
+    df = dict(session.execute(
+        select(JobSearchTerm.term, func.count()).where(JobSearchTerm.term.in_(terms)).group_by(JobSearchTerm.term)
+    ).all())
+    if len(df) < len(terms):
+        # Un des mots n'apparaît nulle part : aucune offre ne les contient tous
+        return _no_results(query)
+    # Évaluation pilotée par le mot le plus rare : ses postings donnent les candidats, les autres mots
+    # sont vérifiés par lookup sur la clé primaire (term, job_id) au lieu de parcourir leurs postings
+    terms.sort(key=lambda t: df[t])
+    postings = [aliased(JobSearchTerm) for _ in terms]
+    driver = postings[0]
+    score = sum(p.weight * math.log(1 + total / df[t]) for p, t in zip(postings, terms))
+    scores = select(driver.job_id, score.label('score')).where(driver.term == terms[0])
+    for p, t in zip(postings[1:], terms[1:]):
+        scores = scores.join(p, and_(p.term == t, p.job_id == driver.job_id))
+    scores = scores.subquery()
+    return query.join(scores, scores.c.job_id == Job.id).add_columns(scores.c.score)\
+        .order_by(scores.c.score.desc(), Job.date_posted.desc())
+
+
+def backfill(session, chunk_size=2000):
+    """Indexe toutes les offres existantes dans l'index inversé (relançable : doublons ignorés)"""
+    indexer = SearchIndexer()
+    last_id, total = 0, 0
+    while True:
+        rows = session.execute(
+            select(Job.id, Job.title, Job.company, Job.description_text)
+            .where(Job.id > last_id)
+            .order_by(Job.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            return total
+        indexer.index(session, [tuple(r) for r in rows])
+        last_id = rows[-1].id
+        total += len(rows)
+
+
+if __name__ == '__main__':
+    from database import session_scope, init_db
+
+    init_db()
+    with session_scope() as session:
+        if uses_fulltext(session.get_bind().dialect.name):
+            print("ℹ️  MySQL : la recherche utilise l'index FULLTEXT (python migrate.py), rien à faire")
+        else:
+            print("🔎 Indexation plein texte des offres...")
+            print(f"✅ {backfill(session)} offres indexées")
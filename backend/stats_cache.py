@@ -0,0 +1,191 @@
+"""
+Cache des réponses des endpoints /api/stats/*.
+
+Les agrégations ne changent qu'à la fin d'un run de scraping (ou d'un import) :
+les réponses JSON sont gardées dans un backend pluggable (mémoire du process,
+LRU borné en entrées et en octets, ou Redis partagé entre workers) avec un TTL.
+La clé contient la version des données (data_version.py) : quand un run
+l'incrémente, les anciennes entrées ne sont plus lues. Un thread du serveur
+surveille cette version, vide le cache mémoire et réchauffe les routes
+enregistrées dès qu'elle change.
+"""
+import time
+import threading
+import functools
+from collections import OrderedDict
+
+from flask import current_app, request
+
+from data_version import read_data_version
+
+
+class MemoryBackend:
+    """LRU en mémoire du process, borné en nombre d'entrées et en octets, avec TTL"""
+
+    def __init__(self, max_entries=512, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()  # clé -> (expiration, valeur)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            if item[0] < time.monotonic():
+                self._remove(key)
+                return None
+            self._data.move_to_end(key)
+            return item[1]
+
+    def set(self, key, value, ttl):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._bytes += len(value)
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._data)))
+
+    def _remove(self, key):
+        _, value = self._data.pop(key)
+        self._bytes -= len(value)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+
+class RedisBackend:
+    """Backend partagé entre process / workers (dépendance optionnelle : pip install redis)"""
+
+    def __init__(self, url, prefix='observatoire:stats:'):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, value, ttl):
+        self.client.setex(self.prefix + key, int(ttl), value)
+
+    def clear(self):
+        # Les entrées d'une ancienne version expirent d'elles-mêmes (TTL) : rien à faire
+        pass
+
+
+def make_backend(config):
+    if config.get('STATS_CACHE_BACKEND') == 'redis':
+        return RedisBackend(config['STATS_CACHE_REDIS_URL'])
+    return MemoryBackend(config.get('STATS_CACHE_MAX_ENTRIES', 512), config.get('STATS_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+
+
+class StatsCache:
+    def __init__(self, app, backend=None):
+        self.app = app
+        self.backend = backend or make_backend(app.config)
+        self.ttl = app.config.get('STATS_CACHE_TTL', 3600)
+        self.poll_interval = app.config.get('STATS_CACHE_POLL_INTERVAL', 5)
+        self.paths = []
+        self.hits = self.misses = 0
+        self._version = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._stop = threading.Event()
+
+    def version(self):
+        """Version des données, relue en base au plus une fois par poll_interval"""
+        now = time.monotonic()
+        if self._version is None or now - self._checked >= self.poll_interval:
+            with self._lock:
+                if self._version is None or now - self._checked >= self.poll_interval:
+                    from extensions import db
+
+                    with self.app.app_context():
+                        version = read_data_version(db.session)
+                        db.session.remove()
+                    self._checked = now
+                    if version != self._version:
+                        previous, self._version = self._version, version
+                        if previous is not None:
+                            self.backend.clear()
+        return self._version
+
+    def refresh(self):
+        """Relit la version tout de suite ; si elle a changé, réchauffe le cache. Retourne True si changée."""
+        before = self._version
+        self._checked = 0.0
+        changed = self.version() != before
+        if changed:
+            self.warm()
+        return changed
+
+    def warm(self):
+        """Recalcule les routes enregistrées (paramètres par défaut) pour la version courante"""
+        client = self.app.test_client()
+        start = time.perf_counter()
+        for path in self.paths:
+            try:
+                client.get(path)
+            except Exception as e:
+                print(f"⚠️ Préchauffage {path}: {e}")
+        print(f"🔥 Cache stats réchauffé (version {self._version}, {len(self.paths)} routes, "
+              f"{(time.perf_counter() - start) * 1000:.0f} ms)")
+
+    def start_watcher(self):
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, name='stats-cache-watcher', daemon=True)
+            self._watcher.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _watch(self):
+        self.refresh()
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"⚠️ Surveillance version des données: {e}")
+
+    def key(self):
+        args = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+        return f'{self.version()}:{request.path}?{args}'
+
+
+def cached_response(view):
+    """Décorateur des routes de stats : réponse JSON servie depuis le cache tant que les données n'ont pas changé"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        cache = current_app.extensions.get('stats_cache')
+        if cache is None:
+            return view(*args, **kwargs)
+        key = cache.key()
+        body = cache.backend.get(key)
+        if body is not None:
+            cache.hits += 1
+            return current_app.response_class(body, mimetype='application/json')
+        cache.misses += 1
+        response = current_app.make_response(view(*args, **kwargs))
+        if response.status_code == 200:
+            cache.backend.set(key, response.get_data(), cache.ttl)
+        return response
+    wrapper.stats_cached = True
+    return wrapper
+
+
+def cacheable_paths(app):
+    """Routes GET sans paramètre d'URL décorées par cached_response (à réchauffer)"""
+    return sorted(
+        rule.rule for rule in app.url_map.iter_rules()
+        if not rule.arguments and getattr(app.view_functions[rule.endpoint], 'stats_cached', False)
+    )
@@ -0,0 +1,116 @@
+"""
+Migration complète d'une base au schéma d'origine (avant rollups, clusters, villes...).
+
+Usage: python -m pytest tests
+"""
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, inspect, text
+
+from migrate import run_migrations
+
+# Tables du premier schéma (models.py initial), telles que créées par db.create_all() sur SQLite
+BASELINE_SCHEMA = (
+    """CREATE TABLE jobs (
+        id INTEGER NOT NULL PRIMARY KEY,
+        title VARCHAR(255) NOT NULL,
+        company VARCHAR(255),
+        location VARCHAR(255),
+        skills JSON,
+        technologies JSON,
+        description_text TEXT,
+        salary VARCHAR(100),
+        date_posted DATETIME,
+        source_site VARCHAR(100),
+        url_offre VARCHAR(500) NOT NULL UNIQUE,
+        date_scraped DATETIME,
+        is_new BOOLEAN
+    )""",
+    "CREATE INDEX ix_jobs_location ON jobs (location)",
+    "CREATE INDEX ix_jobs_date_posted ON jobs (date_posted)",
+    """CREATE TABLE scraping_logs (
+        id INTEGER NOT NULL PRIMARY KEY,
+        start_time DATETIME,
+        end_time DATETIME,
+        jobs_found INTEGER,
+        jobs_added INTEGER,
+        status VARCHAR(50),
+        error_message TEXT
+    )""",
+    """CREATE TABLE technologies_stats (
+        id INTEGER NOT NULL PRIMARY KEY,
+        technology VARCHAR(100),
+        count INTEGER,
+        last_updated DATETIME
+    )""",
+    "CREATE INDEX ix_technologies_stats_technology ON technologies_stats (technology)",
+    """CREATE TABLE competences_stats (
+        id INTEGER NOT NULL PRIMARY KEY,
+        competence VARCHAR(100),
+        count INTEGER,
+        last_updated DATETIME
+    )""",
+    "CREATE INDEX ix_competences_stats_competence ON competences_stats (competence)",
+)
+
+JOBS = [
+    (1, 'Développeur Python', 'ACME', 'Casablanca / Sidi Maarouf', ['Python', 'Django'], '2024-03-04 10:00:00', 'emploi.ma'),
+    (2, 'Ingénieur Data', 'Beta', 'Rabat - Agdal', ['Python', 'SQL'], '2024-03-20 09:00:00', 'rekrute.com'),
+    (3, 'Dev Front', 'ACME', 'Maroc', ['React'], '2024-04-02 08:00:00', 'bayt.com'),
+]
+
+
+def baseline_engine(path):
+    engine = create_engine(f'sqlite:///{path}')
+    with engine.begin() as conn:
+        for statement in BASELINE_SCHEMA:
+            conn.exec_driver_sql(statement)
+        for job_id, title, company, location, techs, posted, source in JOBS:
+            conn.execute(
+                text("INSERT INTO jobs (id, title, company, location, skills, technologies, description_text, "
+                     "date_posted, source_site, url_offre, date_scraped, is_new) "
+                     "VALUES (:id, :title, :company, :location, '[]', :techs, '', :posted, :source, :url, :posted, 1)"),
+                {'id': job_id, 'title': title, 'company': company, 'location': location,
+                 'techs': json.dumps(techs), 'posted': posted, 'source': source, 'url': f'https://example.ma/{job_id}'},
+            )
+        # Doublon de nom (pas encore de clé unique) : fusionné par la migration
+        conn.execute(text("INSERT INTO technologies_stats (technology, count) VALUES ('Python', 1), ('Python', 1)"))
+    return engine
+
+
+def test_migrates_baseline_schema(tmp_path):
+    engine = baseline_engine(tmp_path / 'baseline.db')
+
+    run_migrations(engine)
+
+    columns = {c['name'] for c in inspect(engine).get_columns('jobs')}
+    assert {'cluster_id', 'city_id', 'extracted_by'} <= columns
+    with engine.connect() as conn:
+        cities = dict(conn.execute(text(
+            "SELECT jobs.id, cities.name FROM jobs LEFT JOIN cities ON cities.id = jobs.city_id"
+        )).all())
+        assert cities == {1: 'Casablanca', 2: 'Rabat', 3: None}
+        assert conn.execute(text("SELECT count FROM technologies_stats WHERE technology = 'Python'")).scalars().all() == [2]
+        assert dict(conn.execute(text(
+            "SELECT month, count FROM tech_monthly_counts WHERE technology = 'Python'"
+        )).all()) == {'2024-03': 2}
+        city_ids = conn.execute(text("SELECT city_id FROM jobs WHERE city_id IS NOT NULL")).scalars().all()
+        assert dict(conn.execute(text(
+            "SELECT value, count FROM job_dimension_counts WHERE dimension = 'city_id'"
+        )).all()) == {'': 1, **{str(city_id): 1 for city_id in city_ids}}
+        assert conn.execute(text("SELECT total_jobs, total_companies FROM stats_summary")).one() == (3, 2)
+        assert conn.execute(text("SELECT SUM(count) FROM tech_daily_counts WHERE technology = 'Python' AND source_site = '*' AND city_id = 0")).scalar() == 2
+
+
+def test_migrations_are_rerunnable(tmp_path):
+    engine = baseline_engine(tmp_path / 'baseline.db')
+    run_migrations(engine)
+    run_migrations(engine)
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT total_jobs FROM stats_summary")).scalar() == 3
+        assert conn.execute(text("SELECT COUNT(*) FROM jobs WHERE city_id IS NOT NULL")).scalar() == 2
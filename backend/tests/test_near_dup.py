@@ -0,0 +1,64 @@
+"""
+Quasi-doublons (scraper/near_dup.py) : les paires confirmables (similarité >= seuil) partagent une bande LSH.
+
+Usage: python -m pytest tests
+"""
+import os
+import sys
+import random
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from models import Base
+from scraper.near_dup import NearDuplicateIndex, SIMILARITY_THRESHOLD, minhash, shingles, similarity
+
+WORDS = (
+    "développeur ingénieur data python java react devops cloud sécurité réseau analyste projet équipe "
+    "client expérience maîtrise agile scrum docker kubernetes sql api web mobile backend frontend stage "
+    "junior senior mission poste profil formation diplôme anglais français autonomie rigueur gestion"
+).split()
+
+
+def repost_pairs(count=200, seed=11):
+    """(offre, même offre republiée sur un autre site : casse, '(H/F)', '- Maroc', quelques mots changés)"""
+    rnd = random.Random(seed)
+    for _ in range(count):
+        description = [rnd.choice(WORDS) for _ in range(rnd.randint(40, 120))]
+        original = ('Ingénieur DevOps', 'Inwi', 'Casablanca', ' '.join(description))
+        for _ in range(rnd.randint(1, 12)):
+            description[rnd.randrange(len(description))] = rnd.choice(WORDS)
+        repost = ('INGENIEUR DEVOPS (H/F)', 'Inwi', 'Casablanca - Maroc', ' '.join(description))
+        yield minhash(shingles(*original)), minhash(shingles(*repost))
+
+
+@pytest.fixture
+def session():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def test_pairs_above_threshold_are_clustered(session):
+    index = NearDuplicateIndex()
+    confirmable = found = 0
+    scores = []
+    for i, (original, repost) in enumerate(repost_pairs()):
+        score = similarity(original, repost)
+        if score < SIMILARITY_THRESHOLD:
+            continue
+        confirmable += 1
+        scores.append(score)
+        first, second = 2 * i + 1, 2 * i + 2
+        index.assign(session, [(first, original)])
+        found += index.assign(session, [(second, repost)])[second] == first
+        session.rollback()
+
+    # Des paires à la limite du seuil font partie du jeu : c'est là que 8 bandes × 8 lignes les perdait
+    assert min(scores) < SIMILARITY_THRESHOLD + 0.05
+    assert confirmable >= 50
+    assert found == confirmable
@@ -0,0 +1,22 @@
+"""
+Normalisation de texte partagée (déduplication, recherche)
+"""
+import re
+import unicodedata
+
+_NON_WORD = re.compile(r'[^\w]+', re.UNICODE)
+
+
+def fold_accents(text):
+    """'Développeur Fès' -> 'developpeur fes' (minuscules, sans diacritiques ; l'arabe est conservé)"""
+    if not text:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', text)
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    # Tatweel arabe : purement décoratif
+    return stripped.replace('ـ', '').casefold()
+
+
+def normalize_words(text):
+    """Texte plié puis découpé en mots (ponctuation et underscores retirés)"""
+    return [w for w in _NON_WORD.sub(' ', fold_accents(text)).replace('_', ' ').split() if w]
@@ -0,0 +1,15 @@
+"""
+Point d'entrée de production (serveur WSGI multi-workers, sans le serveur de développement Flask).
+
+    gunicorn -c gunicorn.conf.py wsgi:app                      (Linux / macOS)
+    waitress-serve --port=5000 --threads=16 wsgi:app           (Windows, un process multi-threads)
+
+Chaque worker crée son application : pool de connexions (DB_POOL_*), cache des
+stats surveillé, flux SSE. Un seul worker est élu pour le scraping horaire et
+les notifications (leader.py, SCHEDULER_LOCK=file|db) ; pas de scraping au démarrage.
+
+Schéma à jour avant de lancer les workers : python migrate.py
+"""
+from app import create_app
+
+app = create_app(elect_scheduler=True)
@@ -4,19 +4,23 @@ import { Download } from 'lucide-react';
 
 interface Props {
     className?: string;
+    filters?: { city?: string; company?: string; tech?: string };
 }
 
-export const ExportButton: React.FC<Props> = ({ className = '' }) => {
+export const ExportButton: React.FC<Props> = ({ className = '', filters }) => {
+    // Jobs passe toujours un objet : seuls les filtres renseignés comptent (comme dans getExportUrl)
+    const isFiltered = Object.values(filters ?? {}).some(Boolean);
+
     const handleExport = () => {
         // Direct navigation to the download URL
-        window.location.href = api.getExportUrl();
+        window.location.href = api.getExportUrl(filters);
     };
 
     return (
         <button
             onClick={handleExport}
             className={`inline-flex items-center gap-2 px-4 py-2 bg-indigo-600 hover:bg-indigo-700 text-white font-medium rounded-lg transition-colors shadow-sm ${className}`}
-            title="Télécharger toutes les offres en CSV"
+            title={isFiltered ? "Télécharger les offres filtrées en CSV" : "Télécharger toutes les offres en CSV"}
         >
             <Download size={18} />
             <span>Exporter CSV</span>
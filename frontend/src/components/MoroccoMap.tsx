@@ -3,8 +3,15 @@ import { motion } from 'framer-motion';
 import { MapPin } from 'lucide-react';
 import { ComposableMap, Geographies, Geography, Marker } from 'react-simple-maps';
 
+interface MapCity {
+    name: string;
+    count: number;
+    latitude?: number | null;
+    longitude?: number | null;
+}
+
 interface MoroccoMapProps {
-    cities: { name: string; count: number }[];
+    cities: MapCity[];
 }
 
 // Coordonnées géographiques réelles des villes (longitude, latitude)
@@ -44,6 +51,12 @@ const CITY_COORDINATES: Record<string, [number, number]> = {
     'Sidi Maarouf': [-7.6500, 33.5167],
 };
 
+// Coordonnées fournies par l'API (gazetteer des villes), sinon table ci-dessus
+const coordinatesOf = (city: MapCity): [number, number] | undefined =>
+    city.latitude != null && city.longitude != null
+        ? [city.longitude, city.latitude]
+        : CITY_COORDINATES[city.name];
+
 // Fichier TopoJSON local du Maroc (cloné depuis GitHub)
 const MOROCCO_GEOJSON = "/morocco-complete-map-geojson-topojson/morocco_map.topojson";
 
@@ -67,7 +80,7 @@ export const MoroccoMap = ({ cities }: MoroccoMapProps) => {
                 <div className="w-52 flex-shrink-0 overflow-y-auto pr-2" style={{ maxHeight: '700px' }}>
                     <div className="space-y-1">
                         {cities
-                            .filter(city => CITY_COORDINATES[city.name])
+                            .filter(city => coordinatesOf(city))
                             .sort((a, b) => b.count - a.count)
                             .map((city, index) => (
                                 <motion.div
@@ -135,9 +148,9 @@ export const MoroccoMap = ({ cities }: MoroccoMapProps) => {
 
                         {/* Marqueurs des villes */}
                         {cities
-                            .filter(city => CITY_COORDINATES[city.name])
+                            .filter(city => coordinatesOf(city))
                             .map((city, index) => {
-                                const coordinates = CITY_COORDINATES[city.name];
+                                const coordinates = coordinatesOf(city)!;
                                 const size = 20 + (city.count / maxCount) * 25;  // Équilibré: 20-45px au lieu de 12-48px
                                 const isHovered = hoveredCity === city.name;
 
@@ -21,19 +21,13 @@ const Dashboard = () => {
         const fetchData = async () => {
             try {
                 setLoading(true);
-                const [globalData, techData, regionData, companyData, sourceData] = await Promise.all([
-                    api.getGlobalStats(),
-                    api.getTechStats(),
-                    api.getRegionStats(),
-                    api.getCompanyStats(),
-                    api.getSourceStats(),
-                ]);
+                const bundle = await api.getStatsBundle();
 
-                setStats(globalData);
-                setTechStats(techData.slice(0, 10)); // Top 10
-                setRegionStats(regionData); // Toutes les villes pour la carte
-                setCompanyStats(companyData.slice(0, 10)); // Top 10
-                setSourceStats(sourceData);
+                setStats(bundle.global);
+                setTechStats(bundle.technologies.slice(0, 10)); // Top 10
+                setRegionStats(bundle.regions); // Toutes les villes pour la carte
+                setCompanyStats(bundle.companies.slice(0, 10)); // Top 10
+                setSourceStats(bundle.sources);
             } catch (error) {
                 console.error('Erreur lors du chargement des données:', error);
             } finally {
@@ -44,7 +38,20 @@ const Dashboard = () => {
         fetchData();
         // Rafraîchir toutes les 30 secondes
         const interval = setInterval(fetchData, 200000);
-        return () => clearInterval(interval);
+        // Compteurs mis à jour en direct à chaque lot d'offres commité par les scrapers
+        const unsubscribe = api.subscribeToEvents({
+            onStats: (delta) => setStats((current) => current && {
+                ...current,
+                total_jobs: delta.totals?.total_jobs ?? current.total_jobs + delta.jobs,
+                total_companies: delta.totals?.total_companies ?? current.total_companies,
+                new_jobs_24h: current.new_jobs_24h + delta.jobs,
+            }),
+            onResync: fetchData,
+        });
+        return () => {
+            clearInterval(interval);
+            unsubscribe();
+        };
     }, []);
 
     const statCards = [
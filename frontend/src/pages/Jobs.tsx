@@ -64,7 +64,13 @@ const Jobs = () => {
                     <h2 className="text-3xl font-bold tracking-tight text-foreground">Offres d'emploi</h2>
                     <p className="text-muted-foreground mt-1">Parcourez les dernières opportunités</p>
                 </div>
-                <ExportButton />
+                <ExportButton
+                    filters={{
+                        city: cityFilter || undefined,
+                        company: companyFilter || undefined,
+                        tech: techFilter || undefined,
+                    }}
+                />
             </div>
 
             {/* Filtres */}
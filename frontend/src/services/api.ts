@@ -1,5 +1,5 @@
 // Service API pour communiquer avec le backend
-import type { Job, GlobalStats, TechStat, CompetenceStat, RegionStat } from '../types';
+import type { Job, GlobalStats, TechStat, CompetenceStat, RegionStat, StatsBundle, ScrapeRun, ScrapeRunStart, ScrapingStatus, LiveEventHandlers } from '../types';
 
 const API_BASE_URL = 'http://localhost:5000/api';
 
@@ -11,6 +11,13 @@ export const api = {
         return response.json();
     },
 
+    // Toutes les statistiques du dashboard en une seule requête
+    async getStatsBundle(): Promise<StatsBundle> {
+        const response = await fetch(`${API_BASE_URL}/stats/bundle`);
+        if (!response.ok) throw new Error('Failed to fetch stats bundle');
+        return response.json();
+    },
+
     // Récupérer les jobs avec filtres
     async getJobs(params?: {
         page?: number;
@@ -60,19 +67,38 @@ export const api = {
     },
 
     // Lancer le scraping manuel
-    async runScraping(): Promise<{ status: string; message: string }> {
+    async runScraping(): Promise<ScrapeRunStart> {
         const response = await fetch(`${API_BASE_URL}/sync/run`, { method: 'POST' });
         if (!response.ok) throw new Error('Failed to run scraping');
         return response.json();
     },
 
     // Récupérer le statut du scraping
-    async getScrapingStatus(): Promise<{ status: string; last_run?: string; jobs_added?: number }> {
+    async getScrapingStatus(): Promise<ScrapingStatus> {
         const response = await fetch(`${API_BASE_URL}/sync/status`);
         if (!response.ok) throw new Error('Failed to fetch scraping status');
         return response.json();
     },
 
+    // Suivre un run précis (run_id retourné au lancement) : progression par site
+    async getScrapeRun(runId: string): Promise<ScrapeRun> {
+        const response = await fetch(`${API_BASE_URL}/sync/status?run_id=${encodeURIComponent(runId)}`);
+        if (!response.ok) throw new Error('Failed to fetch scrape run');
+        return response.json();
+    },
+
+    // Flux temps réel (SSE) des nouvelles offres ; retourne la fonction de désabonnement
+    subscribeToEvents(handlers: LiveEventHandlers): () => void {
+        const source = new EventSource(`${API_BASE_URL}/stream/events`);
+        const listen = <T,>(event: string, handler?: (data: T) => void) => {
+            if (handler) source.addEventListener(event, (e) => handler(JSON.parse((e as MessageEvent).data)));
+        };
+        listen('jobs', handlers.onJobs);
+        listen('stats', handlers.onStats);
+        listen('resync', handlers.onResync ? () => handlers.onResync?.() : undefined);
+        return () => source.close();
+    },
+
     // Récupérer les stats entreprises
     async getCompanyStats(): Promise<{ name: string; count: number }[]> {
         const response = await fetch(`${API_BASE_URL}/stats/companies`);
@@ -87,9 +113,22 @@ export const api = {
         return response.json();
     },
 
-    // URL pour l'export CSV
-    getExportUrl(): string {
-        return `${API_BASE_URL}/jobs/export`;
+    // URL pour l'export (mêmes filtres que la liste des offres)
+    getExportUrl(params?: {
+        city?: string;
+        company?: string;
+        tech?: string;
+        format?: 'csv' | 'ndjson' | 'parquet';
+        gzip?: boolean;
+    }): string {
+        const queryParams = new URLSearchParams();
+        if (params?.city) queryParams.append('city', params.city);
+        if (params?.company) queryParams.append('company', params.company);
+        if (params?.tech) queryParams.append('tech', params.tech);
+        if (params?.format) queryParams.append('format', params.format);
+        if (params?.gzip) queryParams.append('gzip', '1');
+        const query = queryParams.toString();
+        return `${API_BASE_URL}/jobs/export${query ? `?${query}` : ''}`;
     },
 
     // --- HISTORICAL & ANALYTICS ---
@@ -106,7 +145,7 @@ export const api = {
         return response.json();
     },
 
-    async runEnhancedScraping(): Promise<{ status: string; message: string }> {
+    async runEnhancedScraping(): Promise<ScrapeRunStart> {
         const response = await fetch(`${API_BASE_URL}/sync/enhanced`, { method: 'POST' });
         if (!response.ok) throw new Error('Failed to run enhanced scraping');
         return response.json();
@@ -32,4 +32,83 @@ export interface CompetenceStat {
 export interface RegionStat {
     name: string;
     count: number;
+    // Ville canonique du gazetteer (absents pour ?by=region)
+    region?: string;
+    latitude?: number | null;
+    longitude?: number | null;
+}
+
+export interface StatsBundle {
+    global: GlobalStats;
+    technologies: TechStat[];
+    competences: CompetenceStat[];
+    regions: RegionStat[];
+    companies: { name: string; count: number }[];
+    sources: { name: string; count: number }[];
+}
+
+export interface ScrapeSiteProgress {
+    site: string;
+    status: 'pending' | 'running' | 'done' | 'timeout' | 'failed';
+    pages: number;
+    found: number;
+    added: number;
+    elapsed: number | null;
+}
+
+export interface ScrapeRun {
+    run_id: string;
+    kind: 'standard' | 'enhanced';
+    trigger: string | null;
+    status: 'queued' | 'running' | 'success' | 'failed';
+    requested_at: string | null;
+    started_at: string | null;
+    finished_at: string | null;
+    elapsed: number | null;
+    jobs_added: number;
+    sites: ScrapeSiteProgress[];
+    error: string | null;
+}
+
+// Réponse de POST /sync/run et /sync/enhanced ('already_running' : run en cours rejoint)
+export interface ScrapeRunStart {
+    status: 'started' | 'already_running';
+    run_id: string;
+    message: string;
+}
+
+export interface ScrapingStatus {
+    status: string;
+    last_run?: string;
+    jobs_added?: number;
+    active: ScrapeRun[];
+    last_runs: Record<string, ScrapeRun | null>;
+}
+
+// Flux /stream/events : offre unique d'un lot commité par un scraper
+export interface LiveJob {
+    id: number;
+    title: string;
+    company: string | null;
+    location: string | null;
+    source_site: string | null;
+    url_offre: string;
+    technologies: string[];
+    date_posted: string | null;
+}
+
+// Deltas d'un lot (+ totaux courants)
+export interface LiveStatsDelta {
+    jobs: number;
+    unique_jobs: number;
+    technologies: Record<string, number>;
+    sources: Record<string, number>;
+    totals?: { total_jobs: number; unique_jobs: number; total_companies: number };
+}
+
+export interface LiveEventHandlers {
+    onJobs?: (jobs: LiveJob[]) => void;
+    onStats?: (delta: LiveStatsDelta) => void;
+    // Événements perdus (client trop lent ou reconnexion tardive) : tout recharger
+    onResync?: () => void;
 }